@@ -153,16 +153,23 @@ class CameraWidget(QWidget):
                 self.status_indicator.setText("Status: Unknown model type")
                 return
 
-            if not os.path.exists(model_path):
-                print(f"Model file not found: {model_path}")
-                self.model_loaded = False
-                self.status_indicator.setText("Status: Model file not found")
-                return
-            checkpoint = torch.load(model_path, map_location=self.device)
-            if 'model_state_dict' in checkpoint:
-                self.model.load_state_dict(checkpoint['model_state_dict'])
+            # INT8 artefact written by Helper_Scripts/quantize_int8.py (TorchScript, CPU only)
+            int8_path = os.path.splitext(model_path)[0] + "_int8.pt"
+            if os.path.exists(int8_path):
+                self.device = torch.device("cpu")
+                self.model = torch.jit.load(int8_path, map_location=self.device)
+                print(f"Using INT8 model: {int8_path}")
             else:
-                self.model.load_state_dict(checkpoint)
+                if not os.path.exists(model_path):
+                    print(f"Model file not found: {model_path}")
+                    self.model_loaded = False
+                    self.status_indicator.setText("Status: Model file not found")
+                    return
+                checkpoint = torch.load(model_path, map_location=self.device)
+                if 'model_state_dict' in checkpoint:
+                    self.model.load_state_dict(checkpoint['model_state_dict'])
+                else:
+                    self.model.load_state_dict(checkpoint)
             self.model.eval()
             self.transform = transforms.Compose([
                 transforms.ToPILImage(),
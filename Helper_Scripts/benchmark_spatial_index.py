@@ -0,0 +1,78 @@
+"""
+Nearest-seat lookup speed: CoordinateMapper's grid index against the old linear scan.
+
+Seats are laid out on a jittered grid (~70 px pitch) and queried with random
+detection centres using the processor's rule (2 nearest, max_distance = 1.2 x a
+typical box diagonal). Results of both methods are checked to be identical.
+
+Usage:
+    python benchmark_spatial_index.py [--seats 50 500 5000] [--queries 20000]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Main_App"))
+
+from Mapper import CoordinateMapper
+from Student import Student
+
+
+def linear_nearest_n(mapped_students, x, y, n=2, max_distance=None):
+    """The pre-index implementation of CoordinateMapper.nearest_n_students"""
+    dists = []
+    for roll, (cx, cy) in mapped_students.items():
+        dist = math.hypot(cx - x, cy - y)
+        if max_distance is None or dist <= max_distance:
+            dists.append((roll, dist))
+    dists.sort(key=lambda t: t[1])
+    return dists[:n]
+
+
+def build_mapper(num_seats, pitch=70, seed=0):
+    rng = random.Random(seed)
+    cols = int(math.ceil(math.sqrt(num_seats * 16 / 9)))
+    mapper = CoordinateMapper()
+    for k in range(num_seats):
+        stu = Student(f"Student {k}", "DEP", f"R{k:05d}")
+        x = (k % cols) * pitch + rng.uniform(-10, 10) + pitch
+        y = (k // cols) * pitch + rng.uniform(-10, 10) + pitch
+        mapper.map_student(x, y, stu)
+    return mapper
+
+
+def time_queries(fn, queries):
+    t0 = time.perf_counter()
+    results = [fn(x, y, d) for x, y, d in queries]
+    return (time.perf_counter() - t0) / len(queries) * 1e6, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid index vs linear nearest-seat benchmark")
+    parser.add_argument("--seats", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'Seats':>7}{'Linear (us)':>14}{'Index (us)':>13}{'Speed-up':>11}{'Match':>8}")
+    print("-" * 53)
+    for num_seats in args.seats:
+        mapper = build_mapper(num_seats)
+        xs = [p[0] for p in mapper.mapped_students.values()]
+        ys = [p[1] for p in mapper.mapped_students.values()]
+        rng = random.Random(1)
+        queries = [
+            (rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys)), 1.2 * rng.uniform(60, 160))
+            for _ in range(args.queries)
+        ]
+
+        linear_us, linear_res = time_queries(
+            lambda x, y, d: linear_nearest_n(mapper.mapped_students, x, y, 2, d), queries)
+        index_us, index_res = time_queries(
+            lambda x, y, d: mapper.nearest_n_students(x, y, n=2, max_distance=d), queries)
+
+        match = all([r for r, _ in a] == [r for r, _ in b] for a, b in zip(linear_res, index_res))
+        print(f"{num_seats:>7}{linear_us:>14.1f}{index_us:>13.1f}{linear_us / index_us:>10.1f}x{str(match):>8}")
@@ -0,0 +1,134 @@
+"""
+Latency / recall trade-off of tiled inference against full-frame inference on one clip.
+
+Without labels, recall is measured against the union of both modes' detections
+(boxes found by either mode count as ground truth), which shows how many small,
+far-away students each mode misses. With --labels, YOLO label files named
+frame_<index>.txt (1-based frame index, zero padded to 6 digits) are used instead.
+
+Usage:
+    python benchmark_tiling.py clip.mp4 weights/bestone.onnx [--tile 640] [--overlap 0.2] [--frames 200]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Main_App"))
+
+from cheat_detector import CheatDetector
+from region_inference import TilePlanner, detect_in_regions, merge_region_detections
+from box_utils import box_iou
+from detections import Detections
+
+
+def read_frames(video_path, max_frames, stride):
+    cap = cv2.VideoCapture(str(video_path))
+    frames = []
+    idx = 0
+    while cap.isOpened() and len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        idx += 1
+        if (idx - 1) % stride == 0:
+            frames.append((idx, frame))
+    cap.release()
+    return frames
+
+
+def load_labels(label_dir, frame_idx, width, height):
+    path = Path(label_dir) / f"frame_{frame_idx:06d}.txt"
+    boxes = []
+    if path.exists():
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 5 or int(float(parts[0])) != 0:
+                    continue
+                _, x_c, y_c, w, h = map(float, parts[:5])
+                boxes.append([(x_c - w / 2) * width, (y_c - h / 2) * height,
+                              (x_c + w / 2) * width, (y_c + h / 2) * height])
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def to_boxes(dets):
+    return Detections.coerce(dets).boxes
+
+
+def recall(pred_boxes, gt_boxes, iou_thresh=0.5):
+    """Fraction of ground-truth boxes matched by at least one prediction"""
+    if len(gt_boxes) == 0:
+        return 0, 0
+    hits = 0
+    for gt in gt_boxes:
+        if len(pred_boxes) and box_iou(gt, pred_boxes).max() >= iou_thresh:
+            hits += 1
+    return hits, len(gt_boxes)
+
+
+def run_mode(name, fn, frames):
+    fn(frames[0][1])  # warm-up
+    outputs = []
+    t0 = time.perf_counter()
+    for _, frame in frames:
+        outputs.append(fn(frame))
+    elapsed = time.perf_counter() - t0
+    return name, elapsed * 1000 / len(frames), outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiled vs full-frame inference benchmark")
+    parser.add_argument("video")
+    parser.add_argument("weights")
+    parser.add_argument("--tile", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--no-full-frame", action="store_true", help="Tiles only, no extra full-frame pass")
+    parser.add_argument("--frames", type=int, default=200, help="Frames to evaluate")
+    parser.add_argument("--stride", type=int, default=5, help="Use every Nth frame")
+    parser.add_argument("--conf", type=float, default=0.3)
+    parser.add_argument("--labels", default=None, help="Folder of frame_<idx>.txt YOLO labels")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames, args.stride)
+    if not frames:
+        print(f"Could not read frames from {args.video}")
+        sys.exit(1)
+
+    detector = CheatDetector(args.weights)
+    planner = TilePlanner(args.tile, args.overlap, include_full_frame=not args.no_full_frame)
+    h, w = frames[0][1].shape[:2]
+    print(f"Clip: {w}x{h}, {len(frames)} frames | {len(planner.regions_for((h, w)))} regions per frame")
+
+    modes = [
+        run_mode("full", lambda f: detector.detect_frame(f, conf_thresh=args.conf), frames),
+        run_mode("tiled", lambda f: detect_in_regions(detector, [f], planner, args.conf)[0], frames),
+    ]
+
+    # Reference boxes per frame
+    references = []
+    for i, (frame_idx, _) in enumerate(frames):
+        if args.labels:
+            references.append(load_labels(args.labels, frame_idx, w, h))
+        else:
+            union = merge_region_detections(modes[0][2][i] + modes[1][2][i], 0.5)
+            references.append(to_boxes(union))
+
+    print("\n" + "=" * 60)
+    print(f"{'Mode':<8}{'Latency (ms)':>14}{'Boxes/frame':>14}{'Recall':>10}{'Hits':>12}")
+    print("-" * 60)
+    for name, latency, outputs in modes:
+        hits = total = boxes = 0
+        for dets, ref in zip(outputs, references):
+            boxes += len(dets)
+            h_, t_ = recall(to_boxes(dets), ref)
+            hits += h_
+            total += t_
+        rec = hits / total if total else 0.0
+        print(f"{name:<8}{latency:>14.1f}{boxes / len(frames):>14.2f}{rec:>10.3f}{f'{hits}/{total}':>12}")
+    print("=" * 60)
+    print("Recall measured against " + ("labels" if args.labels else "the union of both modes' detections"))
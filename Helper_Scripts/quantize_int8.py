@@ -0,0 +1,407 @@
+"""
+INT8 post-training quantization for the EyeSpy detectors.
+
+Calibrates on a folder of classroom frames and writes a quantized artefact next to the FP32 weights:
+  - YOLO (.pt / .onnx)          -> <name>_int8.onnx  (load with CheatDetector, onnx backend)
+  - cnn/resnet/densenet/mobilenet -> <name>_int8.pt   (TorchScript, picked up by CameraWidget)
+
+Then prints a side-by-side latency / precision / recall table against the FP32 model.
+Labels (optional) are YOLO txt files with the same stem as each image; without them the
+INT8 model is scored against the FP32 predictions instead.
+
+Usage:
+    python quantize_int8.py yolo weights/bestone.pt calib_frames/ [--labels labels/]
+    python quantize_int8.py cnn models/CNN37.pth calib_frames/ [--labels labels/]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Main_App modules (CheatDetector, letterbox, box helpers)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Main_App"))
+# Custom model definitions (cnn.py, resnet.py, densenet.py, mobilenet.py)
+MODEL_CONFIG_DIR = Path(__file__).resolve().parent.parent / "Model_configuration"
+
+try:
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+except Exception:
+    CalibrationDataReader = object
+    quantize_static = None
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+CUSTOM_TYPES = ("cnn", "resnet", "densenet", "mobilenet")
+CUSTOM_INPUT_SIZE = (320, 320)
+CALIB_METHODS = ("minmax", "entropy", "percentile")
+
+
+def list_images(folder, limit=None):
+    images = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_EXTS)
+    return images[:limit] if limit else images
+
+
+def read_yolo_labels(label_dir, image_path, width, height):
+    """Return (class_ids, xyxy boxes) for an image, or None if it has no label file"""
+    label_path = Path(label_dir) / (image_path.stem + ".txt")
+    if not label_path.exists():
+        return None
+    classes, boxes = [], []
+    with open(label_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            class_id, x_c, y_c, w, h = map(float, parts[:5])
+            classes.append(int(class_id))
+            boxes.append([(x_c - w / 2) * width, (y_c - h / 2) * height,
+                          (x_c + w / 2) * width, (y_c + h / 2) * height])
+    return np.array(classes, dtype=np.int64), np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def match_precision_recall(predictions, ground_truths, iou_thresh=0.5):
+    """
+    Greedy box matching over a set of images.
+
+    Args:
+        predictions: list of (boxes (N, 4), scores (N,)) per image
+        ground_truths: list of boxes (M, 4) per image
+    """
+    from box_utils import box_iou
+
+    tp = fp = fn = 0
+    for (boxes, scores), gt in zip(predictions, ground_truths):
+        matched = np.zeros(len(gt), dtype=bool)
+        for i in np.argsort(-scores):
+            if len(gt):
+                ious = box_iou(boxes[i], gt)
+                ious[matched] = 0
+                j = int(ious.argmax())
+                if ious[j] >= iou_thresh:
+                    matched[j] = True
+                    tp += 1
+                    continue
+            fp += 1
+        fn += int((~matched).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return precision, recall
+
+
+def print_comparison(rows, reference_note):
+    print("\n" + "=" * 60)
+    print(f"{'Model':<10}{'Latency (ms)':>14}{'Precision':>12}{'Recall':>10}{'Size (MB)':>12}")
+    print("-" * 60)
+    for name, latency_ms, precision, recall, size_mb in rows:
+        print(f"{name:<10}{latency_ms:>14.2f}{precision:>12.3f}{recall:>10.3f}{size_mb:>12.1f}")
+    print("=" * 60)
+    print(f"Precision/recall measured against {reference_note}")
+
+
+def file_size_mb(path):
+    return os.path.getsize(path) / (1024 * 1024) if path and os.path.exists(path) else 0.0
+
+
+# ==================== YOLO (onnxruntime static quantization) ====================
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed calibration frames to onnxruntime's calibrator"""
+
+    def __init__(self, image_paths, input_name, imgsz):
+        from onnx_backend import letterbox
+        self._letterbox = letterbox
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iter = iter(self.image_paths)
+
+    def get_next(self):
+        for path in self._iter:
+            img = cv2.imread(str(path))
+            if img is None:
+                continue
+            padded, _, _ = self._letterbox(img, self.imgsz)
+            blob = cv2.dnn.blobFromImage(padded, scalefactor=1.0 / 255.0, swapRB=True)
+            return {self.input_name: blob.astype(np.float32)}
+        return None
+
+    def rewind(self):
+        self._iter = iter(self.image_paths)
+
+
+def export_yolo_onnx(weights, imgsz):
+    """Export .pt weights to a static-shape FP32 ONNX model (needs ultralytics)"""
+    from ultralytics import YOLO
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+
+
+def quantize_yolo(weights, calib_dir, out_path=None, method="minmax", imgsz=640, limit=200,
+                  exclude_nodes=None):
+    """Static INT8 quantization (QDQ, per-channel weights) of a YOLOv8 model"""
+    if quantize_static is None:
+        raise RuntimeError("onnxruntime package not installed. Install onnxruntime to quantize YOLO models.")
+    import onnxruntime as ort
+
+    fp32_onnx = weights if str(weights).lower().endswith(".onnx") else export_yolo_onnx(weights, imgsz)
+    out_path = out_path or str(Path(fp32_onnx).with_name(Path(fp32_onnx).stem + "_int8.onnx"))
+
+    # Shape inference / graph cleanup makes calibration more accurate; optional
+    model_input = fp32_onnx
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        model_input = str(Path(out_path).with_name(Path(fp32_onnx).stem + "_prep.onnx"))
+        quant_pre_process(fp32_onnx, model_input)
+    except Exception as e:
+        print(f"[WARN] quant_pre_process skipped: {e}")
+        model_input = fp32_onnx
+
+    session = ort.InferenceSession(model_input, providers=["CPUExecutionProvider"])
+    inp = session.get_inputs()[0]
+    shape = inp.shape
+    size = (shape[2] if isinstance(shape[2], int) else imgsz, shape[3] if isinstance(shape[3], int) else imgsz)
+
+    images = list_images(calib_dir, limit)
+    if not images:
+        raise RuntimeError(f"No calibration images found in {calib_dir}")
+    print(f"Calibrating on {len(images)} frames ({method}) ...")
+
+    methods = {
+        "minmax": CalibrationMethod.MinMax,
+        "entropy": CalibrationMethod.Entropy,
+        "percentile": CalibrationMethod.Percentile,
+    }
+    quantize_static(
+        model_input,
+        out_path,
+        FrameCalibrationReader(images, inp.name, size),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=methods[method],
+        nodes_to_exclude=exclude_nodes or [],
+    )
+    if model_input != fp32_onnx and os.path.exists(model_input):
+        os.remove(model_input)
+    print(f"INT8 model written to: {out_path}")
+    return fp32_onnx, out_path
+
+
+def compare_yolo(fp32_path, int8_path, eval_images, label_dir=None, conf_thresh=0.3):
+    from cheat_detector import CheatDetector
+
+    detectors = [("FP32", CheatDetector(fp32_path), fp32_path), ("INT8", CheatDetector(int8_path), int8_path)]
+    frames = [img for img in (cv2.imread(str(p)) for p in eval_images) if img is not None]
+    if not frames:
+        print("No evaluation frames to compare on.")
+        return
+
+    from detections import Detections
+
+    def as_arrays(dets):
+        dets = Detections.coerce(dets)
+        return dets.boxes.copy(), dets.conf.copy()
+
+    outputs = {}
+    latencies = {}
+    for name, det, _ in detectors:
+        det.detect_frame(frames[0], conf_thresh=conf_thresh)  # warm-up
+        preds = []
+        t0 = time.perf_counter()
+        for frame in frames:
+            preds.append(as_arrays(det.detect_frame(frame, conf_thresh=conf_thresh)))
+        latencies[name] = (time.perf_counter() - t0) * 1000 / len(frames)
+        outputs[name] = preds
+
+    ground_truths = None
+    if label_dir:
+        ground_truths = []
+        for path, frame in zip(eval_images, frames):
+            labels = read_yolo_labels(label_dir, path, frame.shape[1], frame.shape[0])
+            if labels is None:
+                ground_truths.append(np.empty((0, 4), dtype=np.float32))
+            else:
+                classes, boxes = labels
+                ground_truths.append(boxes[classes == 0])
+
+    rows = []
+    for name, _, path in detectors:
+        if ground_truths is not None:
+            p, r = match_precision_recall(outputs[name], ground_truths)
+        else:
+            p, r = match_precision_recall(outputs[name], [b for b, _ in outputs["FP32"]])
+        rows.append((name, latencies[name], p, r, file_size_mb(path)))
+    print_comparison(rows, "labels" if ground_truths is not None else "FP32 predictions (no labels given)")
+
+
+# ==================== Custom models (torch FX static quantization) ====================
+
+def build_custom_model(model_type):
+    if str(MODEL_CONFIG_DIR) not in sys.path:
+        sys.path.insert(0, str(MODEL_CONFIG_DIR))
+    from cnn import ObjectDetectionCNN
+    from resnet import ObjectDetectionResNet
+    from densenet import ObjectDetectionDenseNet121
+    from mobilenet import ObjectDetectionMobileNetV2
+
+    if model_type == "cnn":
+        return ObjectDetectionCNN(input_channels=3, num_predictions=2)
+    if model_type == "resnet":
+        return ObjectDetectionResNet(num_predictions=2)
+    if model_type == "densenet":
+        return ObjectDetectionDenseNet121(num_predictions=2)
+    if model_type == "mobilenet":
+        return ObjectDetectionMobileNetV2(num_predictions=2)
+    raise ValueError(f"Unknown model_type: {model_type}")
+
+
+def load_custom_fp32(model_type, model_path):
+    import torch
+
+    model = build_custom_model(model_type)
+    checkpoint = torch.load(model_path, map_location="cpu")
+    if isinstance(checkpoint, dict) and 'model_state_dict' in checkpoint:
+        model.load_state_dict(checkpoint['model_state_dict'])
+    else:
+        model.load_state_dict(checkpoint)
+    return model.eval()
+
+
+def custom_transform():
+    """Same preprocessing as CameraWidget (RGB frame in)"""
+    import torchvision.transforms as transforms
+    return transforms.Compose([
+        transforms.ToPILImage(),
+        transforms.Resize(CUSTOM_INPUT_SIZE),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+    ])
+
+
+def load_custom_inputs(image_paths):
+    transform = custom_transform()
+    tensors = []
+    for path in image_paths:
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        rgb = cv2.cvtColor(cv2.resize(img, CUSTOM_INPUT_SIZE), cv2.COLOR_BGR2RGB)
+        tensors.append(transform(rgb).unsqueeze(0))
+    return tensors
+
+
+def quantize_custom(model_type, model_path, calib_dir, out_path=None, backend="x86", limit=200):
+    """Static INT8 quantization with FX graph mode; saves a TorchScript artefact"""
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    out_path = out_path or str(Path(model_path).with_name(Path(model_path).stem + "_int8.pt"))
+    torch.backends.quantized.engine = backend
+
+    model = load_custom_fp32(model_type, model_path)
+    example = torch.randn(1, 3, *CUSTOM_INPUT_SIZE)
+    prepared = prepare_fx(model, get_default_qconfig_mapping(backend), (example,))
+
+    calib = load_custom_inputs(list_images(calib_dir, limit))
+    if not calib:
+        raise RuntimeError(f"No calibration images found in {calib_dir}")
+    print(f"Calibrating on {len(calib)} frames ...")
+    with torch.inference_mode():
+        for tensor in calib:
+            prepared(tensor)
+
+    quantized = convert_fx(prepared)
+    with torch.inference_mode():
+        scripted = torch.jit.trace(quantized, example)
+    torch.jit.save(scripted, out_path)
+    print(f"INT8 model written to: {out_path}")
+    return out_path
+
+
+def compare_custom(model_type, fp32_path, int8_path, eval_images, label_dir=None, threshold=0.5):
+    """
+    Binary comparison scored like Evaluation.py: prediction is 1 when the first prediction's
+    objectness exceeds threshold, ground truth is 1 when the first label's class is 1.
+    """
+    import torch
+
+    models = [("FP32", load_custom_fp32(model_type, fp32_path), fp32_path),
+              ("INT8", torch.jit.load(int8_path, map_location="cpu").eval(), int8_path)]
+
+    paths = [p for p in eval_images if cv2.imread(str(p)) is not None]
+    inputs = load_custom_inputs(paths)
+    if not inputs:
+        print("No evaluation frames to compare on.")
+        return
+
+    predictions = {}
+    latencies = {}
+    for name, model, _ in models:
+        with torch.inference_mode():
+            model(inputs[0])  # warm-up
+            preds = []
+            t0 = time.perf_counter()
+            for tensor in inputs:
+                objectness = torch.sigmoid(model(tensor)[0][0, 0]).item()
+                preds.append(1 if objectness > threshold else 0)
+            latencies[name] = (time.perf_counter() - t0) * 1000 / len(inputs)
+        predictions[name] = np.array(preds)
+
+    if label_dir:
+        truth, keep = [], []
+        for i, path in enumerate(paths):
+            labels = read_yolo_labels(label_dir, path, 1, 1)
+            if labels is None or len(labels[0]) == 0:
+                continue
+            keep.append(i)
+            truth.append(1 if labels[0][0] > 0.5 else 0)
+        reference = np.array(truth)
+        note = "labels"
+    else:
+        keep = list(range(len(paths)))
+        reference = predictions["FP32"]
+        note = "FP32 predictions (no labels given)"
+
+    rows = []
+    for name, _, path in models:
+        pred = predictions[name][keep]
+        tp = int(((pred == 1) & (reference == 1)).sum())
+        fp = int(((pred == 1) & (reference == 0)).sum())
+        fn = int(((pred == 0) & (reference == 1)).sum())
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        rows.append((name, latencies[name], precision, recall, file_size_mb(path)))
+    print_comparison(rows, note)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization for EyeSpy models")
+    parser.add_argument("model_type", choices=("yolo",) + CUSTOM_TYPES)
+    parser.add_argument("weights", help="FP32 weights (.pt/.onnx for yolo, .pth for custom models)")
+    parser.add_argument("calib_dir", help="Folder of classroom frames used for calibration")
+    parser.add_argument("--labels", default=None, help="YOLO label folder for precision/recall")
+    parser.add_argument("--eval-dir", default=None, help="Frames for the comparison (default: calib_dir)")
+    parser.add_argument("--out", default=None, help="Output path for the quantized artefact")
+    parser.add_argument("--limit", type=int, default=200, help="Maximum calibration frames")
+    parser.add_argument("--method", choices=CALIB_METHODS, default="minmax", help="YOLO calibration method")
+    parser.add_argument("--imgsz", type=int, default=640, help="YOLO export input size")
+    parser.add_argument("--exclude-nodes", nargs="*", default=None, help="ONNX nodes kept in FP32")
+    parser.add_argument("--conf", type=float, default=0.3, help="Confidence threshold for the comparison")
+    args = parser.parse_args()
+
+    eval_images = list_images(args.eval_dir or args.calib_dir)
+
+    if args.model_type == "yolo":
+        fp32, int8 = quantize_yolo(args.weights, args.calib_dir, args.out, args.method,
+                                   args.imgsz, args.limit, args.exclude_nodes)
+        compare_yolo(fp32, int8, eval_images, args.labels, args.conf)
+    else:
+        int8 = quantize_custom(args.model_type, args.weights, args.calib_dir, args.out, limit=args.limit)
+        compare_custom(args.model_type, args.weights, int8, eval_images, args.labels)
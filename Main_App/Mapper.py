@@ -1,6 +1,9 @@
-import math
 import pickle
+import numpy as np
 from Student import Student
+from spatial_index import GridIndex
+from roster_index import RosterIndex
+from seat_raster import SeatLabelRaster
 
 class CoordinateMapper:
     def __init__(self):
@@ -8,64 +11,182 @@ class CoordinateMapper:
         self.mapped_students = {}  # {roll: (x, y)}
         # Dictionary to store Student objects for mapped students
         self.mapped_student_objects = {}  # {roll: Student}
-        # List of unmapped Student objects
-        self.unmapped_students = []
+        # Unmapped Student objects (roll index + search index); see unmapped_students
+        self._roster = RosterIndex()
+        # Grid index over mapped_students for nearest-seat queries
+        self._index = GridIndex()
+        # Optional nearest-seat label raster, rebuilt lazily when the mapping version changes
+        self._version = 0
+        self._raster_config = None
+        self._raster = None
+        self._raster_version = -1
+        self._seat_array = None
+        self._seat_array_version = -1
+
+    def __getstate__(self):
+        # Index and raster are derived data; keep pickles identical to the pre-index format
+        state = self.__dict__.copy()
+        for key in ('_index', '_version', '_raster_config', '_raster', '_raster_version',
+                    '_seat_array', '_seat_array_version', '_roster'):
+            state.pop(key, None)
+        state['unmapped_students'] = self.unmapped_students
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self._roster = RosterIndex(state.pop('unmapped_students', []))
+        self.__dict__.update(state)
+        self._index = GridIndex()
+        self._index.rebuild(self.mapped_students.items())
+        self._version = 0
+        self._raster_config = None
+        self._raster = None
+        self._raster_version = -1
+        self._seat_array = None
+        self._seat_array_version = -1
+
+    def seat_array(self):
+        """
+        Mapped seats as arrays for vectorised distance computations (cached until the mapping changes)
+
+        Returns:
+            (rolls list, (S, 2) float array of x, y)
+        """
+        if self._seat_array_version != self._version:
+            rolls = list(self.mapped_students.keys())
+            coords = np.array([self.mapped_students[r] for r in rolls], dtype=np.float64).reshape(-1, 2)
+            self._seat_array = (rolls, coords)
+            self._seat_array_version = self._version
+        return self._seat_array
+
+    def enable_seat_raster(self, scale=0.25, margin=256):
+        """
+        Answer nearest-seat queries (n <= 2 by default) from a precomputed label raster.
+        The raster is rebuilt on the first query after any mapping change.
+
+        Args:
+            scale: Raster pixels per image pixel (0.25 = one label per 4x4 pixels)
+            margin: Image pixels covered around the seats; queries outside use the index
+        """
+        config = {'scale': scale, 'margin': margin}
+        if config != self._raster_config:
+            self._raster_config = config
+            self._raster = None
+            self._raster_version = -1
+
+    def disable_seat_raster(self):
+        self._raster_config = None
+        self._raster = None
+        self._raster_version = -1
+
+    def _seat_raster(self):
+        """Current raster, rebuilt if the mapping changed since it was built"""
+        if self._raster_config is None:
+            return None
+        if self._raster_version != self._version:
+            self._raster = SeatLabelRaster(self.mapped_students, self._index, **self._raster_config)
+            self._raster_version = self._version
+        return self._raster
+
+    @property
+    def unmapped_students(self):
+        """Unmapped Student objects in the order they were added (a copy; use the methods below to change it)"""
+        return list(self._roster)
+
+    def unmapped_count(self):
+        return len(self._roster)
+
+    def search_unmapped(self, query, limit=None):
+        """Unmapped students whose name, roll or department contains query (case-insensitive)"""
+        return self._roster.search(query, limit)
 
     def add_student(self, student):
         """Add a student to unmapped list if not already present"""
         # Use roll-based comparison to avoid duplicate rolls
         if student.roll in self.mapped_students:
             return
-        if all(stu.roll != student.roll for stu in self.unmapped_students):
-            self.unmapped_students.append(student)
+        self._roster.add(student)
+
+    def add_students(self, students):
+        """
+        Bulk add to the unmapped list in one pass (hash lookups; callers refresh views once afterwards)
+
+        Args:
+            students: Iterable of Student (may be a generator, e.g. file_manager.read_students)
+
+        Returns:
+            (number added, list of Students skipped because the roll already exists)
+        """
+        added = 0
+        duplicates = []
+        for student in students:
+            if student.roll in self.mapped_students or not self._roster.add(student):
+                duplicates.append(student)
+            else:
+                added += 1
+        return added, duplicates
+
+    def remove_student(self, roll):
+        """Remove an unmapped student; returns the Student or None"""
+        return self._roster.remove(roll)
+
+    def update_student(self, student, name, department, roll):
+        """
+        Edit a student's details, keeping the roll indexes in step
+
+        Returns:
+            False if roll already belongs to another student
+        """
+        if roll != student.roll and self.get_student_by_roll(roll) is not None:
+            return False
+        old_roll = student.roll
+        student.name, student.department, student.roll = name, department, roll
+        if old_roll in self._roster:
+            self._roster.update(old_roll, student)
+        elif old_roll in self.mapped_students and roll != old_roll:
+            self.mapped_students[roll] = self.mapped_students.pop(old_roll)
+            self.mapped_student_objects[roll] = self.mapped_student_objects.pop(old_roll)
+            self._index.remove(old_roll)
+            self._index.insert(roll, *self.mapped_students[roll])
+            self._version += 1
+        return True
 
     def map_student(self, x, y, student):
         """Map a student to coordinates"""
         self.mapped_students[student.roll] = (x, y)
         self.mapped_student_objects[student.roll] = student
+        self._index.insert(student.roll, x, y)
+        self._version += 1
         # remove from unmapped if present
-        self.unmapped_students = [stu for stu in self.unmapped_students if stu.roll != student.roll]
+        self._roster.remove(student.roll)
 
     def nearest_student(self, x, y):
         """Find the nearest student roll to given coordinates"""
-        if not self.mapped_students:
-            return None
-
-        nearest_roll = None
-        min_dist = float('inf')
-        for roll, (cx, cy) in self.mapped_students.items():
-            dist = math.hypot(cx - x, cy - y)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_roll = roll
-        return nearest_roll
+        nearest = self.nearest_n_students(x, y, n=1)
+        return nearest[0][0] if nearest else None
 
     def nearest_n_students(self, x, y, n=2, max_distance=None):
         """
         Return up to n nearest mapped students to (x,y).
         If max_distance is provided, only students within that distance are returned.
         """
-        if not self.mapped_students:
-            return []
-
-        dists = []
-        for roll, (cx, cy) in self.mapped_students.items():
-            dist = math.hypot(cx - x, cy - y)
-            if max_distance is None or dist <= max_distance:
-                dists.append((roll, dist))
-
-        if not dists:
-            return []
-        dists.sort(key=lambda t: t[1])
+        raster = self._seat_raster()
+        if raster is not None:
+            nearest = raster.lookup(x, y, n, max_distance)
+            if nearest is not None:
+                return nearest
+        return self._index.knn(x, y, k=n, max_distance=max_distance)
 
-        return dists[:n]
+    def students_within(self, x, y, radius):
+        """Return [(roll, distance), ...] for every mapped student within radius of (x,y), nearest first"""
+        return self._index.radius(x, y, radius)
 
     def get_student_by_roll(self, roll):
         """Get Student object by roll number"""
         # Check in unmapped students
-        for stu in self.unmapped_students:
-            if stu.roll == roll:
-                return stu
+        stu = self._roster.get(roll)
+        if stu is not None:
+            return stu
         # Check in mapped students
         return self.mapped_student_objects.get(roll, None)
 
@@ -73,10 +194,12 @@ class CoordinateMapper:
         """Unmap a student by roll and move back to unmapped list"""
         if roll in self.mapped_students:
             student_obj = self.mapped_student_objects.get(roll)
-            if student_obj and all(stu.roll != student_obj.roll for stu in self.unmapped_students):
-                self.unmapped_students.append(student_obj)
+            if student_obj:
+                self._roster.add(student_obj)
             del self.mapped_students[roll]
             del self.mapped_student_objects[roll]
+            self._index.remove(roll)
+            self._version += 1
             return True
         return False
 
@@ -84,10 +207,12 @@ class CoordinateMapper:
         """Move all mapped students back to unmapped"""
         for roll in list(self.mapped_students.keys()):
             student_obj = self.mapped_student_objects.get(roll)
-            if student_obj and all(stu.roll != student_obj.roll for stu in self.unmapped_students):
-                self.unmapped_students.append(student_obj)
+            if student_obj:
+                self._roster.add(student_obj)
         self.mapped_students.clear()
         self.mapped_student_objects.clear()
+        self._index.clear()
+        self._version += 1
 
     def save(self, filepath='data.pkl'):
         """Save mapper state to file (pickles the mapper instance)"""
@@ -99,6 +224,10 @@ class CoordinateMapper:
         """Load mapper state from file and return CoordinateMapper instance"""
         try:
             with open(filepath, 'rb') as f:
-                return pickle.load(f)
+                data = pickle.load(f)
         except FileNotFoundError:
-            return CoordinateMapper()
\ No newline at end of file
+            return CoordinateMapper()
+        # Project files saved from the UI wrap the mapper in {'mapper': ...}
+        if isinstance(data, dict) and 'mapper' in data:
+            return data['mapper']
+        return data
\ No newline at end of file
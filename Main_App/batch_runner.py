@@ -0,0 +1,403 @@
+"""
+Batch Runner Module
+Headless post-exam processing across a process pool, either a folder of recordings
+(one task per video) or one long recording split into frame-range chunks.
+Each worker process loads its own model, runs detection + seat assignment with a private
+deferred DetectionProcessor, and returns its top-N candidates (JPEG bytes in memory)
+and log rows; the parent stitches them in frame order into one top-N set and one log.
+
+Usage:
+    python batch_runner.py recordings/ weights/bestone.onnx project.pkl [--workers 4] [--out output]
+    python batch_runner.py exam.mp4 weights/bestone.onnx project.pkl [--workers 6] [--overlap 30]
+"""
+
+import argparse
+import math
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import cv2
+
+from Mapper import CoordinateMapper
+from cheat_detector import CheatDetector
+from detection_processor import DetectionProcessor
+from log_sink import LOG_COLUMNS
+from playback_manager import list_videos
+from tracker import IoUTracker
+
+
+DEFAULT_TRACKER = {"iou_thresh": 0.3, "high_conf": None, "max_missed": 15, "min_hits": 3}
+
+# Per-process state set by _init_worker
+_WORKER = {}
+
+
+def _init_worker(config, mapper, progress):
+    """Pool initializer: one detector instance per worker process"""
+    cv2.setNumThreads(1)
+    _WORKER["config"] = config
+    _WORKER["mapper"] = mapper
+    _WORKER["progress"] = progress
+    _WORKER["detector"] = CheatDetector(config["model_path"], device=config["device"], backend=config["backend"])
+
+
+def probe_video(path):
+    """
+    Returns:
+        (frame_count, fps) as reported by the container (frame_count may be 0 if unknown)
+    """
+    cap = cv2.VideoCapture(str(path))
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), cap.get(cv2.CAP_PROP_FPS) or 25
+    finally:
+        cap.release()
+
+
+def _seek(cap, pos):
+    """Seek to frame position pos; falls back to grabbing forward if the container seeks inexactly"""
+    if pos <= 0:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != pos:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for _ in range(pos):
+            if not cap.grab():
+                break
+
+
+def _process_range(task):
+    """
+    Worker task: run frames [start, end) of one video
+
+    Frame indices are 1-based like the playback loop's frame_idx, so the range covers
+    frame_idx start+1 .. end. The `overlap` frames before the range are run as warm-up:
+    they feed the tracker and seat smoothing but are not saved or logged. With the tracker,
+    the task owns incidents that start inside its range and keeps reading up to `lookahead`
+    frames past the end until those have ended; incidents that start elsewhere are dropped.
+
+    Returns:
+        Dictionary {slot, video, start, frames, seconds, candidates, rows, flagged_dir}; candidate
+        paths are relative to flagged_dir (deleted on return), row frame_files are under it
+    """
+    config = _WORKER["config"]
+    detector = _WORKER["detector"]
+    mapper = _WORKER["mapper"]
+    progress = _WORKER["progress"]
+    slot = task["slot"]
+    src_name = task["video"]
+    start = task.get("start", 0)
+    end = task.get("end")
+    stop = math.inf if end is None else end
+    first = max(0, start - task.get("overlap", 0))
+    chunked = start > 0 or end is not None
+
+    tmp_dir = tempfile.mkdtemp(prefix="eyespy_batch_")
+    stem = Path(src_name).stem
+    processor = DetectionProcessor(
+        output_dir=tmp_dir,
+        # Evidence stays in the chunk's temp dir; the parent's merge writes only the survivors
+        flagged_dir=Path(tmp_dir) / "flagged_frames",
+        log_csv=Path(tmp_dir) / "flagged_log.csv",
+        top_n=config["top_n"],
+        max_entries_per_person=config["max_entries_per_person"],
+        save_gap_seconds=config["save_gap_seconds"],
+        writer_workers=0,
+        deferred_evidence=True,
+        evidence_budget_mb=config["evidence_budget_mb"],
+        log_flush_seconds=None,
+        seat_smoothing=config["seat_smoothing"],
+        evidence_prefix=f"{stem}_{start}_" if chunked else f"{stem}_",
+    )
+    tracker = IoUTracker(**config["tracker"]) if config["track_incidents"] else None
+
+    def owned(incident_or_track):
+        return start < incident_or_track.start_frame <= stop
+
+    def save_incidents(incidents):
+        for incident in incidents:
+            if owned(incident):
+                processor.process_incident(incident, mapper, timestamp=incident.end_time)
+
+    # Opened here, in the worker, only when the task's turn comes
+    cap = cv2.VideoCapture(src_name)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    # Offline clock: recording time, anchored so the last frame is at the file's mtime
+    base_ts = os.path.getmtime(src_name) - total / fps
+    _seek(cap, first)
+    hard_stop = stop + (task.get("lookahead", 0) if tracker is not None else 0)
+
+    t0 = time.perf_counter()
+    frame_idx = first
+    pending = []
+    while True:
+        ret = False
+        if frame_idx < stop or (frame_idx < hard_stop and any(owned(tr) for tr in tracker.tracks)):
+            ret, frame = cap.read()
+        if ret:
+            frame_idx += 1
+            pending.append((frame_idx, frame))
+        if pending and (len(pending) >= config["batch_size"] or not ret):
+            batch = detector.detect_batch([f for _, f in pending], conf_thresh=config["conf_thresh"])
+            for (idx, frm), dets in zip(pending, batch):
+                ts = base_ts + idx / fps
+                if tracker is not None:
+                    processor.update_seat_smoothing(dets, mapper, src_name, idx, assignment=config["assignment"])
+                    save_incidents(tracker.update(dets, frm, ts, idx, src_name))
+                elif idx <= stop:
+                    processor.process_frame(dets, frm, mapper, src_name, idx, assignment=config["assignment"],
+                                            timestamp=ts, warmup=idx <= start)
+            pending = []
+            if progress is not None:
+                progress[slot] = max(0, min(frame_idx, stop) - start)
+        if not ret:
+            break
+    cap.release()
+
+    if tracker is not None:
+        save_incidents(tracker.flush())
+
+    result = {
+        "slot": slot,
+        "video": src_name,
+        "start": start,
+        "frames": max(0, min(frame_idx, stop) - start),
+        "seconds": time.perf_counter() - t0,
+        "candidates": processor.export_candidates(release=True),
+        "rows": processor.log_sink.query(),
+        "flagged_dir": str(processor.flagged_dir),
+    }
+    processor.close()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return result
+
+
+def _reroot_rows(rows, worker_dir, flagged_dir):
+    """Point worker log rows at the merged flagged_dir (the worker's own dir no longer exists)"""
+    for row in rows:
+        if row["frame_file"]:
+            rel = Path(row["frame_file"]).relative_to(worker_dir)
+            row["frame_file"] = str(Path(flagged_dir) / rel)
+        yield row
+
+
+def _format_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m{seconds % 60:02d}s"
+
+
+def _run_tasks(tasks, total_frames, model_path, mapper, output_dir, workers, progress_seconds, options):
+    """Run range tasks on the pool, then stitch their results in task (frame) order"""
+    output_dir = Path(output_dir)
+    flagged_dir = output_dir / "flagged_frames"
+    config = {
+        "model_path": str(model_path),
+        "device": options["device"],
+        "backend": options["backend"],
+        "conf_thresh": options["conf_thresh"],
+        "batch_size": max(1, int(options["batch_size"])),
+        "top_n": options["top_n"],
+        "max_entries_per_person": options["max_entries_per_person"],
+        "save_gap_seconds": options["save_gap_seconds"],
+        "track_incidents": options["track_incidents"],
+        "tracker": options["tracker"] or DEFAULT_TRACKER,
+        "seat_smoothing": options["seat_smoothing"],
+        "assignment": options["assignment"],
+        "evidence_budget_mb": options["evidence_budget_mb"],
+    }
+
+    # Candidates stay in memory until close() so merging never churns the disk
+    processor = DetectionProcessor(
+        output_dir, flagged_dir, output_dir / "flagged_log.csv",
+        top_n=options["top_n"], max_entries_per_person=options["max_entries_per_person"],
+        save_gap_seconds=options["save_gap_seconds"], deferred_evidence=True, log_format=options["log_format"]
+    )
+
+    # spawn: forked children would inherit the parent's detector/threads state
+    ctx = mp.get_context("spawn")
+    progress = ctx.Array("q", len(tasks), lock=False)
+    results = {}
+    failed = []
+    t0 = time.perf_counter()
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(tasks))), mp_context=ctx,
+                             initializer=_init_worker, initargs=(config, mapper, progress)) as pool:
+        futures = {pool.submit(_process_range, task): task for task in tasks}
+        waiting = set(futures)
+        while waiting:
+            done, waiting = wait(waiting, timeout=progress_seconds, return_when=FIRST_COMPLETED)
+            for fut in done:
+                task = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as ex:
+                    print(f"[ERROR] {task['video']} @{task.get('start', 0)}: {ex}")
+                    failed.append(task)
+                    continue
+                results[res["slot"]] = res
+                progress[res["slot"]] = res["frames"]
+
+            frames = sum(progress)
+            elapsed = time.perf_counter() - t0
+            fps = frames / max(elapsed, 1e-6)
+            line = f"[INFO] {len(results)}/{len(tasks)} tasks | {frames} frames | {fps:.1f} FPS"
+            if total_frames and fps > 0:
+                line += (f" | {100.0 * frames / total_frames:.1f}% | "
+                         f"ETA {_format_eta(max(0, total_frames - frames) / fps)}")
+            print(line)
+
+    # Stitch in frame order: tasks are listed by video, then by start frame
+    frames = 0
+    rows = []
+    for slot in sorted(results):
+        res = results[slot]
+        # Each chunk applied the save gap on its own; the merge re-applies it across chunk
+        # boundaries and the rows of candidates it drops are not logged either
+        skipped = []
+        processor.merge_candidates(res["candidates"], enforce_gap=not options["track_incidents"], gap_skipped=skipped)
+        skipped = {str(Path(res["flagged_dir"]) / path) for path in skipped}
+        chunk_rows = [row for row in res["rows"] if row["frame_file"] not in skipped]
+        rows.extend(_reroot_rows(chunk_rows, res["flagged_dir"], processor.flagged_dir))
+        frames += res["frames"]
+
+    # A later chunk may evict what an earlier one contributed, so rows are checked after every merge
+    kept = {str(path) for info in processor.saved_files.values() for path in info["paths"]}
+    for row in rows:
+        if row["frame_file"] not in kept:
+            row["frame_file"] = ""
+        processor.log_sink.append([row[col] for col in LOG_COLUMNS])
+
+    processor.close()
+    seconds = time.perf_counter() - t0
+    return {
+        "tasks": len(tasks),
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds else 0.0,
+        "failed": failed,
+        "top_n": processor.get_top_count(),
+    }
+
+
+def _options(conf_thresh=0.3, top_n=20, max_entries_per_person=50, save_gap_seconds=2, batch_size=4,
+             track_incidents=False, tracker=None, seat_smoothing=None, assignment="nearest",
+             device=None, backend=None, log_format="csv", evidence_budget_mb=512):
+    return dict(locals())
+
+
+def run_batch(videos, model_path, mapper, output_dir="output", workers=None, progress_seconds=5.0, **options):
+    """
+    Process a set of videos in parallel (one task per video) and merge the results
+
+    Args:
+        videos: Iterable of video paths
+        model_path: Detector weights (.pt or .onnx)
+        mapper: CoordinateMapper with the seat layout
+        output_dir: Output root; flagged frames and the log use the UI's layout inside it
+        workers: Worker processes (default: half the CPU cores)
+        progress_seconds: Interval of progress/ETA lines
+        **options: conf_thresh, top_n, max_entries_per_person, save_gap_seconds, batch_size,
+                   track_incidents, tracker (IoUTracker kwargs), seat_smoothing
+                   (SeatConfidenceFilter kwargs), assignment ('nearest' or 'greedy'),
+                   device, backend, log_format, evidence_budget_mb (per worker)
+
+    Returns:
+        Dictionary {tasks, frames, seconds, fps, failed, top_n}
+    """
+    tasks = [{"slot": i, "video": str(v)} for i, v in enumerate(videos)]
+    total = sum(probe_video(t["video"])[0] for t in tasks)
+    return _run_tasks(tasks, total, model_path, mapper, output_dir, workers, progress_seconds, _options(**options))
+
+
+def split_video(video, chunks, overlap=30, lookahead=900):
+    """
+    Frame-range tasks covering one video
+
+    Args:
+        video: Video path
+        chunks: Number of chunks
+        overlap: Warm-up frames read before each chunk for the tracker / seat smoothing
+        lookahead: Frames a chunk may read past its end to finish incidents it owns
+
+    Returns:
+        List of task dicts in frame order
+    """
+    total, _ = probe_video(video)
+    if total <= 0:
+        raise ValueError(f"Cannot split {video}: unknown frame count")
+    size = math.ceil(total / max(1, chunks))
+    return [
+        {"slot": i, "video": str(video), "start": start, "end": min(start + size, total),
+         "overlap": overlap, "lookahead": lookahead}
+        for i, start in enumerate(range(0, total, size))
+    ]
+
+
+def run_chunked(video, model_path, mapper, output_dir="output", workers=None, chunks=None, overlap=30,
+                lookahead=900, progress_seconds=5.0, **options):
+    """
+    Process one long video as frame-range chunks in parallel and stitch the results
+
+    Args:
+        video: Video path
+        chunks: Number of chunks (default: 2 x workers, so a slow chunk does not idle the pool)
+        overlap, lookahead: See split_video
+        Other arguments as for run_batch
+
+    Returns:
+        Dictionary {tasks, frames, seconds, fps, failed, top_n}
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    tasks = split_video(video, chunks or 2 * workers, overlap, lookahead)
+    total = tasks[-1]["end"]
+    return _run_tasks(tasks, total, model_path, mapper, output_dir, workers, progress_seconds, _options(**options))
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Parallel batch processing of exam recordings")
+    parser.add_argument("source", help="Folder of .mp4/.avi/.mov/.mkv recordings, or one video to split into chunks")
+    parser.add_argument("model", help="Detector weights (.pt or .onnx)")
+    parser.add_argument("project", help="Saved project (.pkl) with the seat mapping")
+    parser.add_argument("--out", default="output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: half the cores)")
+    parser.add_argument("--chunks", type=int, default=None, help="Chunks for a single video (default: 2 x workers)")
+    parser.add_argument("--overlap", type=int, default=30, help="Warm-up frames before each chunk")
+    parser.add_argument("--conf", type=float, default=0.3)
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--track", action="store_true", help="Save per tracked incident instead of per frame")
+    parser.add_argument("--greedy", action="store_true", help="Greedy one-box-per-seat assignment")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--backend", choices=["ultralytics", "onnx"], default=None)
+    parser.add_argument("--log-format", choices=["csv", "arrow", "parquet"], default="csv")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+
+    if not Path(args.project).is_file():
+        raise SystemExit(f"Project file not found: {args.project}")
+    mapper = CoordinateMapper.load(args.project)
+    options = dict(
+        conf_thresh=args.conf, top_n=args.top_n, batch_size=args.batch_size, track_incidents=args.track,
+        assignment="greedy" if args.greedy else "nearest",
+        device=args.device, backend=args.backend, log_format=args.log_format
+    )
+
+    if Path(args.source).is_file():
+        summary = run_chunked(args.source, args.model, mapper, output_dir=args.out, workers=args.workers,
+                              chunks=args.chunks, overlap=args.overlap, **options)
+    else:
+        videos = list_videos(args.source)
+        if not videos:
+            raise SystemExit(f"No videos found in {args.source}")
+        summary = run_batch(videos, args.model, mapper, output_dir=args.out, workers=args.workers, **options)
+
+    print(f"[INFO] {summary['tasks']} tasks, {summary['frames']} frames in {summary['seconds']:.1f}s "
+          f"({summary['fps']:.1f} FPS), top-N {summary['top_n']}, failed {len(summary['failed'])}")
@@ -0,0 +1,95 @@
+"""
+Box Utilities Module
+Vectorised box helpers shared by the detector backends and region inference
+"""
+
+import numpy as np
+
+
+def box_area(boxes):
+    """Area of (N, 4) xyxy boxes"""
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def box_iou(box, boxes):
+    """
+    IoU between one xyxy box and an (N, 4) array of xyxy boxes
+
+    Returns:
+        (N,) float array
+    """
+    xx1 = np.maximum(box[0], boxes[:, 0])
+    yy1 = np.maximum(box[1], boxes[:, 1])
+    xx2 = np.minimum(box[2], boxes[:, 2])
+    yy2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area = max(0.0, (box[2] - box[0])) * max(0.0, (box[3] - box[1]))
+    union = area + box_area(boxes) - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def box_ios(box, boxes):
+    """
+    Intersection over the smaller box's area between one box and (N, 4) boxes.
+    Catches a box cut at a tile border that sits inside the complete box.
+    """
+    xx1 = np.maximum(box[0], boxes[:, 0])
+    yy1 = np.maximum(box[1], boxes[:, 1])
+    xx2 = np.minimum(box[2], boxes[:, 2])
+    yy2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area = max(0.0, (box[2] - box[0])) * max(0.0, (box[3] - box[1]))
+    smaller = np.minimum(area, box_area(boxes))
+    return np.where(smaller > 0, inter / np.maximum(smaller, 1e-9), 0.0)
+
+
+def xywh_to_xyxy(xywh):
+    """Convert (N, 4) centre/size boxes to corner boxes"""
+    out = np.empty_like(xywh)
+    half_w = xywh[:, 2] / 2
+    half_h = xywh[:, 3] / 2
+    out[:, 0] = xywh[:, 0] - half_w
+    out[:, 1] = xywh[:, 1] - half_h
+    out[:, 2] = xywh[:, 0] + half_w
+    out[:, 3] = xywh[:, 1] + half_h
+    return out
+
+
+def nms(boxes, scores, iou_thresh=0.45, metric="iou"):
+    """
+    Greedy non-maximum suppression
+
+    Args:
+        boxes: (N, 4) xyxy boxes
+        scores: (N,) scores
+        iou_thresh: Boxes overlapping a kept box by more than this are suppressed
+        metric: 'iou' or 'ios' (intersection over smaller area)
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+
+    overlap = box_ios if metric == "ios" else box_iou
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        ious = overlap(boxes[i], boxes[order[1:]])
+        order = order[1:][ious <= iou_thresh]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes, scores, classes, iou_thresh=0.45):
+    """
+    Class-aware NMS: boxes of different classes never suppress each other.
+    Uses the coordinate-offset trick so a single NMS pass covers all classes.
+    """
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+    offset = (boxes.max() + 1.0) * classes.astype(boxes.dtype)
+    return nms(boxes + offset[:, None], scores, iou_thresh)
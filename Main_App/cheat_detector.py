@@ -3,70 +3,110 @@ import os
 import cv2
 import numpy as np
 
-try:
-    from ultralytics import YOLO
-except Exception:
-    YOLO = None
+from onnx_backend import OnnxBackend
+from detections import Detections
+
+BACKENDS = ("ultralytics", "onnx")
+
+
+class UltralyticsBackend:
+    """
+    PyTorch eager inference through an ultralytics YOLO object.
+    ultralytics (and therefore torch) is only imported when this backend is built.
+    """
+
+    def __init__(self, model_path, device=None):
+        try:
+            from ultralytics import YOLO
+        except Exception:
+            raise RuntimeError("ultralytics package not installed. Install ultralytics to use CheatDetector.")
+        self.model = YOLO(model_path)
+        if device:
+            try:
+                self.model.to(device)
+            except Exception:
+                pass
+
+    def predict(self, frames, conf_thresh=0.25):
+        """Return one (N, 6) array [x1, y1, x2, y2, conf, cls] per frame"""
+        # Same threshold as the ONNX backend; ultralytics would otherwise apply its own 0.25 before NMS
+        results = self.model(frames if len(frames) > 1 else frames[0], conf=conf_thresh)
+        results = list(results) if results is not None else []
+
+        batch = []
+        for r in results:
+            boxes = getattr(r, "boxes", None)
+            if boxes is None or len(boxes) == 0:
+                batch.append(np.empty((0, 6), dtype=np.float32))
+                continue
+            data = boxes.data.cpu().numpy() if hasattr(boxes.data, "cpu") else np.array(boxes.data)
+            batch.append(data.reshape(-1, 6))
+        return batch
+
 
 class CheatDetector:
     """
     Lightweight wrapper around a YOLOv8 model for detecting a single 'cheating' class (class 0).
+    The model runs through a pluggable backend: 'ultralytics' for .pt weights,
+    'onnx' for exported .onnx models (onnxruntime, no torch import).
     """
 
-    def __init__(self, model_path="./weights/bestone.pt", device=None):
+    def __init__(self, model_path="./weights/bestone.pt", device=None, backend=None):
         self.model_path = model_path
         self.model = None
         self.device = device
-        if YOLO is None:
-            raise RuntimeError("ultralytics package not installed. Install ultralytics to use CheatDetector.")
+        self.backend = backend or self.backend_for_path(model_path)
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown detector backend: {self.backend}")
         if os.path.isfile(self.model_path):
             self.load_model(self.model_path, device=device)
 
+    @staticmethod
+    def backend_for_path(model_path):
+        """Pick a backend from the weights file extension"""
+        return "onnx" if str(model_path).lower().endswith(".onnx") else "ultralytics"
+
     def load_model(self, model_path=None, device=None):
         path = model_path or self.model_path
-        self.model = YOLO(path)
-        if device:
-            try:
-                self.model.to(device)
-            except Exception:
-                pass
+        if self.backend == "onnx":
+            self.model = OnnxBackend(path, device=device)
+        else:
+            self.model = UltralyticsBackend(path, device=device)
         return self.model
 
     def detect_frame(self, frame_bgr, conf_thresh=0.3):
         """
         Run detection on a single frame (numpy BGR). Returns detections with class==0 and conf>=conf_thresh.
         """
+        batch = self.detect_batch([frame_bgr], conf_thresh=conf_thresh)
+        return batch[0] if batch else Detections()
+
+    def detect_batch(self, frames, conf_thresh=0.3):
+        """
+        Run detection on several frames (numpy BGR) in one model call.
+        Returns one Detections per input frame, in input order.
+        """
+        frames = list(frames)
+        if not frames:
+            return []
         if self.model is None:
             self.load_model(self.model_path, device=self.device)
 
-        results = self.model(frame_bgr)
-        if not results or len(results) == 0:
-            return []
+        raw = self.model.predict(frames, conf_thresh=conf_thresh)
 
-        r = results[0]
-        boxes = getattr(r, "boxes", None)
-        if boxes is None or len(boxes) == 0:
-            return []
+        batch = [self._filter_rows(data, conf_thresh) for data in raw]
+        # Guard against a short result list so callers can zip with their frames
+        batch.extend(Detections() for _ in range(len(frames) - len(batch)))
+        return batch
 
-        data = boxes.data.cpu().numpy() if hasattr(boxes.data, "cpu") else np.array(boxes.data)
-        if data.size == 0:
-            return []
+    @staticmethod
+    def _filter_rows(data, conf_thresh):
+        """Keep class 0 rows above conf_thresh of an (N, 6) backend result as Detections"""
+        if data is None or data.size == 0:
+            return Detections()
 
         keep_mask = (data[:, 5] == 0) & (data[:, 4] >= conf_thresh)
-        kept = data[keep_mask]
-
-        detections = []
-        for row in kept:
-            x1, y1, x2, y2, conf, cls = row
-            detections.append({
-                "x1": float(x1),
-                "y1": float(y1),
-                "x2": float(x2),
-                "y2": float(y2),
-                "conf": float(conf),
-                "cls": int(cls)
-            })
-        return detections
+        return Detections(data[keep_mask])
 
     @staticmethod
     def draw_detections_on_image(frame_bgr, detections, box_color=(0,0,255), thickness=2):
@@ -74,9 +114,8 @@ class CheatDetector:
         Draw boxes + label on a copy of frame_bgr and return annotated image (BGR).
         """
         out = frame_bgr.copy()
-        for det in detections:
-            x1, y1, x2, y2 = int(det["x1"]), int(det["y1"]), int(det["x2"]), int(det["y2"])
-            conf = det["conf"]
+        for x1, y1, x2, y2, conf, _ in Detections.coerce(detections).data.tolist():
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
             label = f"Cheating {conf*100:.1f}%"
             cv2.rectangle(out, (x1, y1), (x2, y2), box_color, thickness)
             cv2.putText(out, label, (x1, y1 - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
@@ -4,12 +4,19 @@ Handles detection processing, top-N tracking, and file saving
 """
 
 import os
-import csv
 import time
 import heapq
 import math
+import threading
 from pathlib import Path
 import cv2
+import numpy as np
+
+from detections import Detections
+
+from evidence_writer import EvidenceWriter, annotate_detections, write_atomic
+from log_sink import DetectionLogSink
+from seat_filter import SeatConfidenceFilter
 
 
 class DetectionProcessor:
@@ -18,7 +25,11 @@ class DetectionProcessor:
     """
     
     def __init__(self, output_dir, flagged_dir, log_csv, top_n=20, 
-                 max_entries_per_person=50, save_gap_seconds=2):
+                 max_entries_per_person=50, save_gap_seconds=2,
+                 writer_workers=2, writer_queue_size=64, on_evidence_written=None,
+                 deferred_evidence=False, evidence_budget_mb=256, checkpoint_seconds=None,
+                 log_format="csv", log_flush_rows=256, log_flush_seconds=2.0, seat_smoothing=None,
+                 evidence_prefix=""):
         """
         Initialize detection processor
         
@@ -29,6 +40,24 @@ class DetectionProcessor:
             top_n: Number of top detections to keep
             max_entries_per_person: Maximum saved frames per student
             save_gap_seconds: Minimum seconds between saves for same student
+            writer_workers: Background threads encoding/writing evidence frames (0 = write synchronously)
+            writer_queue_size: Pending writes per worker before process_detection blocks
+            on_evidence_written: Optional callable(path, ok), called from a writer thread
+            deferred_evidence: Keep top-N frames in memory as JPEG buffers and only write
+                               the survivors at checkpoint()/close() instead of write-then-delete
+            evidence_budget_mb: Memory budget for deferred buffers; above it the strongest
+                                candidates (least likely to be evicted) are written early
+            checkpoint_seconds: With deferred_evidence, write survivors at least this often
+                                so a crash loses at most this much evidence (None = only on close)
+            log_format: 'csv', 'arrow' or 'parquet' (binary formats need pyarrow)
+            log_flush_rows: Buffered log rows that trigger a write
+            log_flush_seconds: Maximum time a log row stays buffered
+            seat_smoothing: None, or SeatConfidenceFilter keyword arguments; process_frame then
+                            only flags seats whose smoothed confidence is active (one filter per source),
+                            and process_incident only seats that were active during the incident
+                            (tracked mode must feed every frame through update_seat_smoothing)
+            evidence_prefix: Prepended to top-N uids in evidence file names (keeps names unique
+                             when several processors' candidates are merged, e.g. batch workers)
         """
         self.output_dir = Path(output_dir)
         self.flagged_dir = Path(flagged_dir)
@@ -41,30 +70,61 @@ class DetectionProcessor:
         self.top_heap = []
         self.top_uid = 0
         self.saved_files = {}  # uid -> {paths: [...], rolls: [...]}
+        self.evidence_prefix = evidence_prefix
         self.person_entries = {}  # roll -> list of {uid, timestamp, filepath, conf}
+        # Saved-frame counts kept in step with person_entries; listeners get the changed rolls
+        self.flagged_counts = {}  # roll -> len(person_entries[roll])
+        self._flagged_changed = set()
+        self._flagged_listeners = []
+        self.failed_writes = []  # paths whose background write failed
+        
+        # Deferred top-N evidence: uid -> {paths, conf, data}; data is None until encoded
+        self.deferred_evidence = deferred_evidence
+        self.evidence_budget_bytes = int(evidence_budget_mb * 1024 * 1024)
+        self.checkpoint_seconds = checkpoint_seconds
+        self._deferred = {}
+        self._deferred_bytes = 0
+        self._deferred_lock = threading.Lock()
+        self._last_checkpoint = time.time()
+        
+        # Evidence frames are encoded and written off the calling (UI) thread
+        self.on_evidence_written = on_evidence_written
+        self.evidence_writer = None
+        if writer_workers:
+            self.evidence_writer = EvidenceWriter(num_workers=writer_workers, queue_size=writer_queue_size)
+        
+        # Per-source temporal filters keyed on roll
+        self.seat_smoothing = seat_smoothing
+        self.seat_filters = {}
         
-        # Initialize directories and CSV
+        # Running tracks, keyed (src_name, track_id): what their provisional incident saved, and
+        # provisional incidents waiting for the seat smoothing to turn active
+        self._incident_saves = {}  # key -> (uid or None, best_frame_idx)
+        self._held_incidents = {}  # key -> (incident, timestamp)
+        
+        # Initialize directories and the detection log
+        self.log_format = log_format
+        self.log_flush_rows = log_flush_rows
+        self.log_flush_seconds = log_flush_seconds
+        self.log_sink = None
         self._initialize_output()
     
     def _initialize_output(self):
-        """Create output directories and CSV file if needed"""
-        self.output_dir.mkdir(exist_ok=True)
+        """Create output directories and open the detection log"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         self.flagged_dir.mkdir(parents=True, exist_ok=True)
         
-        if not self.log_csv.exists():
-            with open(self.log_csv, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "timestamp", "frame_file", "source_info", 
-                    "student_name", "student_roll", "conf_score", 
-                    "bbox_center_x", "bbox_center_y"
-                ])
+        # Writes the CSV header for a new file; rows are batched until flush
+        self.log_sink = DetectionLogSink(
+            self.log_csv, fmt=self.log_format,
+            flush_rows=self.log_flush_rows, flush_seconds=self.log_flush_seconds
+        )
     
     def get_top_count(self):
         """Get current number of top detections saved"""
         return len(self.top_heap)
     
-    def process_detection(self, det, frame_bgr, mapper, src_name, frame_idx):
+    def process_detection(self, det, frame_bgr, mapper, src_name, frame_idx, timestamp=None):
         """
         Process a single detection: find nearest students and consider for top-N
         
@@ -74,7 +134,9 @@ class DetectionProcessor:
             mapper: CoordinateMapper instance
             src_name: Source name/description
             frame_idx: Frame index
-            
+            timestamp: Frame time (epoch seconds); defaults to now. Offline runs pass video
+                       time so the save gap is measured in recording time
+        
         Returns:
             List of (student, detection) tuples that were flagged
         """
@@ -92,18 +154,206 @@ class DetectionProcessor:
         # Find nearest students
         nearest = mapper.nearest_n_students(cx, cy, n=2, max_distance=max_dist)
         
+        now_ts = time.time() if timestamp is None else timestamp
+        flagged = self._process_assigned(det, nearest, frame_bgr, mapper, src_name, frame_idx, now_ts)
+        self._notify_flagged()
+        return flagged
+    
+    def process_frame(self, detections, frame_bgr, mapper, src_name, frame_idx, assignment="nearest", timestamp=None,
+                      warmup=False):
+        """
+        Process all detections of a frame with one detection x seat distance matrix
+        
+        Args:
+            detections: Detections, list of detection dicts, or an (N, >=5) array of x1, y1, x2, y2, conf[, cls]
+            frame_bgr: BGR frame image (numpy array)
+            mapper: CoordinateMapper instance
+            src_name: Source name/description
+            frame_idx: Frame index
+            assignment: 'nearest' - every box takes its 2 nearest seats (same as process_detection)
+                        'greedy'  - closest box/seat pairs first, each seat claimed by one box only
+            timestamp: Frame time (epoch seconds); defaults to now
+            warmup: Only advance the per-seat smoothing state; nothing is saved or logged
+                    (used on overlap frames before a chunk of a split video)
+        
+        Returns:
+            List of (student, detection) tuples that were flagged
+        """
+        detections = Detections.coerce(detections)
+        rolls, seats = mapper.seat_array()
+        seat_filter = self._seat_filter_for(src_name)
+        
+        if not detections or not rolls:
+            if seat_filter is not None:
+                # Frames without detections still decay the smoothed scores
+                seat_filter.update({}, frame_idx)
+            return []
+        
+        boxes = detections.boxes.astype(np.float64)
+        max_dist = np.hypot(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) * 1.2
+        centres = np.trunc((boxes[:, :2] + boxes[:, 2:]) / 2)
+        
+        # (N boxes, S seats); pairs beyond the 1.2 x diagonal rule are excluded
+        dist = np.hypot(centres[:, 0:1] - seats[:, 0], centres[:, 1:2] - seats[:, 1])
+        dist[dist > max_dist[:, None]] = np.inf
+        
+        n = min(2, len(rolls))
+        if assignment == "greedy":
+            nearest = self._greedy_assignment(dist, rolls, n)
+        else:
+            idx = np.argsort(dist, axis=1, kind="stable")[:, :n]
+            nearest = [
+                [(rolls[j], float(dist[i, j])) for j in idx[i] if np.isfinite(dist[i, j])]
+                for i in range(len(detections))
+            ]
+        
+        if seat_filter is not None:
+            seat_confs = {}
+            for conf, near in zip(detections.conf.tolist(), nearest):
+                for roll, _ in near:
+                    seat_confs[roll] = max(seat_confs.get(roll, 0.0), conf)
+            seat_filter.update(seat_confs, frame_idx)
+            nearest = [[(roll, d) for roll, d in near if seat_filter.is_active(roll)] for near in nearest]
+        
+        if warmup:
+            return []
+        
+        now_ts = time.time() if timestamp is None else timestamp
+        flagged = []
+        for det, near in zip(detections, nearest):
+            flagged.extend(self._process_assigned(det, near, frame_bgr, mapper, src_name, frame_idx, now_ts))
+        self._notify_flagged()
+        return flagged
+    
+    def _seat_filter_for(self, src_name):
+        """Smoothing filter for a source (created on first use), or None if smoothing is off"""
+        if self.seat_smoothing is None:
+            return None
+        if src_name not in self.seat_filters:
+            self.seat_filters[src_name] = SeatConfidenceFilter(**self.seat_smoothing)
+        return self.seat_filters[src_name]
+    
+    def update_seat_smoothing(self, detections, mapper, src_name, frame_idx, assignment="nearest"):
+        """
+        Feed a frame to the per-seat smoothing only (tracked mode, where frames are not passed to
+        process_frame); process_incident then keeps the seats that were active during the incident.
+        Held provisional incidents of this source whose seat has turned active are flagged now.
+        
+        Returns:
+            List of (student, detection) tuples flagged from held incidents
+        """
+        if self.seat_smoothing is None:
+            return []
+        self.process_frame(detections, None, mapper, src_name, frame_idx, assignment=assignment, warmup=True)
+        
+        flagged = []
+        for key, (incident, timestamp) in list(self._held_incidents.items()):
+            if key[0] != src_name:
+                continue
+            nearest = self._incident_seats(incident, mapper, frame_idx)
+            if nearest:
+                del self._held_incidents[key]
+                flagged.extend(self._flag_incident(incident, nearest, mapper, timestamp))
+        return flagged
+    
+    def reset_seat_filters(self):
+        """Forget smoothed seat scores and running incidents (e.g. when a new playback starts)"""
+        self.seat_filters = {}
+        self._incident_saves = {}
+        self._held_incidents = {}
+    
+    @staticmethod
+    def _greedy_assignment(dist, rolls, n):
+        """Assign seats to boxes closest pair first; every seat goes to at most one box, every box gets up to n seats"""
+        nearest = [[] for _ in range(dist.shape[0])]
+        det_idx, seat_idx = np.nonzero(np.isfinite(dist))
+        order = np.argsort(dist[det_idx, seat_idx], kind="stable")
+        taken = set()
+        for k in order:
+            i, j = det_idx[k], seat_idx[k]
+            if j in taken or len(nearest[i]) >= n:
+                continue
+            taken.add(j)
+            nearest[i].append((rolls[j], float(dist[i, j])))
+        return nearest
+    
+    def _incident_seats(self, incident, mapper, end_frame=None):
+        """Seats near the incident's best box; with smoothing, only those active during the incident"""
+        det = incident.best_det
+        max_dist = math.hypot(det["x2"] - det["x1"], det["y2"] - det["y1"]) * 1.2
+        cx = int((det["x1"] + det["x2"]) / 2)
+        cy = int((det["y1"] + det["y2"]) / 2)
+        nearest = mapper.nearest_n_students(cx, cy, n=2, max_distance=max_dist)
+        
+        seat_filter = self._seat_filter_for(incident.src_name)
+        if seat_filter is not None:
+            # Only seats the smoothing held active at some point of the incident (update_seat_smoothing)
+            end_frame = incident.end_frame if end_frame is None else end_frame
+            nearest = [(roll, d) for roll, d in nearest
+                       if seat_filter.was_active(roll, incident.start_frame, end_frame)]
+        return nearest
+    
+    def process_incident(self, incident, mapper, timestamp=None):
+        """
+        Process a tracker incident: one evidence frame (the track's best) per incident.
+        The save gap is not applied; the tracker already merged the repeated detections.
+        A provisional incident (track confirmed, still running) is flagged right away; its final
+        incident then only replaces the evidence if the track's best frame changed meanwhile.
+        A provisional incident whose seats the smoothing has not turned active yet is held and
+        retried by update_seat_smoothing.
+        
+        Args:
+            incident: tracker.Incident
+            mapper: CoordinateMapper instance
+            timestamp: Incident time (epoch seconds); defaults to now
+        
+        Returns:
+            List of (student, detection) tuples that were flagged
+        """
+        key = (incident.src_name, incident.track_id)
+        if not incident.provisional:
+            self._held_incidents.pop(key, None)
+            saved = self._incident_saves.pop(key, None)
+            if saved is not None:
+                uid, best_frame_idx = saved
+                if incident.best_frame_idx == best_frame_idx:
+                    return []
+                if uid in self.saved_files:
+                    self._discard_candidate(uid)
+        
+        nearest = self._incident_seats(incident, mapper)
+        if incident.provisional and not nearest and self._seat_filter_for(incident.src_name) is not None:
+            self._held_incidents[key] = (incident, timestamp)
+            return []
+        
+        return self._flag_incident(incident, nearest, mapper, timestamp)
+    
+    def _flag_incident(self, incident, nearest, mapper, timestamp):
+        """Save an incident's best frame for its seats; remembers what a provisional incident saved"""
+        uid_before = self.top_uid
+        flagged = self._process_assigned(
+            incident.best_det, nearest, incident.best_frame, mapper, incident.src_name, incident.best_frame_idx,
+            time.time() if timestamp is None else timestamp, enforce_gap=False
+        )
+        if incident.provisional and flagged:
+            uid = self.top_uid if self.top_uid != uid_before else None
+            self._incident_saves[(incident.src_name, incident.track_id)] = (uid, incident.best_frame_idx)
+        self._notify_flagged()
+        return flagged
+    
+    def _process_assigned(self, det, nearest, frame_bgr, mapper, src_name, frame_idx, now_ts, enforce_gap=True):
+        """Apply save-gap/max-entries rules to a detection's assigned seats and consider it for top-N"""
         if not nearest:
             return []
         
         # Determine which rolls are eligible for saving
-        now_ts = time.time()
         eligible_rolls = []
         
         for roll, dist in nearest:
             entries = self.person_entries.get(roll, [])
             
             # Check time gap
-            if entries and (now_ts - entries[-1]["timestamp"] < self.save_gap_seconds):
+            if enforce_gap and entries and (now_ts - entries[-1]["timestamp"] < self.save_gap_seconds):
                 continue
             
             # Check max entries
@@ -121,6 +371,11 @@ class DetectionProcessor:
         # Consider for top-N heap
         self._consider_top_candidate(det, frame_bgr, src_name, frame_idx, eligible_rolls, mapper, now_ts)
         
+        if self.deferred_evidence:
+            self._enforce_evidence_budget()
+            if self.checkpoint_seconds and time.time() - self._last_checkpoint >= self.checkpoint_seconds:
+                self.checkpoint()
+        
         # Return flagged students for UI display
         flagged = []
         for roll in eligible_rolls:
@@ -142,21 +397,18 @@ class DetectionProcessor:
             # Save per-student files
             saved_paths = []
             for roll in eligible_rolls:
-                path = self._save_detection_for_roll(frame_bgr, det, roll, uid, mapper)
+                path = self._save_detection_for_roll(frame_bgr, det, roll, uid, mapper, now_ts)
                 if path:
                     saved_paths.append(path)
                     # Record in per-person list
-                    self.person_entries.setdefault(roll, []).append({
-                        "uid": uid,
-                        "timestamp": now_ts,
-                        "filepath": str(path),
-                        "conf": conf
-                    })
+                    self._add_person_entry(roll, uid, now_ts, path, conf)
             
             self.saved_files[uid] = {"paths": saved_paths, "rolls": eligible_rolls}
+            if self.deferred_evidence and saved_paths:
+                self._defer_evidence(uid, conf, frame_bgr, det, saved_paths)
             
             # Log entries
-            self._log_detection_entries(det, src_name, frame_idx, eligible_rolls, saved_paths, mapper)
+            self._log_detection_entries(det, src_name, frame_idx, eligible_rolls, saved_paths, mapper, now_ts)
             return
         
         # Heap full: check if this candidate beats the smallest
@@ -174,25 +426,61 @@ class DetectionProcessor:
             
             saved_paths = []
             for roll in eligible_rolls:
-                path = self._save_detection_for_roll(frame_bgr, det, roll, uid, mapper)
+                path = self._save_detection_for_roll(frame_bgr, det, roll, uid, mapper, now_ts)
                 if path:
                     saved_paths.append(path)
-                    self.person_entries.setdefault(roll, []).append({
-                        "uid": uid,
-                        "timestamp": now_ts,
-                        "filepath": str(path),
-                        "conf": conf
-                    })
+                    self._add_person_entry(roll, uid, now_ts, path, conf)
             
             self.saved_files[uid] = {"paths": saved_paths, "rolls": eligible_rolls}
-            self._log_detection_entries(det, src_name, frame_idx, eligible_rolls, saved_paths, mapper)
+            if self.deferred_evidence and saved_paths:
+                self._defer_evidence(uid, conf, frame_bgr, det, saved_paths)
+            self._log_detection_entries(det, src_name, frame_idx, eligible_rolls, saved_paths, mapper, now_ts)
+    
+    def _add_person_entry(self, roll, uid, timestamp, path, conf):
+        """Record a saved frame for a roll"""
+        entries = self.person_entries.setdefault(roll, [])
+        entries.append({
+            "uid": uid,
+            "timestamp": timestamp,
+            "filepath": str(path),
+            "conf": conf
+        })
+        self._set_flagged_count(roll, len(entries))
+    
+    def _set_flagged_count(self, roll, count):
+        if count:
+            if self.flagged_counts.get(roll) == count:
+                return
+            self.flagged_counts[roll] = count
+        elif self.flagged_counts.pop(roll, None) is None:
+            return
+        self._flagged_changed.add(roll)
+    
+    def add_flagged_listener(self, callback):
+        """
+        Register callback(changes) for saved-frame count changes, where changes is
+        {roll: count} for the rolls that changed (0 = no saved frames left).
+        Called on the processing thread once per process_*/merge call that changed counts.
+        """
+        self._flagged_listeners.append(callback)
+    
+    def _notify_flagged(self):
+        if not self._flagged_changed:
+            return
+        changes = {roll: self.flagged_counts.get(roll, 0) for roll in self._flagged_changed}
+        self._flagged_changed = set()
+        for callback in self._flagged_listeners:
+            try:
+                callback(changes)
+            except Exception as ex:
+                print(f"[ERROR] flagged listener: {ex}")
     
     def _new_uid(self):
         """Generate new unique ID"""
         self.top_uid += 1
         return self.top_uid
     
-    def _save_detection_for_roll(self, frame_bgr, det, roll, uid, mapper):
+    def _save_detection_for_roll(self, frame_bgr, det, roll, uid, mapper, now_ts=None):
         """
         Save detection frame for a specific student
         
@@ -207,32 +495,25 @@ class DetectionProcessor:
             # Create per-student folder
             safe_name = f"{stu.name.replace(' ', '_')}_{stu.roll}"
             person_dir = self.flagged_dir / safe_name
-            person_dir.mkdir(parents=True, exist_ok=True)
+            if not self.deferred_evidence:
+                # Deferred candidates get their folder when written (_materialize), so
+                # evicted ones never leave an empty folder behind
+                person_dir.mkdir(parents=True, exist_ok=True)
             
             # Create filename
-            ts = int(time.time())
-            fname = person_dir / f"top_{uid}_{safe_name}_{ts}.jpg"
-            
-            # Create image with bbox
-            img_copy = frame_bgr.copy()
-            x1 = int(det.get("x1", 0))
-            y1 = int(det.get("y1", 0))
-            x2 = int(det.get("x2", img_copy.shape[1] - 1))
-            y2 = int(det.get("y2", img_copy.shape[0] - 1))
+            ts = int(time.time() if now_ts is None else now_ts)
+            fname = person_dir / f"top_{self.evidence_prefix}{uid}_{safe_name}_{ts}.jpg"
             
-            # Clamp to image bounds
-            h, w = img_copy.shape[:2]
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w - 1, x2), min(h - 1, y2)
+            if self.deferred_evidence:
+                # Encoded once per uid in _defer_evidence, written at checkpoint
+                return fname
             
-            # Draw bbox and label
-            cv2.rectangle(img_copy, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            label = f"Cheating {det.get('conf', 0.0) * 100:.1f}%"
-            cv2.putText(img_copy, label, (x1, max(12, y1 - 6)), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            if self.evidence_writer:
+                # Returned path is final; the file appears once the writer gets to it
+                self.evidence_writer.submit_write(fname, frame_bgr, [det], callback=self._on_evidence_written)
+                return fname
             
-            # Save file
-            success = cv2.imwrite(str(fname), img_copy)
+            success = cv2.imwrite(str(fname), annotate_detections(frame_bgr, [det]))
             if not success:
                 print(f"[ERROR] cv2.imwrite failed for {fname}")
                 return None
@@ -242,6 +523,12 @@ class DetectionProcessor:
             print(f"[ERROR] _save_detection_for_roll exception: {ex}")
             return None
     
+    def _discard_candidate(self, uid):
+        """Take a candidate out of the top-N heap and remove its files and entries"""
+        self.top_heap = [item for item in self.top_heap if item[1] != uid]
+        heapq.heapify(self.top_heap)
+        self._remove_saved_uid(uid)
+    
     def _remove_saved_uid(self, uid):
         """Remove files and entries for given uid"""
         try:
@@ -252,8 +539,18 @@ class DetectionProcessor:
             paths = info.get("paths", [])
             rolls = info.get("rolls", [])
             
-            # Delete files
+            # Never materialized: dropping the buffer is all that's needed
+            with self._deferred_lock:
+                entry = self._deferred.pop(uid, None)
+                if entry is not None:
+                    self._deferred_bytes -= len(entry["data"] or b"")
+                    paths = []
+            
+            # Delete files (queued behind any pending write of the same path)
             for p in paths:
+                if self.evidence_writer:
+                    self.evidence_writer.submit_delete(p)
+                    continue
                 try:
                     if os.path.exists(p):
                         os.remove(p)
@@ -268,31 +565,215 @@ class DetectionProcessor:
                     self.person_entries[roll] = new_list
                 else:
                     self.person_entries.pop(roll, None)
+                self._set_flagged_count(roll, len(new_list))
             
             # Remove from saved_files
             self.saved_files.pop(uid, None)
         except Exception as ex:
             print(f"[ERROR] _remove_saved_uid: {ex}")
     
-    def _log_detection_entries(self, det, src_name, frame_idx, rolls, frame_file_paths, mapper):
-        """Log detection entries to CSV"""
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    def _defer_evidence(self, uid, conf, frame_bgr, det, paths):
+        """Keep a candidate's annotated JPEG in memory instead of writing it"""
+        with self._deferred_lock:
+            self._deferred[uid] = {"paths": list(paths), "conf": conf, "data": None}
         
-        with open(self.log_csv, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            for i, roll in enumerate(rolls):
-                stu = mapper.mapped_student_objects.get(roll)
-                if not stu:
+        if self.evidence_writer:
+            self.evidence_writer.submit_encode(uid, frame_bgr, [det], callback=self._on_evidence_encoded)
+        else:
+            ok, buf = cv2.imencode(".jpg", annotate_detections(frame_bgr, [det]))
+            self._on_evidence_encoded(uid, buf.tobytes() if ok else None)
+    
+    def _on_evidence_encoded(self, uid, data):
+        """Encode completion (writer thread); ignored if the candidate was evicted meanwhile"""
+        with self._deferred_lock:
+            entry = self._deferred.get(uid)
+            if entry is None:
+                return
+            if data is None:
+                print(f"[ERROR] Evidence encode failed for uid {uid}")
+                self._deferred.pop(uid, None)
+                self.failed_writes.extend(entry["paths"])
+                return
+            entry["data"] = data
+            self._deferred_bytes += len(data)
+    
+    def _materialize(self, entries):
+        """Write encoded deferred entries to their final paths"""
+        for entry in entries:
+            for path in entry["paths"]:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                if self.evidence_writer:
+                    self.evidence_writer.submit_bytes(path, entry["data"], callback=self._on_evidence_written)
+                else:
+                    try:
+                        write_atomic(str(path), entry["data"])
+                    except Exception as ex:
+                        print(f"[ERROR] Evidence write failed for {path}: {ex}")
+                        self.failed_writes.append(path)
+    
+    def _enforce_evidence_budget(self):
+        """Spill the highest-confidence buffers to disk while over the memory budget"""
+        if self._deferred_bytes <= self.evidence_budget_bytes:
+            return
+        
+        spilled = []
+        with self._deferred_lock:
+            ready = sorted(
+                (uid for uid, e in self._deferred.items() if e["data"] is not None),
+                key=lambda u: self._deferred[u]["conf"], reverse=True
+            )
+            for uid in ready:
+                if self._deferred_bytes <= self.evidence_budget_bytes:
+                    break
+                entry = self._deferred.pop(uid)
+                self._deferred_bytes -= len(entry["data"])
+                spilled.append(entry)
+        self._materialize(spilled)
+    
+    def checkpoint(self):
+        """
+        Write every encoded deferred candidate to disk (atomic per file).
+        Later evictions of these candidates delete the files as in non-deferred mode.
+        
+        Returns:
+            Number of candidates written
+        """
+        self._last_checkpoint = time.time()
+        with self._deferred_lock:
+            ready = [uid for uid, e in self._deferred.items() if e["data"] is not None]
+            entries = [self._deferred.pop(uid) for uid in ready]
+            self._deferred_bytes -= sum(len(e["data"]) for e in entries)
+        self._materialize(entries)
+        return len(entries)
+    
+    def export_candidates(self, release=False):
+        """
+        Current top-N entries with their encoded evidence, for merging into another
+        processor (see merge_candidates). Requires deferred_evidence; pending encodes are
+        waited for, and candidates already written (budget spill, checkpoint) are read back.
+        
+        Args:
+            release: Drop the in-memory buffers afterwards so close() does not write them
+                     (the importing processor owns them now)
+        
+        Returns:
+            List of dicts {conf, rolls, paths, timestamp, data}; paths are relative to flagged_dir
+        """
+        self.flush()
+        candidates = []
+        with self._deferred_lock:
+            for conf, uid in self.top_heap:
+                entry = self._deferred.get(uid)
+                info = self.saved_files.get(uid)
+                if not info or (entry is not None and entry["data"] is None):
                     continue
-                
-                frame_path = frame_file_paths[i] if i < len(frame_file_paths) else ""
-                cx = int((det["x1"] + det["x2"]) / 2)
-                cy = int((det["y1"] + det["y2"]) / 2)
-                
-                writer.writerow([
-                    ts, str(frame_path), f"{src_name}@{frame_idx}",
-                    stu.name, stu.roll, det.get("conf", 0.0), cx, cy
-                ])
+                stamps = [e["timestamp"] for r in info["rolls"] for e in self.person_entries.get(r, []) if e["uid"] == uid]
+                candidates.append({
+                    "conf": conf,
+                    "rolls": list(info["rolls"]),
+                    "paths": [str(Path(p).relative_to(self.flagged_dir)) for p in info["paths"]],
+                    "timestamp": stamps[0] if stamps else time.time(),
+                    "data": entry["data"] if entry is not None else Path(info["paths"][0]),
+                })
+            if release:
+                self._deferred.clear()
+                self._deferred_bytes = 0
+        
+        for cand in candidates:
+            if isinstance(cand["data"], Path):
+                try:
+                    cand["data"] = cand["data"].read_bytes()
+                except OSError as ex:
+                    print(f"[ERROR] Evidence read-back failed for {cand['data']}: {ex}")
+                    cand["data"] = None
+        return [cand for cand in candidates if cand["data"] is not None]
+    
+    def merge_candidates(self, candidates, enforce_gap=True, gap_skipped=None):
+        """
+        Add top-N candidates exported by other processors and store the survivors' evidence.
+        Candidate paths are placed under this processor's flagged_dir, and only admitted
+        candidates are written; the top-N and max-entries limits of this processor apply.
+        Merge calls are expected in frame order (e.g. chunk by chunk), so with enforce_gap
+        a roll is dropped from a candidate that lies within save_gap_seconds of one of the
+        roll's already merged entries (an event that spans two chunks is kept once).
+        
+        Args:
+            candidates: Dicts from export_candidates
+            enforce_gap: Apply save_gap_seconds across merges (off for tracker incidents)
+            gap_skipped: Optional list; the exported paths dropped by the gap are appended
+        
+        Returns:
+            Number of candidates admitted
+        """
+        admitted = 0
+        for cand in sorted(candidates, key=lambda c: c["conf"], reverse=True):
+            conf = float(cand["conf"])
+            if len(self.top_heap) >= self.top_n and conf <= self.top_heap[0][0]:
+                break
+            
+            pairs = []
+            for roll, path in zip(cand["rolls"], cand["paths"]):
+                entries = self.person_entries.get(roll, [])
+                if enforce_gap and any(abs(cand["timestamp"] - e["timestamp"]) < self.save_gap_seconds for e in entries):
+                    if gap_skipped is not None:
+                        gap_skipped.append(path)
+                    continue
+                if len(entries) < self.max_entries_per_person:
+                    pairs.append((roll, path))
+            if not pairs:
+                continue
+            
+            if len(self.top_heap) >= self.top_n:
+                _, popped_uid = heapq.heappop(self.top_heap)
+                self._remove_saved_uid(popped_uid)
+            
+            uid = self._new_uid()
+            heapq.heappush(self.top_heap, (conf, uid))
+            rolls = [roll for roll, _ in pairs]
+            paths = [self.flagged_dir / path for _, path in pairs]
+            for roll, path in zip(rolls, paths):
+                self._add_person_entry(roll, uid, cand["timestamp"], path, conf)
+            self.saved_files[uid] = {"paths": paths, "rolls": rolls}
+            
+            if self.deferred_evidence:
+                with self._deferred_lock:
+                    self._deferred[uid] = {"paths": paths, "conf": conf, "data": cand["data"]}
+                    self._deferred_bytes += len(cand["data"])
+            else:
+                self._materialize([{"paths": paths, "data": cand["data"]}])
+            admitted += 1
+        self._notify_flagged()
+        return admitted
+    
+    def get_deferred_stats(self):
+        """
+        Returns:
+            Dictionary {'candidates': int, 'bytes': int, 'budget_bytes': int}
+        """
+        with self._deferred_lock:
+            return {
+                "candidates": len(self._deferred),
+                "bytes": self._deferred_bytes,
+                "budget_bytes": self.evidence_budget_bytes,
+            }
+    
+    def _log_detection_entries(self, det, src_name, frame_idx, rolls, frame_file_paths, mapper, now_ts=None):
+        """Queue detection entries on the log sink"""
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now_ts))
+        
+        for i, roll in enumerate(rolls):
+            stu = mapper.mapped_student_objects.get(roll)
+            if not stu:
+                continue
+            
+            frame_path = frame_file_paths[i] if i < len(frame_file_paths) else ""
+            cx = int((det["x1"] + det["x2"]) / 2)
+            cy = int((det["y1"] + det["y2"]) / 2)
+            
+            self.log_sink.append([
+                ts, str(frame_path), f"{src_name}@{frame_idx}",
+                stu.name, stu.roll, det.get("conf", 0.0), cx, cy
+            ])
     
     def save_sample_detection(self, frame_bgr, detections, mapper):
         """
@@ -321,49 +802,82 @@ class DetectionProcessor:
                     flagged.append((stu, det))
         
         # Save image with boxes
-        img_copy = frame_bgr.copy()
-        for det in detections:
-            x1, y1, x2, y2 = int(det["x1"]), int(det["y1"]), int(det["x2"]), int(det["y2"])
-            cv2.rectangle(img_copy, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            cv2.putText(img_copy, f"Cheating {det.get('conf', 0.0) * 100:.1f}%", 
-                       (x1, y1 - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        
-        cv2.imwrite(str(save_path), img_copy)
+        if self.evidence_writer:
+            self.evidence_writer.submit_write(save_path, frame_bgr, detections, callback=self._on_evidence_written)
+        else:
+            cv2.imwrite(str(save_path), annotate_detections(frame_bgr, detections))
         
         # Log entries
-        with open(self.log_csv, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            for stu, det in flagged:
-                cx = int((det["x1"] + det["x2"]) / 2)
-                cy = int((det["y1"] + det["y2"]) / 2)
-                writer.writerow([
-                    time.strftime("%Y-%m-%d %H:%M:%S"),
-                    str(save_path),
-                    "sample",
-                    stu.name,
-                    stu.roll,
-                    det.get("conf", 0.0),
-                    cx,
-                    cy
-                ])
-        
-        return save_path, flagged    
-    def get_flagged_students_summary(self, mapper):
+        for stu, det in flagged:
+            cx = int((det["x1"] + det["x2"]) / 2)
+            cy = int((det["y1"] + det["y2"]) / 2)
+            self.log_sink.append([
+                time.strftime("%Y-%m-%d %H:%M:%S"),
+                str(save_path),
+                "sample",
+                stu.name,
+                stu.roll,
+                det.get("conf", 0.0),
+                cx,
+                cy
+            ])
+        
+        return save_path, flagged
+    
+    def _on_evidence_written(self, path, ok):
+        """Writer-thread completion callback"""
+        if not ok:
+            print(f"[ERROR] Evidence write failed for {path}")
+            self.failed_writes.append(path)
+        if self.on_evidence_written:
+            self.on_evidence_written(path, ok)
+    
+    def flush(self, timeout=None):
+        """Block until all queued evidence writes/deletes are on disk"""
+        if self.evidence_writer:
+            return self.evidence_writer.flush(timeout)
+        return True
+    
+    def close(self, timeout=None):
+        """Write deferred survivors, finish pending evidence writes, stop the writer threads and close the log"""
+        if self.deferred_evidence:
+            # Pending encodes must finish before the survivors can be written
+            self.flush(timeout)
+            self.checkpoint()
+        if self.evidence_writer:
+            self.evidence_writer.close(timeout)
+            self.evidence_writer = None
+        if self.log_sink:
+            self.log_sink.close()
+    
+    def get_flagged_students_summary(self, mapper, from_log=False):
         """
         Get summary of flagged students with frame counts
         
+        Args:
+            mapper: CoordinateMapper instance
+            from_log: Count every logged detection this session (including evicted
+                      top-N frames and samples) instead of currently saved frames
+        
         Returns:
             Dictionary {roll: {'name': str, 'count': int}}
         """
         flagged_summary = {}
         
-        for roll, entries in self.person_entries.items():
-            if entries:  # Only include students with at least one flagged frame
-                stu = mapper.mapped_student_objects.get(roll)
-                if stu:
-                    flagged_summary[roll] = {
-                        'name': stu.name,
-                        'count': len(entries)
-                    }
+        if from_log:
+            logged = self.log_sink.counts_by_roll()
+            for roll, stu in mapper.mapped_student_objects.items():
+                count = logged.get(str(roll), 0)
+                if count:
+                    flagged_summary[roll] = {'name': stu.name, 'count': count}
+            return flagged_summary
+        
+        for roll, count in self.flagged_counts.items():
+            stu = mapper.mapped_student_objects.get(roll)
+            if stu:
+                flagged_summary[roll] = {
+                    'name': stu.name,
+                    'count': count
+                }
         
         return flagged_summary
\ No newline at end of file
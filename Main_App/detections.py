@@ -0,0 +1,161 @@
+"""
+Detections Module
+Compact array-backed container for detector output
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+FIELDS = ("x1", "y1", "x2", "y2", "conf", "cls")
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+CLS_COL = FIELD_INDEX["cls"]
+
+
+class Detection(Mapping):
+    """
+    Read-only dict-style view of one row of a Detections array.
+    Existing code using det["x1"], det.get("conf", 0.0) or dict(det) keeps working;
+    nothing is copied until a field is read.
+    """
+
+    __slots__ = ("_data", "_row")
+
+    def __init__(self, data, row):
+        self._data = data
+        self._row = row
+
+    def __getitem__(self, key):
+        col = FIELD_INDEX[key]
+        value = self._data[self._row, col]
+        return int(value) if col == CLS_COL else float(value)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def to_dict(self):
+        return {name: self[name] for name in FIELDS}
+
+    def __repr__(self):
+        return f"Detection({self.to_dict()})"
+
+
+class Detections:
+    """
+    (N, 6) float32 array of x1, y1, x2, y2, conf, cls wrapped with list-like access.
+    Iterating yields Detection views; slicing or masking returns another Detections.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        """
+        Args:
+            data: (N, 6) array; float32 input is used as-is without copying
+        """
+        if data is None:
+            data = np.empty((0, len(FIELDS)), dtype=np.float32)
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, len(FIELDS))
+
+    @classmethod
+    def from_dicts(cls, dets):
+        """Build from an iterable of detection dicts (missing cls defaults to 0)"""
+        rows = [[d["x1"], d["y1"], d["x2"], d["y2"], d.get("conf", 0.0), d.get("cls", 0)] for d in dets]
+        return cls(np.array(rows, dtype=np.float32).reshape(-1, len(FIELDS)))
+
+    @classmethod
+    def coerce(cls, dets):
+        """Accept a Detections, an (N, >=5) array or a list of detection dicts"""
+        if isinstance(dets, cls):
+            return dets
+        if isinstance(dets, np.ndarray):
+            arr = dets.astype(np.float32, copy=False).reshape(len(dets), -1)
+            if arr.shape[1] == len(FIELDS) - 1:
+                arr = np.hstack([arr, np.zeros((len(arr), 1), dtype=np.float32)])
+            return cls(arr[:, :len(FIELDS)])
+        return cls.from_dicts(dets or [])
+
+    @classmethod
+    def concatenate(cls, items):
+        """Join several Detections (or anything coerce accepts) into one"""
+        arrays = [cls.coerce(d).data for d in items]
+        arrays = [a for a in arrays if len(a)]
+        if not arrays:
+            return cls()
+        return cls(arrays[0] if len(arrays) == 1 else np.concatenate(arrays))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return len(self.data) > 0
+
+    def __iter__(self):
+        data = self.data
+        return (Detection(data, i) for i in range(len(data)))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self.data)
+            if not 0 <= idx < len(self.data):
+                raise IndexError("Detections index out of range")
+            return Detection(self.data, int(idx))
+        return Detections(self.data[idx])
+
+    def __add__(self, other):
+        return Detections.concatenate([self, other])
+
+    def __radd__(self, other):
+        return Detections.concatenate([other, self])
+
+    def __repr__(self):
+        return f"Detections(n={len(self.data)})"
+
+    # ==================== Column views ====================
+
+    @property
+    def boxes(self):
+        """(N, 4) xyxy view"""
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+    @property
+    def centres(self):
+        """(N, 2) box centres"""
+        return (self.data[:, :2] + self.data[:, 2:4]) / 2
+
+    @property
+    def diagonals(self):
+        return np.hypot(self.data[:, 2] - self.data[:, 0], self.data[:, 3] - self.data[:, 1])
+
+    # ==================== Transforms ====================
+
+    def filter(self, conf_thresh=0.0, cls=None):
+        """Rows with conf >= conf_thresh (and class == cls if given)"""
+        mask = self.data[:, 4] >= conf_thresh
+        if cls is not None:
+            mask &= self.data[:, 5] == cls
+        return Detections(self.data[mask])
+
+    def shifted(self, dx, dy):
+        """Copy with boxes translated by (dx, dy), e.g. from crop to frame coordinates"""
+        data = self.data.copy()
+        data[:, [0, 2]] += dx
+        data[:, [1, 3]] += dy
+        return Detections(data)
+
+    def to_dicts(self):
+        """Plain list of dicts (the pre-container format)"""
+        return [Detection(self.data, i).to_dict() for i in range(len(self.data))]
@@ -0,0 +1,193 @@
+"""
+Evidence Writer Module
+Background pool that annotates, JPEG-encodes and writes evidence frames off the UI thread
+"""
+
+import os
+import queue
+import threading
+import zlib
+import cv2
+
+
+def annotate_detections(frame_bgr, detections, color=(0, 0, 255)):
+    """
+    Draw boxes + confidence labels on a copy of frame_bgr
+
+    Args:
+        frame_bgr: BGR frame
+        detections: Iterable of detection dicts (x1, y1, x2, y2, conf)
+        color: Box colour (BGR)
+
+    Returns:
+        Annotated copy of the frame
+    """
+    img = frame_bgr.copy()
+    h, w = img.shape[:2]
+    for det in detections:
+        x1 = max(0, int(det.get("x1", 0)))
+        y1 = max(0, int(det.get("y1", 0)))
+        x2 = min(w - 1, int(det.get("x2", w - 1)))
+        y2 = min(h - 1, int(det.get("y2", h - 1)))
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        label = f"Cheating {det.get('conf', 0.0) * 100:.1f}%"
+        cv2.putText(img, label, (x1, max(12, y1 - 6)),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return img
+
+
+def write_atomic(path, data):
+    """Write bytes via a temp file + os.replace so a crash never leaves a truncated image"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class EvidenceWriter:
+    """
+    Pool of writer threads with bounded queues.
+    Every path is pinned to one worker, so a delete queued after a write of the
+    same file always runs after that write has finished.
+    """
+
+    _STOP = object()
+
+    def __init__(self, num_workers=2, queue_size=64, jpeg_quality=95):
+        """
+        Initialize evidence writer
+
+        Args:
+            num_workers: Number of writer threads
+            queue_size: Maximum pending jobs per worker; submit blocks when full
+            jpeg_quality: JPEG quality (0-100)
+        """
+        self.jpeg_quality = int(jpeg_quality)
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, num_workers))]
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._closed = False
+
+        self.written = 0
+        self.deleted = 0
+        self.failed = 0
+
+        self._threads = []
+        for i, q in enumerate(self._queues):
+            t = threading.Thread(target=self._worker, args=(q,), name=f"evidence-writer-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _lane(self, path):
+        """Worker queue owning this path"""
+        return self._queues[zlib.crc32(str(path).encode("utf-8")) % len(self._queues)]
+
+    def _submit(self, path, job):
+        # Checked and counted under the lock close() sets _closed with: a job is either
+        # rejected here or counted before close() starts draining, so it cannot be lost
+        with self._pending_cond:
+            if self._closed:
+                raise RuntimeError("EvidenceWriter is closed")
+            self._pending += 1
+        self._lane(path).put(job)
+
+    def submit_write(self, path, frame_bgr, detections=(), callback=None):
+        """
+        Queue an annotated JPEG write
+
+        Args:
+            path: Destination file
+            frame_bgr: Frame to annotate (not modified; must not be mutated by the caller afterwards)
+            detections: Detections drawn onto the image
+            callback: Optional callable(path, ok) run on the writer thread when done
+        """
+        self._submit(path, ("write", str(path), frame_bgr, list(detections), callback))
+
+    def submit_bytes(self, path, data, callback=None):
+        """Queue a write of an already encoded image"""
+        self._submit(path, ("bytes", str(path), data, None, callback))
+
+    def submit_encode(self, key, frame_bgr, detections=(), callback=None):
+        """
+        Queue annotate + JPEG-encode without writing
+
+        Args:
+            key: Hashable job key passed back to the callback
+            callback: callable(key, data) with the JPEG bytes (None on failure)
+        """
+        self._submit(key, ("encode", key, frame_bgr, list(detections), callback))
+
+    def submit_delete(self, path, callback=None):
+        """Queue removal of a file; ordered after any queued write of the same path"""
+        self._submit(path, ("delete", str(path), None, None, callback))
+
+    def encode(self, frame_bgr, detections=()):
+        """Annotate and JPEG-encode on the calling thread; returns bytes or None"""
+        img = annotate_detections(frame_bgr, detections) if detections else frame_bgr
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buf.tobytes() if ok else None
+
+    def _worker(self, q):
+        while True:
+            job = q.get()
+            if job is self._STOP:
+                break
+
+            kind, path, payload, detections, callback = job
+            ok = False
+            data = None
+            try:
+                if kind == "delete":
+                    if os.path.exists(path):
+                        os.remove(path)
+                    self.deleted += 1
+                    ok = True
+                else:
+                    data = payload if kind == "bytes" else self.encode(payload, detections)
+                    if data is not None:
+                        if kind != "encode":
+                            write_atomic(path, data)
+                            self.written += 1
+                        ok = True
+            except Exception as ex:
+                print(f"[ERROR] EvidenceWriter {kind} failed for {path}: {ex}")
+
+            if not ok:
+                self.failed += 1
+            if callback:
+                try:
+                    callback(path, data if kind == "encode" else ok)
+                except Exception as ex:
+                    print(f"[ERROR] EvidenceWriter callback: {ex}")
+
+            with self._pending_cond:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._pending_cond.notify_all()
+
+    def pending(self):
+        """Number of queued or running jobs"""
+        with self._pending_cond:
+            return self._pending
+
+    def flush(self, timeout=None):
+        """
+        Wait until all queued jobs have finished
+
+        Returns:
+            True if drained, False on timeout
+        """
+        with self._pending_cond:
+            return self._pending_cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout=None):
+        """Reject new jobs, finish queued ones and stop the worker threads"""
+        with self._pending_cond:
+            if self._closed:
+                return
+            self._closed = True
+        self.flush(timeout)
+        for q in self._queues:
+            q.put(self._STOP)
+        for t in self._threads:
+            t.join(timeout)
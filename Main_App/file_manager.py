@@ -1,8 +1,17 @@
 import pickle
 import csv
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
 from tkinter import filedialog, messagebox
 from Student import Student
 
+# Accepted header names (case-insensitive; spaces and dashes match underscores)
+NAME_HEADERS = ['name']
+DEPT_HEADERS = ['department', 'dept']
+ROLL_HEADERS = ['roll_number', 'rollnumber', 'roll', 'roll no', 'roll_no']
+
 def save_mapper_dialog(mapper, parent):
     path = filedialog.asksaveasfilename(
         defaultextension=".pkl",
@@ -41,70 +50,163 @@ def load_mapper_dialog(parent):
         messagebox.showerror("Error", f"Failed to load project:\n{e}", parent=parent)
         return None, None
 
-def import_students_from_csv(parent):
+def _column_index(ref):
+    """Zero-based column of a cell reference such as 'AB12'"""
+    col = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        col = col * 26 + ord(ch.upper()) - 64
+    return col - 1
+
+def _iter_xlsx_rows(path):
     """
-    Open file dialog to select a CSV and parse students.
+    Stream the first worksheet of an .xlsx file as lists of cell strings (stored values;
+    formulas give their cached result). Parsed incrementally from the zip with the standard
+    library, so large sheets never sit in memory as a whole.
+    """
+    with zipfile.ZipFile(path) as z:
+        workbook = ET.fromstring(z.read("xl/workbook.xml"))
+        ns = workbook.tag[:workbook.tag.index("}") + 1]  # transitional or strict main namespace
+        sheet = workbook.find(f"{ns}sheets/{ns}sheet")
+        if sheet is None:
+            raise ValueError("Workbook has no worksheets.")
+        rel_id = next(v for k, v in sheet.attrib.items() if k.endswith("}id"))
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        parts = {r.get("Id"): r for r in rels}
+
+        def part_path(rel):
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+        sheet_path = part_path(parts[rel_id])
+        strings_rel = next((r for r in rels if r.get("Type", "").endswith("/sharedStrings")), None)
+
+        shared = []
+        if strings_rel is not None:
+            with z.open(part_path(strings_rel)) as f:
+                for _, el in ET.iterparse(f):
+                    if el.tag == f"{ns}si":
+                        shared.append("".join(t.text or "" for t in el.iter(f"{ns}t")))
+                        el.clear()
+
+        row_tag, cell_tag, value_tag, text_tag = f"{ns}row", f"{ns}c", f"{ns}v", f"{ns}t"
+        with z.open(sheet_path) as f:
+            for _, el in ET.iterparse(f):
+                if el.tag != row_tag:
+                    continue
+                row = []
+                for cell in el:
+                    if cell.tag != cell_tag:
+                        continue
+                    kind = cell.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(text_tag))
+                    else:
+                        v = cell.find(value_tag)
+                        value = v.text or "" if v is not None else ""
+                        if kind == "s" and value:
+                            value = shared[int(value)]
+                        elif kind in (None, "n") and value.endswith(".0"):
+                            value = value[:-2]  # integral numbers (e.g. rolls) without '.0'
+                    ref = cell.get("r")
+                    col = _column_index(ref) if ref else len(row)
+                    if col > len(row):
+                        row.extend([""] * (col - len(row)))
+                    row.append(value)
+                el.clear()
+                yield row
+
+def iter_roster_rows(path):
+    """Stream the rows of a CSV or XLSX roster (first sheet) as lists of cell strings, header row first"""
+    if Path(path).suffix.lower() in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx_rows(path)
+        return
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            yield row
+
+def _find_column(headers, possible_names):
+    headers_norm = [h.strip().lower() for h in headers]
+    for name in possible_names:
+        target = name.lower()
+        for idx, norm in enumerate(headers_norm):
+            if norm == target or norm.replace(' ', '_') == target or norm.replace('-', '_') == target:
+                return idx
+    return None
+
+def read_students(path, skipped, known=None):
+    """
+    Stream Students from a CSV or XLSX roster with Name, Department and Roll_number columns
+    (headers are case-insensitive). The header is checked before this returns; rows are
+    parsed as the returned generator is consumed.
+
+    Args:
+        path: .csv or .xlsx
+        skipped: List that receives (row number, reason) for every row not yielded: missing
+                 fields, a roll repeated within the file, or a roll for which known(roll) is true
+        known: Optional roll -> bool lookup of rolls that already exist (e.g. mapper.get_student_by_roll)
+
+    Raises:
+        ValueError: no header row or required column missing (file errors propagate as OSError)
+    """
+    rows = iter_roster_rows(path)
+    header = next(rows, None)
+    if not header:
+        raise ValueError("File has no header row.")
+
+    name_idx = _find_column(header, NAME_HEADERS)
+    dept_idx = _find_column(header, DEPT_HEADERS)
+    roll_idx = _find_column(header, ROLL_HEADERS)
+    if name_idx is None or dept_idx is None or roll_idx is None:
+        raise ValueError("File must contain Name, Department and Roll_number columns (headers are case-insensitive).")
+
+    def students():
+        seen = set()
+        width = max(name_idx, dept_idx, roll_idx) + 1
+        for row_num, row in enumerate(rows, start=2):
+            if len(row) < width:
+                row = list(row) + [""] * (width - len(row))
+            name = row[name_idx].strip()
+            dept = row[dept_idx].strip()
+            roll = row[roll_idx].strip()
+
+            if not (name and dept and roll):
+                if any(cell.strip() for cell in row):  # blank lines are not reported
+                    skipped.append((row_num, "missing fields"))
+                continue
+            if roll in seen:
+                skipped.append((row_num, f"duplicate roll {roll} in file"))
+                continue
+            seen.add(roll)
+            if known is not None and known(roll):
+                skipped.append((row_num, f"roll {roll} already exists"))
+                continue
+
+            yield Student(name, dept, roll)
+
+    return students()
+
+def import_students_from_csv(parent, known=None):
+    """
+    Open file dialog to select a CSV or Excel roster and prepare it for streaming import.
     Expected columns (case-insensitive): Name, Department, Roll_number (roll or roll_number accepted)
-    Returns (students_list, path) or (None, None) on cancel/error.
+    Returns (students, path, skipped) or (None, None, None) on cancel/error; students is a
+    generator (see read_students) and skipped fills in as it is consumed.
     """
     path = filedialog.askopenfilename(
-        title="Import Students from CSV",
-        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+        title="Import Students",
+        filetypes=[("Rosters", "*.csv *.xlsx"), ("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("All files", "*.*")],
     )
     if not path:
-        return None, None
+        return None, None, None
 
-    students = []
     skipped = []
     try:
-        with open(path, newline='', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            # reader.fieldnames has type Sequence[str] | None, so capture into a local var and check
-            fieldnames = reader.fieldnames
-            if not fieldnames:
-                messagebox.showerror("Error", "CSV has no header row.", parent=parent)
-                return None, path
-
-            # Normalize headers
-            headers_norm = [h.strip().lower() for h in fieldnames]
-
-            # Helper to find header key by possible names
-            def find_key(possible_names):
-                for name in possible_names:
-                    target = name.lower()
-                    for original, norm in zip(fieldnames, headers_norm):
-                        if norm == target or norm.replace(' ', '_') == target or norm.replace('-', '_') == target:
-                            return original  # return original header name to use with row.get()
-                return None
-
-            name_key = find_key(['name'])
-            dept_key = find_key(['department', 'dept'])
-            roll_key = find_key(['roll_number', 'rollnumber', 'roll', 'roll no', 'roll_no'])
-
-            if not (name_key and dept_key and roll_key):
-                messagebox.showerror("Error", "CSV must contain Name, Department and Roll_number columns (headers are case-insensitive).", parent=parent)
-                return None, path
-
-            row_num = 1  # header
-            for row in reader:
-                row_num += 1
-                raw_name = row.get(name_key, "")
-                raw_dept = row.get(dept_key, "")
-                raw_roll = row.get(roll_key, "")
-
-                name = raw_name.strip() if raw_name is not None else ""
-                dept = raw_dept.strip() if raw_dept is not None else ""
-                roll = str(raw_roll).strip() if raw_roll is not None else ""
-
-                if not (name and dept and roll):
-                    skipped.append((row_num, "missing fields"))
-                    continue
-
-                students.append(Student(name, dept, roll))
-
+        students = read_students(path, skipped, known=known)
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to read CSV:\n{e}", parent=parent)
-        return None, path
+        messagebox.showerror("Error", f"Failed to read roster:\n{e}", parent=parent)
+        return None, None, None
 
-    # return parsed students list and path; UI will handle duplicates & adding to mapper
-    return students, path
\ No newline at end of file
+    return students, path, skipped
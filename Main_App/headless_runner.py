@@ -0,0 +1,282 @@
+"""
+Headless Runner Module
+Runs the PlaybackManager + DetectionProcessor pipeline without Tk, for servers without
+a display. Frames are consumed as fast as the pipeline delivers them (no GUI poll loop);
+outputs are the same as the UI's: flagged frames, the flagged log and top-N evidence.
+
+Usage (from Main_App):
+    python -m headless_runner project.pkl weights/bestone.onnx recordings/exam.mp4 [--realtime] [--drop-frames]
+    python -m headless_runner project.pkl weights/bestone.onnx 0 --source-type camera --realtime
+"""
+
+import argparse
+import os
+import signal
+import time
+from pathlib import Path
+
+import cv2
+
+from Mapper import CoordinateMapper
+from cheat_detector import CheatDetector
+from detection_processor import DetectionProcessor
+from playback_manager import PlaybackManager
+from region_inference import SeatRoiPlanner, TilePlanner
+from tracker import IoUTracker
+
+
+# Defaults mirror the UI's constants (image_tagger_ui.py)
+TOP_N = 20
+MOTION_GATE = {"method": "diff", "downscale_width": 160, "area_thresh": 0.002, "max_skip": 50}
+SEAT_ROI_PADDING = 160
+TILE_SIZE = 640
+TILE_OVERLAP = 0.2
+SEAT_RASTER_SCALE = 0.25
+TRACKER = {"iou_thresh": 0.3, "high_conf": None, "max_missed": 15, "min_hits": 3}
+SEAT_SMOOTHING = {"alpha": 0.3, "on_thresh": 0.5, "off_thresh": 0.3, "min_frames": 3}
+
+
+def detect_source_type(source):
+    """Camera index, video folder or video file"""
+    if str(source).isdigit():
+        return "camera"
+    return "video_folder" if Path(source).is_dir() else "video_file"
+
+
+class HeadlessRunner:
+    """Drives one playback through detection, seat assignment and evidence saving"""
+
+    def __init__(self, mapper, detector, processor, track_incidents=True, tracker=None,
+                 assignment="nearest", stats_seconds=10.0, frame_queue_size=64):
+        """
+        Args:
+            mapper: CoordinateMapper with the seat layout
+            detector: CheatDetector (or None to run the pipeline without detection)
+            processor: DetectionProcessor that receives the flagged detections
+            track_incidents: Save one evidence frame per tracked incident instead of per frame
+            tracker: IoUTracker keyword arguments
+            assignment: 'nearest' or 'greedy' seat assignment (per-frame mode)
+            stats_seconds: Interval of progress lines (0 disables)
+            frame_queue_size: Frames buffered between inference and this consumer
+        """
+        self.mapper = mapper
+        self.detector = detector
+        self.processor = processor
+        self.track_incidents = track_incidents
+        self.tracker_config = tracker or TRACKER
+        self.assignment = assignment
+        self.stats_seconds = stats_seconds
+
+        self.playback_manager = PlaybackManager(frame_queue_size=frame_queue_size)
+        self.trackers = {}  # src_name -> IoUTracker
+        self.clocks = {}  # src_name -> (recording start epoch, fps)
+        self.source_type = None
+        self.frames = 0
+        self.flagged = 0
+
+    def run(self, source_type, source_path, conf_thresh=0.3, pacing="max", batch_size=1,
+            batch_timeout_ms=0, motion_gate=None, region_planner=None, lossless=None):
+        """
+        Run playback to the end of the source (or until stop() is called)
+
+        Args:
+            source_type: video_file, video_folder or camera
+            source_path: Path or camera index
+            conf_thresh: Detector confidence threshold
+            pacing: 'max' (no pacing sleep) or 'realtime' (source frame rate)
+            batch_size, batch_timeout_ms, motion_gate, region_planner: As PlaybackManager.start_playback
+            lossless: Process every frame (backpressure instead of drops). None (default) means on for
+                      video_file/video_folder and off for cameras, whose frames cannot be held back
+
+        Returns:
+            Dictionary {frames, flagged, seconds, fps, top_n, stats}
+        """
+        if lossless is None:
+            lossless = source_type != "camera"
+        self.mapper.enable_seat_raster(scale=SEAT_RASTER_SCALE)
+        self.processor.reset_seat_filters()
+        self.trackers = {}
+        self.clocks = {}
+        self.source_type = source_type
+        self.frames = 0
+        self.flagged = 0
+
+        pm = self.playback_manager
+        pm.start_playback(
+            source_type, source_path, self.detector, conf_thresh,
+            batch_size=batch_size, batch_timeout_ms=batch_timeout_ms,
+            motion_gate=motion_gate, region_planner=region_planner, pacing=pacing, lossless=lossless
+        )
+
+        t0 = time.perf_counter()
+        next_report = t0 + self.stats_seconds
+        while True:
+            frame_data = pm.get_frame(timeout=0.1)
+            if frame_data is not None:
+                self._process(*frame_data)
+            elif pm.is_finished() and pm.frame_queue.empty():
+                break
+
+            if self.stats_seconds and time.perf_counter() >= next_report:
+                next_report += self.stats_seconds
+                self._report(t0)
+
+        self._flush_trackers()
+        self.processor.flush()
+
+        seconds = time.perf_counter() - t0
+        return {
+            "frames": self.frames,
+            "flagged": self.flagged,
+            "seconds": seconds,
+            "fps": self.frames / seconds if seconds else 0.0,
+            "top_n": self.processor.get_top_count(),
+            "stats": pm.get_stats(),
+        }
+
+    def stop(self):
+        """Stop playback; run() then drains the queued frames and returns"""
+        self.playback_manager.stop_playback()
+
+    def _timestamp(self, src_name, frame_idx):
+        """
+        Frame time in epoch seconds. Recordings use their own clock, as batch_runner does (file
+        mtime minus duration, plus the frame offset), so save gaps and incident times do not
+        depend on how fast this machine runs; cameras use the wall clock.
+        """
+        if self.source_type == "camera":
+            return time.time()
+        clock = self.clocks.get(src_name)
+        if clock is None:
+            cap = cv2.VideoCapture(src_name)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            cap.release()
+            clock = self.clocks[src_name] = (os.path.getmtime(src_name) - total / fps, fps)
+        start, fps = clock
+        return start + frame_idx / fps
+
+    def _process(self, frame, src_name, frame_idx, detections):
+        """Same per-frame handling as the UI's poll loop"""
+        self.frames += 1
+        ts = self._timestamp(src_name, frame_idx)
+        if self.track_incidents:
+            # Tracks run on every frame (empty ones age tracks out); confirmed tracks are flagged
+            # right away (provisional incident) and ended ones may upgrade that evidence
+            if src_name not in self.trackers:
+                self.trackers[src_name] = IoUTracker(**self.tracker_config)
+            self.flagged += len(self.processor.update_seat_smoothing(
+                detections, self.mapper, src_name, frame_idx, assignment=self.assignment
+            ))
+            for incident in self.trackers[src_name].update(detections, frame, ts, frame_idx, src_name):
+                self.flagged += len(self.processor.process_incident(incident, self.mapper, timestamp=incident.end_time))
+        else:
+            flagged = self.processor.process_frame(
+                detections, frame, self.mapper, src_name, frame_idx, assignment=self.assignment, timestamp=ts
+            )
+            self.flagged += len(flagged)
+
+    def _flush_trackers(self):
+        for tracker in self.trackers.values():
+            for incident in tracker.flush():
+                self.flagged += len(self.processor.process_incident(incident, self.mapper, timestamp=incident.end_time))
+        self.trackers = {}
+
+    def _report(self, t0):
+        stats = self.playback_manager.get_stats()
+        elapsed = time.perf_counter() - t0
+        print(
+            f"[INFO] {self.frames} frames ({self.frames / max(elapsed, 1e-6):.1f} FPS) | "
+            f"decode {stats['decode']['fps']:.1f} FPS | inference {stats['inference']['fps']:.1f} FPS | "
+            f"{stats['speed']:.2f}x real time | dropped {stats['dropped'] + stats['queue_dropped']} | "
+            f"flagged {self.flagged} | top-N {self.processor.get_top_count()}"
+        )
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Headless EyeSpy detection pipeline")
+    parser.add_argument("project", help="Saved project (.pkl) with the seat mapping")
+    parser.add_argument("model", help="Detector weights (.pt or .onnx)")
+    parser.add_argument("source", help="Video file, folder of videos, or camera index")
+    parser.add_argument("--source-type", choices=["video_file", "video_folder", "camera"], default=None,
+                        help="Default: detected from the source")
+    parser.add_argument("--realtime", action="store_true", help="Pace decoding at the source frame rate")
+    parser.add_argument("--drop-frames", action="store_true",
+                        help="Let a recording's decoder overwrite frames inference has not reached "
+                             "(recordings are otherwise processed frame by frame; cameras always drop)")
+    parser.add_argument("--out", default="output", help="Output directory")
+    parser.add_argument("--conf", type=float, default=0.3)
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--batch-timeout-ms", type=int, default=0)
+    parser.add_argument("--motion-gate", action="store_true", help="Skip inference on static frames")
+    parser.add_argument("--inference-mode", choices=["full", "seat_roi", "tiled"], default="full")
+    parser.add_argument("--per-frame", action="store_true", help="Save per frame instead of per tracked incident")
+    parser.add_argument("--greedy", action="store_true", help="Greedy one-box-per-seat assignment (per-frame mode)")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--backend", choices=["ultralytics", "onnx"], default=None)
+    parser.add_argument("--log-format", choices=["csv", "arrow", "parquet"], default="csv")
+    parser.add_argument("--stats-seconds", type=float, default=10.0)
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    if not Path(args.project).is_file():
+        raise SystemExit(f"Project file not found: {args.project}")
+    mapper = CoordinateMapper.load(args.project)
+    detector = CheatDetector(args.model, device=args.device, backend=args.backend)
+
+    out = Path(args.out)
+    processor = DetectionProcessor(
+        output_dir=out,
+        flagged_dir=out / "flagged_frames",
+        log_csv=out / "flagged_log.csv",
+        top_n=args.top_n,
+        max_entries_per_person=50,
+        save_gap_seconds=2,
+        seat_smoothing=SEAT_SMOOTHING,
+        log_format=args.log_format
+    )
+
+    region_planner = None
+    if args.inference_mode == "seat_roi":
+        region_planner = SeatRoiPlanner.from_mapper(mapper, padding=SEAT_ROI_PADDING)
+    elif args.inference_mode == "tiled":
+        region_planner = TilePlanner(tile_size=TILE_SIZE, overlap=TILE_OVERLAP)
+
+    runner = HeadlessRunner(
+        mapper, detector, processor,
+        track_incidents=not args.per_frame,
+        assignment="greedy" if args.greedy else "nearest",
+        stats_seconds=args.stats_seconds
+    )
+    # SIGTERM (service stop) and Ctrl+C end playback cleanly so pending evidence and log rows are written
+    signal.signal(signal.SIGTERM, lambda *_: runner.stop())
+    signal.signal(signal.SIGINT, lambda *_: runner.stop())
+
+    try:
+        summary = runner.run(
+            args.source_type or detect_source_type(args.source), args.source,
+            conf_thresh=args.conf,
+            pacing="realtime" if args.realtime else "max",
+            batch_size=args.batch_size,
+            batch_timeout_ms=args.batch_timeout_ms,
+            motion_gate=MOTION_GATE if args.motion_gate else None,
+            region_planner=region_planner,
+            lossless=False if args.drop_frames else None
+        )
+    finally:
+        processor.close()
+
+    stats = summary["stats"]
+    print(f"[INFO] {summary['frames']} frames in {summary['seconds']:.1f}s ({summary['fps']:.1f} FPS, "
+          f"source {stats['source_fps']:.1f} FPS, {stats['speed']:.2f}x real time), "
+          f"{summary['flagged']} flagged, top-N {summary['top_n']}, "
+          f"{stats['dropped'] + stats['queue_dropped']} frame(s) dropped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
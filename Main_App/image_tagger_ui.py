@@ -4,6 +4,7 @@ Main application class for cheating detection system
 """
 
 import os
+import time
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox, filedialog, simpledialog
@@ -25,6 +26,8 @@ from ui_student_controls import StudentControlPanel, FileOperationsPanel
 from ui_detection_controls import DetectionControlPanel
 from playback_manager import PlaybackManager, FrameSampler
 from detection_processor import DetectionProcessor
+from region_inference import SeatRoiPlanner, TilePlanner
+from tracker import IoUTracker
 
 # Constants
 OUTPUT_DIR = Path("output")
@@ -32,6 +35,23 @@ FLAGGED_DIR = OUTPUT_DIR / "flagged_frames"
 LOG_CSV = OUTPUT_DIR / "flagged_log.csv"
 WEIGHTS_DEFAULT = "./weights/bestone.pt"
 TOP_N = 20
+MOTION_GATE = {"method": "diff", "downscale_width": 160, "area_thresh": 0.002, "max_skip": 50}
+SEAT_ROI_PADDING = 160
+TILE_SIZE = 640
+TILE_OVERLAP = 0.2
+SEAT_RASTER_SCALE = 0.25  # nearest-seat label raster resolution used during playback
+SEAT_ASSIGNMENT = "nearest"  # "greedy": a student can only be claimed by one box per frame
+TRACK_INCIDENTS = True  # save one evidence frame per tracked incident instead of per frame
+# high_conf None: every box above the confidence slider can start a track
+TRACKER = {"iou_thresh": 0.3, "high_conf": None, "max_missed": 15, "min_hits": 3}
+# Per-seat EMA + hysteresis (None disables): gates per-frame flags when TRACK_INCIDENTS is off,
+# and with TRACK_INCIDENTS only seats active during an incident are flagged (update_seat_smoothing)
+SEAT_SMOOTHING = {"alpha": 0.3, "on_thresh": 0.5, "off_thresh": 0.3, "min_frames": 3}
+LOSSLESS_POLL_BUDGET = 0.025  # seconds of queued frames processed per UI poll
+DETECTION_POLL_MS = 10  # detection results are drained this often
+DISPLAY_INTERVAL_MS = 16  # newest decoded frame is shown this often (~60 Hz)
+FLAG_HOLD_SECONDS = 1.0  # flags stay on the live view this long
+IMPORT_REPORT_ROWS = 15  # skipped rows listed in the import summary
 
 
 class ImageTaggerUI:
@@ -63,6 +83,15 @@ class ImageTaggerUI:
         
         # Playback manager
         self.playback_manager = PlaybackManager(frame_queue_size=4)
+        self.trackers = {}  # src_name -> IoUTracker
+        self.lossless_playback = False
+        self.playback_report_pending = False
+        # Live view: newest decoded frame + latest detection overlay (see _refresh_display)
+        self.display_active = False
+        self.shown_seq = None
+        self.overlay = None  # (src_name, frame_idx, detections) of the last processed frame
+        self.overlay_flags = {}  # roll -> (student, expiry time)
+        self.next_status_update = 0.0
         
         # Detection processor
         self.detection_processor = DetectionProcessor(
@@ -71,17 +100,20 @@ class ImageTaggerUI:
             log_csv=LOG_CSV,
             top_n=TOP_N,
             max_entries_per_person=50,
-            save_gap_seconds=2
+            save_gap_seconds=2,
+            seat_smoothing=SEAT_SMOOTHING
         )
         
         # Build UI
         self._build_ui(image_path)
+        self.detection_processor.add_flagged_listener(self._on_flagged_counts_changed)
         
         # Bind keyboard shortcuts
         self._bind_shortcuts()
         
-        # Start polling for playback frames
-        self.root.after(30, self._poll_playback_queue)
+        # Start polling for playback frames and refreshing the live view
+        self.root.after(DETECTION_POLL_MS, self._poll_playback_queue)
+        self.root.after(DISPLAY_INTERVAL_MS, self._refresh_display)
     
     def _build_ui(self, image_path):
         """Responsive UI layout with proper resizing"""
@@ -390,14 +422,44 @@ class ImageTaggerUI:
         st = self.detection_panel.get_source_type()
         conf = self.detection_panel.get_conf_threshold()
         
+        motion_gate = MOTION_GATE if self.detection_panel.get_motion_gate_enabled() else None
+        
+        # Seats are fixed during an exam: answer per-detection seat lookups from a label raster
+        self.mapper.enable_seat_raster(scale=SEAT_RASTER_SCALE)
+        
+        region_planner = None
+        if self.detection_panel.get_inference_mode() == "seat_roi":
+            if not self.mapper.mapped_students:
+                messagebox.showwarning("Warning", "No mapped seats. Seat ROI mode will use the full frame.")
+            region_planner = SeatRoiPlanner.from_mapper(self.mapper, padding=SEAT_ROI_PADDING)
+        elif self.detection_panel.get_inference_mode() == "tiled":
+            region_planner = TilePlanner(tile_size=TILE_SIZE, overlap=TILE_OVERLAP)
+        
+        # Offline lossless mode only applies to recordings; a camera cannot wait for us
+        self.lossless_playback = self.detection_panel.get_lossless_enabled() and st != "camera"
+        
+        self.trackers = {}
+        self.detection_processor.reset_seat_filters()
         success = self.playback_manager.start_playback(
-            st, self.source_path, self.detector, conf
+            st, self.source_path, self.detector, conf,
+            motion_gate=motion_gate,
+            region_planner=region_planner,
+            lossless=self.lossless_playback
         )
         
         if success:
-            self.status_bar.config(text="▶ Playback started")
-            # Switch to detection mode
+            self.playback_report_pending = True
+            self.display_active = True
+            self.shown_seq = None
+            self.overlay = None
+            self.overlay_flags = {}
+            mode = " (offline, every frame)" if self.lossless_playback else ""
+            self.status_bar.config(text=f"▶ Playback started{mode}")
+            # Switch to detection mode; later count changes arrive through _on_flagged_counts_changed
             self.list_manager.switch_to_detection_mode()
+            self.list_manager.update_flagged_students(
+                self.detection_processor.get_flagged_students_summary(self.mapper)
+            )
     
     def _toggle_pause(self):
         """Toggle playback pause"""
@@ -410,71 +472,177 @@ class ImageTaggerUI:
     def _stop_playback(self):
         """Stop playback"""
         self.playback_manager.stop_playback()
+        self.playback_report_pending = False
+        self._flush_trackers()
         self.status_bar.config(text="⏹ Playback stopped")
         # Switch back to normal mode
         self.list_manager.switch_to_normal_mode()
         # Restore unmapped students list
-        self.list_manager.populate_unmapped(self.mapper.unmapped_students)
+        self._apply_unmapped_filter()
     
     def _terminate_playback(self):
         """Terminate playback aggressively"""
         self.playback_manager.terminate_playback()
+        self.playback_report_pending = False
+        self._flush_trackers()
         self.status_bar.config(text="⛔ Playback terminated")
         # Switch back to normal mode
         self.list_manager.switch_to_normal_mode()
         # Restore unmapped students list
-        self.list_manager.populate_unmapped(self.mapper.unmapped_students)
+        self._apply_unmapped_filter()
     
     def _poll_playback_queue(self):
-        """Poll playback queue for new frames"""
+        """
+        Drain detection results from the playback queue (seat assignment, tracking, saving).
+        Display is separate (_refresh_display), so this only keeps the overlay data current.
+        """
         frame_data = self.playback_manager.get_frame()
         
         if frame_data:
-            frame, src_name, frame_idx, detections = frame_data
+            # Drain for a short time budget (in offline mode the decoder is waiting on us)
+            deadline = time.perf_counter() + LOSSLESS_POLL_BUDGET
+            flagged = []
+            any_detections = False
+            while frame_data:
+                frame, src_name, frame_idx, detections = frame_data
+                any_detections = any_detections or bool(detections)
+                flagged.extend(self._process_playback_frame(frame, src_name, frame_idx, detections))
+                self.overlay = (src_name, frame_idx, detections)
+                
+                if time.perf_counter() >= deadline:
+                    break
+                frame_data = self.playback_manager.get_frame()
+            
+            if any_detections or flagged:
+                self._show_flagged(flagged)
             
-            # Update current frame
+            # More frames are likely waiting in offline mode: come back right away
+            self.root.after(1 if self.lossless_playback else DETECTION_POLL_MS, self._poll_playback_queue)
+            return
+        
+        if not self.playback_manager.is_running:
+            if self.trackers:
+                # Playback ended on its own: close the tracks that were still open
+                self._flush_trackers()
+            if self.playback_report_pending and self.playback_manager.is_finished():
+                self.playback_report_pending = False
+                stats = self.playback_manager.get_stats()
+                self.status_bar.config(
+                    text=f"✓ Playback finished: {stats['effective_fps']:.1f} FPS processed vs "
+                         f"{stats['source_fps']:.1f} FPS source ({stats['speed']:.2f}x real time), "
+                         f"{stats['dropped'] + stats['queue_dropped']} frame(s) dropped"
+                )
+        
+        # Schedule next poll
+        self.root.after(DETECTION_POLL_MS, self._poll_playback_queue)
+    
+    def _process_playback_frame(self, frame, src_name, frame_idx, detections):
+        """Run seat assignment / tracking for one playback frame; returns the flagged (student, det) list"""
+        flagged = []
+        if TRACK_INCIDENTS:
+            # Tracks run on every frame (empty ones age tracks out); confirmed tracks are flagged
+            # right away (provisional incident) and ended ones may upgrade that evidence
+            if src_name not in self.trackers:
+                self.trackers[src_name] = IoUTracker(**TRACKER)
+            # Provisional incidents waiting on the seat smoothing may be flagged by this frame
+            flagged.extend(self.detection_processor.update_seat_smoothing(
+                detections, self.mapper, src_name, frame_idx, assignment=SEAT_ASSIGNMENT
+            ))
+            incidents = self.trackers[src_name].update(detections, frame, time.time(), frame_idx, src_name)
+            for incident in incidents:
+                flagged.extend(self.detection_processor.process_incident(incident, self.mapper))
+        else:
+            # Assign all detections to seats in one pass (every frame, so seat scores decay)
+            flagged = self.detection_processor.process_frame(
+                detections, frame, self.mapper, src_name, frame_idx,
+                assignment=SEAT_ASSIGNMENT
+            )
+        return flagged
+    
+    def _refresh_display(self):
+        """
+        Live view tick: show the newest decoded frame with the latest detection overlay.
+        Runs at the display rate regardless of how fast inference is; overlay labels carry
+        the frame index the detections were computed on.
+        """
+        latest = self.playback_manager.get_latest_frame() if self.display_active else None
+        if latest is not None and latest[3] != self.shown_seq:
+            frame, src_name, frame_idx, seq = latest
+            self.shown_seq = seq
+            
+            # Update current frame (no full-size PIL copy; the canvas renders from the BGR buffer)
             self.current_frame_bgr = frame
-            self.current_frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            self.current_frame_pil = None
             
-            # Update canvas
-            self.canvas_manager.set_image(
-                self.current_frame_pil,
+            # Update canvas (video path: reused PhotoImage, clears overlays, markers kept)
+            self.canvas_manager.set_video_frame(
+                frame,
                 fit_within=(CANVAS['fit_width'], CANVAS['fit_height'])
             )
             
-            # Process detections
-            if detections:
-                self.canvas_manager.draw_detections(detections, color="red")
-                
-                # Process each detection
-                for det in detections:
-                    flagged = self.detection_processor.process_detection(
-                        det, frame, self.mapper, src_name, frame_idx
-                    )
-                    
-                    # Draw flags
-                    for stu, _ in flagged:
-                        sx, sy = self.mapper.mapped_students.get(stu.roll)
-                        if sx and sy:
-                            self.canvas_manager.draw_flag_for_student(sx, sy, stu.name, color="orange")
-                
-                # Update top-N label
-                self.detection_panel.update_topn_label(
-                    self.detection_processor.get_top_count(), TOP_N
-                )
-                
-                # Update flagged students display
-                flagged_summary = self.detection_processor.get_flagged_students_summary(self.mapper)
-                self.list_manager.update_flagged_students(flagged_summary)
+            det_idx = None
+            if self.overlay and self.overlay[0] == src_name:
+                _, det_idx, detections = self.overlay
+                if detections:
+                    self.canvas_manager.draw_detections(detections, color="red", frame_idx=det_idx)
+            
+            now = time.time()
+            for roll, (stu, expiry) in list(self.overlay_flags.items()):
+                pos = self.mapper.mapped_students.get(roll)
+                if expiry < now or not pos:
+                    del self.overlay_flags[roll]
+                    continue
+                self.canvas_manager.draw_flag_for_student(pos[0], pos[1], stu.name, color="orange")
             
-            # Redraw markers
             self.canvas_manager.redraw_all_markers(
                 self.mapper.mapped_students,
                 self.mapper.mapped_student_objects
             )
+            
+            if self.playback_manager.is_running and now >= self.next_status_update:
+                self.next_status_update = now + 0.5
+                lag = f", detections @{det_idx} ({frame_idx - det_idx} behind)" if det_idx is not None else ""
+                self.status_bar.config(text=f"▶ {Path(str(src_name)).name} frame {frame_idx}{lag}")
         
-        # Schedule next poll
-        self.root.after(30, self._poll_playback_queue)
+        if self.display_active and self.playback_manager.is_finished() and latest is not None \
+                and latest[3] == self.shown_seq:
+            self.display_active = False
+        
+        self.root.after(DISPLAY_INTERVAL_MS, self._refresh_display)
+    
+    def _show_flagged(self, flagged):
+        """Draw flags for flagged students and refresh the top-N label"""
+        expiry = time.time() + FLAG_HOLD_SECONDS
+        for stu, _ in flagged:
+            sx, sy = self.mapper.mapped_students.get(stu.roll)
+            if sx and sy:
+                self.canvas_manager.draw_flag_for_student(sx, sy, stu.name, color="orange")
+                # Kept on the live view for a while (each displayed frame clears overlays)
+                self.overlay_flags[stu.roll] = (stu, expiry)
+        
+        # Update top-N label
+        self.detection_panel.update_topn_label(
+            self.detection_processor.get_top_count(), TOP_N
+        )
+    
+    def _on_flagged_counts_changed(self, changes):
+        """Processor listener: update the flagged list rows of the rolls whose saved-frame count changed"""
+        rows = {}
+        for roll, count in changes.items():
+            stu = self.mapper.mapped_student_objects.get(roll)
+            # Unmapped students are not listed (as in get_flagged_students_summary)
+            rows[roll] = {'name': stu.name, 'count': count} if stu else {'name': '', 'count': 0}
+        self.list_manager.apply_flagged_changes(rows)
+    
+    def _flush_trackers(self):
+        """End all open tracks and process their incidents"""
+        flagged = []
+        for tracker in self.trackers.values():
+            for incident in tracker.flush():
+                flagged.extend(self.detection_processor.process_incident(incident, self.mapper))
+        self.trackers = {}
+        if flagged:
+            self._show_flagged(flagged)
     
     # ==================== Canvas Event Handlers ====================
     
@@ -494,17 +662,15 @@ class ImageTaggerUI:
         # Convert display coords to image coords
         ix, iy = self.canvas_manager.display_to_image(dx, dy)
         
-        # Get selected unmapped student
-        idx = self.list_manager.get_selected_unmapped_index()
-        if idx is None:
+        # Get selected unmapped student (the list may be filtered)
+        stu = self.list_manager.get_selected_unmapped_student()
+        if stu is None:
             messagebox.showerror(
                 "Error",
                 "Please select an unmapped student from the list first"
             )
             return
         
-        stu = self.mapper.unmapped_students[idx]
-        
         # Map student
         self.mapper.map_student(ix, iy, stu)
         
@@ -552,36 +718,32 @@ class ImageTaggerUI:
     
     def edit_student_ui(self):
         """Edit selected student"""
-        idx = self.list_manager.get_selected_unmapped_index()
-        if idx is None:
+        stu = self.list_manager.get_selected_unmapped_student()
+        if stu is None:
             messagebox.showerror("Error", "Please select a student to edit from the Unmapped list")
             return
         
-        stu = self.mapper.unmapped_students[idx]
         res = prompt_edit_student(self.root, stu)
         if not res:
             return
         
         name, dept, roll = res
-        existing = self.mapper.get_student_by_roll(roll)
-        if existing and existing.roll != stu.roll:
+        if not self.mapper.update_student(stu, name, dept, roll):
             messagebox.showerror("Error", f"Roll number '{roll}' already exists")
             return
         
-        stu.name, stu.department, stu.roll = name, dept, roll
         self._apply_unmapped_filter()
         self.status_bar.config(text=f"✓ Updated student: {stu.name}")
     
     def remove_student_ui(self):
         """Remove selected student"""
-        idx = self.list_manager.get_selected_unmapped_index()
-        if idx is None:
+        stu = self.list_manager.get_selected_unmapped_student()
+        if stu is None:
             messagebox.showerror("Error", "Please select a student to remove from the Unmapped list")
             return
         
-        stu = self.mapper.unmapped_students[idx]
         if messagebox.askyesno("Confirm Delete", f"Remove student '{stu.name}' ({stu.roll})?"):
-            self.mapper.unmapped_students.pop(idx)
+            self.mapper.remove_student(stu.roll)
             self._apply_unmapped_filter()
             self._update_counts()
             self.status_bar.config(text=f"✓ Removed student: {stu.name}")
@@ -626,26 +788,33 @@ class ImageTaggerUI:
     # ==================== File Operations ====================
     
     def import_from_csv(self):
-        """Import students from CSV"""
-        parsed_students, path = import_students_from_csv(self.root)
-        if parsed_students is None:
+        """Import students from a CSV or Excel roster (streamed straight into the mapper)"""
+        students, path, skipped = import_students_from_csv(self.root, known=self.mapper.get_student_by_roll)
+        if students is None:
             return
         
-        added = 0
-        skipped = 0
-        for stu in parsed_students:
-            if self.mapper.get_student_by_roll(stu.roll):
-                skipped += 1
-                continue
-            self.mapper.add_student(stu)
-            added += 1
+        error = None
+        before = self.mapper.unmapped_count()
+        try:
+            added, _ = self.mapper.add_students(students)
+        except Exception as e:
+            # Rows read before the error stay imported
+            added, error = self.mapper.unmapped_count() - before, e
         
+        # One refresh for the whole batch
         self._apply_unmapped_filter()
         self._update_counts()
         
-        summary = f"✓ Imported {added} students. Skipped {skipped} duplicates from: {path}"
+        summary = f"✓ Imported {added} students. Skipped {len(skipped)} rows from: {path}"
         self.status_bar.config(text=summary)
-        messagebox.showinfo("Import Complete", summary)
+        details = "\n".join(f"Row {row}: {reason}" for row, reason in skipped[:IMPORT_REPORT_ROWS])
+        if len(skipped) > IMPORT_REPORT_ROWS:
+            details += f"\n... and {len(skipped) - IMPORT_REPORT_ROWS} more"
+        message = f"{summary}\n\n{details}" if details else summary
+        if error is not None:
+            messagebox.showerror("Import Stopped", f"{message}\n\nFailed to read the rest of the file:\n{error}")
+        else:
+            messagebox.showinfo("Import Complete", message)
     
     def export_to_csv(self):
         """Export students to CSV"""
@@ -677,7 +846,7 @@ class ImageTaggerUI:
     
     def refresh_views(self):
         """Refresh all views"""
-        self.list_manager.populate_unmapped(self.mapper.unmapped_students)
+        self._apply_unmapped_filter()
         self.list_manager.populate_mapped(
             self.mapper.mapped_students,
             self.mapper.mapped_student_objects
@@ -689,23 +858,13 @@ class ImageTaggerUI:
         self._update_counts()
     
     def _apply_unmapped_filter(self):
-        """Apply search filter to unmapped list"""
+        """Apply search filter to unmapped list (name, roll or department substring, via the roster index)"""
         query = self.student_panel.get_search_query()
-        
-        if not query:
-            self.list_manager.populate_unmapped(self.mapper.unmapped_students)
-        else:
-            filtered = [
-                s for s in self.mapper.unmapped_students
-                if query in s.name.lower()
-                or query in s.roll.lower()
-                or query in s.department.lower()
-            ]
-            self.list_manager.populate_unmapped(filtered)
+        self.list_manager.populate_unmapped(self.mapper.search_unmapped(query))
     
     def _update_counts(self):
         """Update student counts"""
-        unmapped = len(self.mapper.unmapped_students)
+        unmapped = self.mapper.unmapped_count()
         mapped = len(self.mapper.mapped_students)
         self.student_panel.update_counts(unmapped, mapped)
     
@@ -750,6 +909,8 @@ class ImageTaggerUI:
         """Start the application"""
         self._update_counts()
         self.root.mainloop()
+        # Let queued evidence frames reach disk before exiting
+        self.detection_processor.close()
 
 
 if __name__ == "__main__":
@@ -801,11 +801,9 @@ class ImageTaggerUI:
         if not res:
             return
         name, dept, roll = res
-        existing = self.mapper.get_student_by_roll(roll)
-        if existing and existing.roll != stu.roll:
+        if not self.mapper.update_student(stu, name, dept, roll):
             messagebox.showerror("Error", f"Roll number '{roll}' already exists.")
             return
-        stu.name, stu.department, stu.roll = name, dept, roll
         self._apply_unmapped_filter()
         self.status_bar.config(text=f"Updated student: {stu.name}")
 
@@ -816,7 +814,7 @@ class ImageTaggerUI:
             return
         stu = self.mapper.unmapped_students[idx]
         if messagebox.askyesno("Confirm Delete", f"Remove student '{stu.name}' ({stu.roll})?"):
-            self.mapper.unmapped_students.pop(idx)
+            self.mapper.remove_student(stu.roll)
             self._apply_unmapped_filter()
             self.status_bar.config(text=f"Removed student: {stu.name}")
             self._update_counts()
@@ -894,7 +892,7 @@ class ImageTaggerUI:
         self._apply_unmapped_filter()
 
     def _update_counts(self):
-        unmapped = len(self.mapper.unmapped_students)
+        unmapped = self.mapper.unmapped_count()
         mapped = len(self.mapper.mapped_students)
         try:
             self.counts_label.config(text=f"Unmapped: {unmapped} | Mapped: {mapped}")
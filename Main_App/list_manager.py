@@ -1,10 +1,21 @@
 import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_left, bisect_right
 
 class ListManager:
     """Encapsulates the two listboxes and helper functions for updating/getting selections."""
     def __init__(self, parent_frame):
         self.frame = parent_frame
         self.detection_mode = False  # Track if in detection mode
+        # Flagged rows in display order: sorted keys (-count, first_seen, roll) mirror the listbox rows
+        self._flagged_keys = []
+        self._flagged_rows = {}  # roll -> (key, display text)
+        self._flagged_seq = 0
+        # Unmapped list is virtualised: the listbox only holds the visible window of _unmapped
+        self._unmapped = []  # Student objects shown, in order
+        self._unmapped_top = 0  # index of the first row in the listbox
+        self._unmapped_sel = None  # selected index into _unmapped
+        self._row_height = None
         
         # Container for top section (will switch between unmapped and flagged)
         self.top_container = tk.Frame(self.frame, bg="white")
@@ -15,9 +26,16 @@ class ListManager:
         self.unmapped_label.pack(fill=tk.X)
         self.unmapped_scroll = tk.Scrollbar(self.top_container)
         self.unmapped_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.unmapped_listbox = tk.Listbox(self.top_container, width=40, height=10, yscrollcommand=self.unmapped_scroll.set, font=("Courier", 10))
+        self.unmapped_listbox = tk.Listbox(self.top_container, width=40, height=10, yscrollcommand=self._on_unmapped_yscroll, font=("Courier", 10))
         self.unmapped_listbox.pack(fill=tk.BOTH, expand=True, padx=(0,6))
-        self.unmapped_scroll.config(command=self.unmapped_listbox.yview)
+        self.unmapped_scroll.config(command=self._on_unmapped_scroll)
+        self.unmapped_listbox.bind("<Configure>", lambda e: self._render_unmapped())
+        self.unmapped_listbox.bind("<<ListboxSelect>>", self._on_unmapped_select)
+        self.unmapped_listbox.bind("<MouseWheel>", lambda e: self._on_unmapped_wheel(-1 if e.delta > 0 else 1))
+        self.unmapped_listbox.bind("<Button-4>", lambda e: self._on_unmapped_wheel(-1))
+        self.unmapped_listbox.bind("<Button-5>", lambda e: self._on_unmapped_wheel(1))
+        self.unmapped_listbox.bind("<Up>", lambda e: self._on_unmapped_key(-1))
+        self.unmapped_listbox.bind("<Down>", lambda e: self._on_unmapped_key(1))
 
         # Spacer
         self.spacer = tk.Frame(self.frame, height=6)
@@ -34,24 +52,119 @@ class ListManager:
 
     # Unmapped helpers
     def populate_unmapped(self, students):
-        """Replace entire unmapped listbox contents (students: iterable of Student)"""
-        self.unmapped_listbox.delete(0, tk.END)
-        for stu in students:
-            self.unmapped_listbox.insert(tk.END, f"{stu.name:20} | {stu.roll}")
+        """Replace entire unmapped list contents (students: iterable of Student)"""
+        self._unmapped = list(students)
+        self._unmapped_top = 0
+        self._unmapped_sel = None
+        self._render_unmapped()
 
     def get_selected_unmapped_index(self):
+        """Index of the selected student in the list last passed to populate_unmapped"""
         sel = self.unmapped_listbox.curselection()
-        return sel[0] if sel else None
+        if sel:
+            return self._unmapped_top + sel[0]
+        # Selected row scrolled out of the rendered window
+        idx = self._unmapped_sel
+        if idx is not None and not 0 <= idx - self._unmapped_top < self.unmapped_listbox.size():
+            return idx
+        return None
+
+    def get_selected_unmapped_student(self):
+        """Selected Student (the list may be filtered, so use this rather than an index into the roster)"""
+        idx = self.get_selected_unmapped_index()
+        return self._unmapped[idx] if idx is not None and idx < len(self._unmapped) else None
 
     def remove_unmapped_at(self, idx):
-        self.unmapped_listbox.delete(idx)
+        del self._unmapped[idx]
+        self._unmapped_sel = None
+        self._render_unmapped()
 
     def insert_unmapped_at_end(self, student):
-        self.unmapped_listbox.insert(tk.END, f"{student.name:20} | {student.roll}")
+        self._unmapped.append(student)
+        self._render_unmapped()
 
     def update_unmapped_item(self, idx, student):
-        self.unmapped_listbox.delete(idx)
-        self.unmapped_listbox.insert(idx, f"{student.name:20} | {student.roll}")
+        self._unmapped[idx] = student
+        self._render_unmapped()
+
+    def _unmapped_rows(self):
+        """Number of rows that fit in the unmapped listbox"""
+        lb = self.unmapped_listbox
+        height = lb.winfo_height()
+        if height <= 1:  # not laid out yet
+            return int(lb.cget("height"))
+        if self._row_height is None:
+            self._row_height = tkfont.Font(root=lb, font=lb.cget("font")).metrics("linespace") + 1
+        return max(1, -(-height // self._row_height))
+
+    def _render_unmapped(self):
+        """Fill the listbox with the rows from _unmapped_top and position the scrollbar"""
+        if self.detection_mode:
+            return
+        lb = self.unmapped_listbox
+        count = len(self._unmapped)
+        rows = self._unmapped_rows()
+        # The last row may be cut off, so the end of the list is reached with rows - 1 full rows
+        top = self._unmapped_top = max(0, min(self._unmapped_top, count - max(1, rows - 1)))
+        window = self._unmapped[top:top + rows]
+        
+        lb.delete(0, tk.END)
+        if window:
+            lb.insert(tk.END, *[f"{stu.name:20} | {stu.roll}" for stu in window])
+        lb.yview_moveto(0)
+        sel = self._unmapped_sel
+        if sel is not None and 0 <= sel - top < len(window):
+            lb.selection_set(sel - top)
+            lb.activate(sel - top)
+        if count:
+            self.unmapped_scroll.set(top / count, (top + len(window)) / count)
+        else:
+            self.unmapped_scroll.set(0.0, 1.0)
+
+    def _on_unmapped_yscroll(self, first, last):
+        # In detection mode the flagged rows are ordinary listbox rows
+        if self.detection_mode:
+            self.unmapped_scroll.set(first, last)
+
+    def _on_unmapped_scroll(self, *args):
+        """Scrollbar command: moveto fraction / scroll n units|pages"""
+        if self.detection_mode:
+            self.unmapped_listbox.yview(*args)
+            return
+        if args[0] == "moveto":
+            self._unmapped_top = int(round(float(args[1]) * len(self._unmapped)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= max(1, self._unmapped_rows() - 1)
+            self._unmapped_top += step
+        self._render_unmapped()
+
+    def _on_unmapped_wheel(self, direction):
+        if self.detection_mode:
+            return None
+        self._on_unmapped_scroll("scroll", direction * 3, "units")
+        return "break"
+
+    def _on_unmapped_select(self, _event=None):
+        sel = self.unmapped_listbox.curselection()
+        if sel and not self.detection_mode:
+            self._unmapped_sel = self._unmapped_top + sel[0]
+
+    def _on_unmapped_key(self, step):
+        """Up/Down move the selection through the whole list, scrolling the window as needed"""
+        if self.detection_mode or not self._unmapped:
+            return None
+        idx = self.get_selected_unmapped_index()
+        idx = 0 if idx is None else max(0, min(idx + step, len(self._unmapped) - 1))
+        self._unmapped_sel = idx
+        rows = self._unmapped_rows()
+        if idx < self._unmapped_top:
+            self._unmapped_top = idx
+        elif idx >= self._unmapped_top + rows - 1:
+            self._unmapped_top = idx - rows + 2
+        self._render_unmapped()
+        return "break"
 
     # Mapped helpers
     def populate_mapped(self, mapped_students, mapped_objects):
@@ -62,7 +175,7 @@ class ListManager:
                 self.mapped_listbox.insert(tk.END, f"{stu.name:20} | {stu.roll} → ({x},{y})")
 
     def clear_all(self):
-        self.unmapped_listbox.delete(0, tk.END)
+        self.populate_unmapped([])
         self.mapped_listbox.delete(0, tk.END)
 
     # New helpers for mapped selection and parsing
@@ -116,7 +229,7 @@ class ListManager:
         self.unmapped_label.config(text="🚨 Flagged Students", bg="#FFD700")
         
         # Clear and prepare for flagged students display
-        self.unmapped_listbox.delete(0, tk.END)
+        self._reset_flagged()
     
     def switch_to_normal_mode(self):
         """Switch back to normal mode - show Unmapped Students"""
@@ -129,11 +242,17 @@ class ListManager:
         self.unmapped_label.config(text="Unmapped Students", bg="lightblue")
         
         # Clear flagged students display
+        self._reset_flagged()
+    
+    def _reset_flagged(self):
         self.unmapped_listbox.delete(0, tk.END)
+        self._flagged_keys = []
+        self._flagged_rows = {}
+        self._flagged_seq = 0
     
     def update_flagged_students(self, flagged_data):
         """
-        Update flagged students display with frame counts
+        Replace the flagged students display with frame counts
         
         Args:
             flagged_data: Dictionary {roll: {'name': str, 'count': int}}
@@ -141,18 +260,44 @@ class ListManager:
         if not self.detection_mode:
             return
         
-        self.unmapped_listbox.delete(0, tk.END)
+        self._reset_flagged()
+        self.apply_flagged_changes(flagged_data)
+    
+    def apply_flagged_changes(self, changes):
+        """
+        Update only the flagged rows whose count changed; a changed row is moved to its
+        new rank (most frames first, ties in order of first flag), other rows are untouched
         
-        # Sort by count (descending) for visibility
-        sorted_students = sorted(
-            flagged_data.items(), 
-            key=lambda x: x[1]['count'], 
-            reverse=True
-        )
+        Args:
+            changes: Dictionary {roll: {'name': str, 'count': int}}; count 0 removes the row
+        """
+        if not self.detection_mode:
+            return
         
-        for roll, data in sorted_students:
-            name = data['name']
+        lb = self.unmapped_listbox
+        for roll, data in changes.items():
             count = data['count']
             # Display format: "Name | Roll | Frames: X"
-            display_text = f"{name[:18]:18} | {roll:12} | 🚩 {count}"
-            self.unmapped_listbox.insert(tk.END, display_text)
\ No newline at end of file
+            display_text = f"{data['name'][:18]:18} | {roll:12} | 🚩 {count}" if count else None
+            
+            row = self._flagged_rows.pop(roll, None)
+            if row is not None:
+                key, text = row
+                if text == display_text:
+                    self._flagged_rows[roll] = row
+                    continue
+                idx = bisect_left(self._flagged_keys, key)
+                del self._flagged_keys[idx]
+                lb.delete(idx)
+                seq = key[1]
+            else:
+                seq = self._flagged_seq
+                self._flagged_seq += 1
+            
+            if not count:
+                continue
+            key = (-count, seq, roll)
+            idx = bisect_right(self._flagged_keys, key)
+            self._flagged_keys.insert(idx, key)
+            lb.insert(idx, display_text)
+            self._flagged_rows[roll] = (key, display_text)
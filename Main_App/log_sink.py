@@ -0,0 +1,276 @@
+"""
+Log Sink Module
+Long-lived, batched writer for flagged-detection log rows (CSV, Arrow IPC or Parquet)
+"""
+
+import csv
+import threading
+from collections import Counter, deque
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pq = None
+
+
+LOG_COLUMNS = [
+    "timestamp", "frame_file", "source_info",
+    "student_name", "student_roll", "conf_score",
+    "bbox_center_x", "bbox_center_y"
+]
+
+FORMATS = ("csv", "arrow", "parquet")
+
+
+def _arrow_schema():
+    return pa.schema([
+        ("timestamp", pa.string()),
+        ("frame_file", pa.string()),
+        ("source_info", pa.string()),
+        ("student_name", pa.string()),
+        ("student_roll", pa.string()),
+        ("conf_score", pa.float64()),
+        ("bbox_center_x", pa.int64()),
+        ("bbox_center_y", pa.int64()),
+    ])
+
+
+class DetectionLogSink:
+    """
+    Buffers log rows and writes them in batches.
+    A batch is flushed when flush_rows rows are pending, when flush_seconds have
+    passed since the last flush (checked by a background timer), or on close().
+    Only the per-roll counts are held for the whole session; query() reads the session's
+    rows back from the file unless they all fit in the optional in-memory tail.
+    """
+
+    def __init__(self, path, fmt="csv", flush_rows=256, flush_seconds=2.0, keep_in_memory=False,
+                 memory_rows=10000):
+        """
+        Initialize log sink
+
+        Args:
+            path: Log file path; the suffix is replaced by .arrow/.parquet for binary formats
+            fmt: 'csv', 'arrow' (Arrow IPC stream) or 'parquet' (binary formats need pyarrow)
+            flush_rows: Pending rows that trigger a flush
+            flush_seconds: Maximum age of a pending row before the timer flushes it (None disables)
+            keep_in_memory: Also keep the last memory_rows rows so query() can skip the file
+                            while the session is short (needed to query an open parquet log)
+            memory_rows: Size of the in-memory tail
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown log format: {fmt}")
+        if fmt != "csv" and pa is None:
+            raise RuntimeError(f"pyarrow is required for the '{fmt}' log format")
+
+        self.fmt = fmt
+        self.path = Path(path)
+        if fmt != "csv":
+            self.path = self._fresh_path(self.path.with_suffix(f".{fmt}"))
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = flush_seconds
+        self.keep_in_memory = keep_in_memory
+
+        self._pending = []
+        self._records = deque(maxlen=max(1, int(memory_rows)))
+        self._session_offset = 0
+        self._roll_counts = Counter()
+        self._lock = threading.Lock()
+        self._file = None
+        self._csv = None
+        self._arrow_writer = None
+        self._closed = False
+        self.rows_written = 0
+        self.flushes = 0
+
+        self._open()
+
+        self._stop = threading.Event()
+        self._timer = None
+        if flush_seconds:
+            self._timer = threading.Thread(target=self._timer_loop, name="log-sink-flush", daemon=True)
+            self._timer.start()
+
+    @staticmethod
+    def _fresh_path(path):
+        """Binary formats cannot be appended across sessions; pick an unused file name"""
+        candidate = path
+        n = 1
+        while candidate.exists():
+            candidate = path.with_name(f"{path.stem}_{n}{path.suffix}")
+            n += 1
+        return candidate
+
+    def _open(self):
+        if self.fmt == "csv":
+            is_new = not self.path.exists()
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+            if is_new:
+                self._csv.writerow(LOG_COLUMNS)
+                self._file.flush()
+            # Earlier sessions appended to the same file are not part of query()
+            self._session_offset = self._file.tell()
+        elif self.fmt == "arrow":
+            self._file = pa.OSFile(str(self.path), "wb")
+            self._arrow_writer = pa.ipc.new_stream(self._file, _arrow_schema())
+        else:
+            self._arrow_writer = pq.ParquetWriter(str(self.path), _arrow_schema())
+
+    def _timer_loop(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def append(self, row):
+        """
+        Queue one log row
+
+        Args:
+            row: Sequence of values in LOG_COLUMNS order
+        """
+        row = (str(row[0]), str(row[1]), str(row[2]), str(row[3]), str(row[4]),
+               float(row[5]), int(row[6]), int(row[7]))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DetectionLogSink is closed")
+            self._pending.append(row)
+            if self.keep_in_memory:
+                self._records.append(row)
+            self._roll_counts[row[4]] += 1
+            due = len(self._pending) >= self.flush_rows
+        if due:
+            self.flush()
+
+    def extend(self, rows):
+        """Queue several rows"""
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """Write all pending rows"""
+        with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                if self.fmt == "csv":
+                    self._csv.writerows(batch)
+                    self._file.flush()
+                else:
+                    schema = _arrow_schema()
+                    table = pa.Table.from_arrays(
+                        [pa.array(col, type=field.type) for col, field in zip(zip(*batch), schema)],
+                        schema=schema
+                    )
+                    self._arrow_writer.write_table(table)
+                self.rows_written += len(batch)
+                self.flushes += 1
+            except Exception as ex:
+                # Keep the rows so the next flush retries them
+                self._pending = batch + self._pending
+                print(f"[ERROR] DetectionLogSink flush failed: {ex}")
+
+    def close(self):
+        """Flush remaining rows and close the file"""
+        if self._closed:
+            return
+        self._stop.set()
+        if self._timer:
+            self._timer.join()
+        self.flush()
+        with self._lock:
+            self._closed = True
+            if self._arrow_writer is not None:
+                self._arrow_writer.close()
+                self._arrow_writer = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ==================== Queries ====================
+
+    def query(self, roll=None, source_prefix=None, min_conf=None):
+        """
+        Filter this session's rows (pending rows are flushed first)
+
+        Args:
+            roll: Only rows for this student roll
+            source_prefix: Only rows whose source_info starts with this (e.g. 'sample' or a source name)
+            min_conf: Only rows with at least this confidence
+
+        Returns:
+            List of dicts keyed by LOG_COLUMNS
+        """
+        self.flush()
+        with self._lock:
+            if self.keep_in_memory and len(self._records) == sum(self._roll_counts.values()):
+                records = list(self._records)
+            else:
+                records = None
+        if records is None:
+            records = self._read_session()
+        out = []
+        for row in records:
+            if roll is not None and row[4] != str(roll):
+                continue
+            if source_prefix is not None and not row[2].startswith(source_prefix):
+                continue
+            if min_conf is not None and row[5] < min_conf:
+                continue
+            out.append(dict(zip(LOG_COLUMNS, row)))
+        return out
+
+    def _read_session(self):
+        """Yield this session's written rows from the log file"""
+        if self.fmt == "csv":
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                f.seek(self._session_offset)
+                for row in csv.reader(f):
+                    yield (row[0], row[1], row[2], row[3], row[4],
+                           float(row[5]), int(row[6]), int(row[7]))
+        elif self.fmt == "arrow":
+            with pa.OSFile(str(self.path), "rb") as f:
+                # The writer's end-of-stream marker is missing while open; the reader stops at EOF
+                for batch in pa.ipc.open_stream(f):
+                    yield from zip(*(col.to_pylist() for col in batch.columns))
+        else:
+            if not self._closed:
+                raise RuntimeError("An open parquet log can only be queried with keep_in_memory=True")
+            for batch in pq.ParquetFile(str(self.path)).iter_batches():
+                yield from zip(*(col.to_pylist() for col in batch.columns))
+
+    def counts_by_roll(self):
+        """
+        Returns:
+            Dictionary {roll: number of logged rows} for this session
+        """
+        with self._lock:
+            return dict(self._roll_counts)
+
+    def __len__(self):
+        return sum(self._roll_counts.values())
+
+
+def read_log(path):
+    """
+    Load a log written by DetectionLogSink (any format) as a list of dicts
+
+    Args:
+        path: .csv, .arrow or .parquet file
+    """
+    path = Path(path)
+    if path.suffix in (".arrow", ".parquet"):
+        if pa is None:
+            raise RuntimeError("pyarrow is required to read binary logs")
+        if path.suffix == ".parquet":
+            table = pq.read_table(str(path))
+        else:
+            with pa.OSFile(str(path), "rb") as f:
+                table = pa.ipc.open_stream(f).read_all()
+        return table.to_pylist()
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
@@ -0,0 +1,140 @@
+"""
+Motion Gate Module
+Cheap pre-filter that decides whether a frame needs a full detector pass
+"""
+
+import cv2
+
+
+class MotionGate:
+    """
+    Compares a downscaled grayscale copy of each frame against the last frame that was
+    sent to the detector. When less than area_thresh of the pixels changed, the frame is
+    skipped and the caller reuses the previous detections.
+    """
+
+    METHODS = ("diff", "mog2")
+
+    def __init__(self, method="diff", downscale_width=160, pixel_thresh=25, area_thresh=0.002,
+                 max_skip=50, blur_ksize=5, history=300):
+        """
+        Initialize motion gate
+
+        Args:
+            method: 'diff' (frame differencing) or 'mog2' (background subtraction)
+            downscale_width: Width of the analysis image; height keeps aspect ratio
+            pixel_thresh: Gray-level difference counted as change ('diff' only)
+            area_thresh: Fraction of changed pixels needed to run inference
+            max_skip: Force inference after this many consecutive skipped frames
+            blur_ksize: Gaussian blur kernel applied before comparing (0 disables)
+            history: Background model history length ('mog2' only)
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown motion gate method: {method}")
+
+        self.method = method
+        self.downscale_width = downscale_width
+        self.pixel_thresh = pixel_thresh
+        self.area_thresh = area_thresh
+        self.max_skip = max_skip
+        self.blur_ksize = blur_ksize
+
+        self._reference = None
+        self._since_infer = 0
+        self._subtractor = None
+        if method == "mog2":
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(history=history, detectShadows=True)
+
+        self.evaluated = 0
+        self.skipped = 0
+        self.last_motion = 0.0
+
+    def _prepare(self, frame_bgr):
+        """Downscale, convert to gray and blur"""
+        h, w = frame_bgr.shape[:2]
+        if w > self.downscale_width:
+            scale = self.downscale_width / w
+            frame_bgr = cv2.resize(frame_bgr, (self.downscale_width, max(1, int(h * scale))),
+                                   interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        if self.blur_ksize and self.blur_ksize > 1:
+            gray = cv2.GaussianBlur(gray, (self.blur_ksize, self.blur_ksize), 0)
+        return gray
+
+    def _motion_fraction(self, gray):
+        """Fraction of pixels considered moving"""
+        if self.method == "mog2":
+            mask = self._subtractor.apply(gray)
+            # 255 = foreground, 127 = shadow (ignored)
+            return cv2.countNonZero(cv2.compare(mask, 254, cv2.CMP_GT)) / mask.size
+
+        if self._reference is None or self._reference.shape != gray.shape:
+            return 1.0
+        diff = cv2.absdiff(gray, self._reference)
+        return cv2.countNonZero(cv2.compare(diff, self.pixel_thresh, cv2.CMP_GT)) / diff.size
+
+    def should_infer(self, frame_bgr):
+        """
+        Decide whether frame_bgr needs a detector pass
+
+        Returns:
+            True if the detector should run, False to reuse previous detections
+        """
+        self.evaluated += 1
+        gray = self._prepare(frame_bgr)
+        self.last_motion = self._motion_fraction(gray)
+
+        if (self._reference is None
+                or self.last_motion >= self.area_thresh
+                or self._since_infer >= self.max_skip):
+            # Compare against the last inferred frame so slow drift still adds up
+            self._reference = gray
+            self._since_infer = 0
+            return True
+
+        self._since_infer += 1
+        self.skipped += 1
+        return False
+
+    def reset(self):
+        """Forget the reference frame (e.g. after a seek)"""
+        self._reference = None
+        self._since_infer = 0
+
+    def stats(self):
+        """
+        Returns:
+            Dictionary {'evaluated': int, 'skipped': int, 'inferred': int, 'skip_ratio': float}
+        """
+        return {
+            "evaluated": self.evaluated,
+            "skipped": self.skipped,
+            "inferred": self.evaluated - self.skipped,
+            "skip_ratio": self.skipped / self.evaluated if self.evaluated else 0.0,
+        }
+
+
+def gate_for_source(config, src_name):
+    """
+    Build a MotionGate for one source from a gate config
+
+    Args:
+        config: None to disable gating, or a dict of MotionGate keyword arguments.
+                An optional 'per_source' entry maps source names to overrides;
+                an override of None disables gating for that source.
+        src_name: Source name as reported by PlaybackManager
+
+    Returns:
+        MotionGate or None
+    """
+    if config is None:
+        return None
+
+    params = {k: v for k, v in config.items() if k != "per_source"}
+    per_source = config.get("per_source") or {}
+    if src_name in per_source:
+        override = per_source[src_name]
+        if override is None:
+            return None
+        params.update(override)
+    return MotionGate(**params)
@@ -0,0 +1,152 @@
+"""
+ONNX Backend Module
+Runs an exported YOLOv8 .onnx model through onnxruntime.
+Does its own letterbox pre-processing and NMS so neither ultralytics nor torch is imported.
+"""
+
+import cv2
+import numpy as np
+
+from box_utils import xywh_to_xyxy, batched_nms
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+
+DEFAULT_IMGSZ = 640
+
+
+def letterbox(img, new_shape=(DEFAULT_IMGSZ, DEFAULT_IMGSZ), color=(114, 114, 114)):
+    """
+    Resize keeping aspect ratio and pad to new_shape (same scheme as ultralytics)
+
+    Args:
+        img: BGR image
+        new_shape: (height, width) of the network input
+        color: Padding colour
+
+    Returns:
+        Tuple of (padded_image, ratio, (pad_x, pad_y))
+    """
+    h, w = img.shape[:2]
+    new_h, new_w = new_shape
+    r = min(new_h / h, new_w / w)
+    resized_w, resized_h = int(round(w * r)), int(round(h * r))
+
+    pad_x = (new_w - resized_w) / 2
+    pad_y = (new_h - resized_h) / 2
+
+    if (w, h) != (resized_w, resized_h):
+        img = cv2.resize(img, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img, r, (left, top)
+
+
+class OnnxBackend:
+    """
+    onnxruntime inference for YOLOv8 exports (output layout (B, 4 + num_classes, anchors)).
+    predict() returns one (N, 6) float32 array [x1, y1, x2, y2, conf, cls] per frame,
+    in original frame coordinates.
+    """
+
+    def __init__(self, model_path, device=None, iou_thresh=0.45, max_det=300, num_threads=None):
+        """
+        Args:
+            model_path: Path to the .onnx file
+            device: 'cuda' to prefer the CUDA provider, anything else runs on CPU
+            iou_thresh: NMS IoU threshold
+            max_det: Maximum detections kept per frame
+            num_threads: intra-op thread count (None lets onnxruntime decide)
+        """
+        if ort is None:
+            raise RuntimeError("onnxruntime package not installed. Install onnxruntime to run .onnx models.")
+
+        self.model_path = str(model_path)
+        self.iou_thresh = iou_thresh
+        self.max_det = max_det
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            opts.intra_op_num_threads = int(num_threads)
+
+        providers = ["CPUExecutionProvider"]
+        if device and str(device).startswith("cuda") and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.session = ort.InferenceSession(self.model_path, sess_options=opts, providers=providers)
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.input_dtype = np.float16 if "float16" in inp.type else np.float32
+
+        # Static dims are ints; dynamic ones come back as strings or None
+        shape = list(inp.shape)
+        self.dynamic_batch = not isinstance(shape[0], int)
+        h = shape[2] if isinstance(shape[2], int) else DEFAULT_IMGSZ
+        w = shape[3] if isinstance(shape[3], int) else DEFAULT_IMGSZ
+        self.imgsz = (h, w)
+
+    def predict(self, frames, conf_thresh=0.25):
+        """
+        Run detection on a list of BGR frames
+
+        Returns:
+            List of (N, 6) float32 arrays, one per frame
+        """
+        if not frames:
+            return []
+
+        prepped = [letterbox(f, self.imgsz) for f in frames]
+        blob = cv2.dnn.blobFromImages(
+            [p[0] for p in prepped], scalefactor=1.0 / 255.0, swapRB=True
+        ).astype(self.input_dtype, copy=False)
+
+        # Fixed-batch exports (the ultralytics default) have to be fed one frame at a time
+        if self.dynamic_batch or len(frames) == 1:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            outputs = np.concatenate(
+                [self.session.run(None, {self.input_name: blob[i:i + 1]})[0] for i in range(len(frames))]
+            )
+
+        results = []
+        for i, frame in enumerate(frames):
+            _, r, pad = prepped[i]
+            results.append(self._postprocess(outputs[i], r, pad, frame.shape[:2], conf_thresh))
+        return results
+
+    def _postprocess(self, pred, ratio, pad, frame_shape, conf_thresh):
+        """Decode one (4 + nc, anchors) prediction into frame-space detections"""
+        pred = np.asarray(pred, dtype=np.float32).T  # (anchors, 4 + nc)
+        class_scores = pred[:, 4:]
+        if class_scores.shape[1] == 0:
+            return np.empty((0, 6), dtype=np.float32)
+
+        cls = class_scores.argmax(axis=1)
+        conf = class_scores[np.arange(len(cls)), cls]
+        mask = conf >= conf_thresh
+        if not mask.any():
+            return np.empty((0, 6), dtype=np.float32)
+
+        boxes = xywh_to_xyxy(pred[mask, :4])
+        conf = conf[mask]
+        cls = cls[mask]
+
+        keep = batched_nms(boxes, conf, cls, self.iou_thresh)[:self.max_det]
+        boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+        # Undo letterbox and clip to the frame
+        boxes[:, [0, 2]] -= pad[0]
+        boxes[:, [1, 3]] -= pad[1]
+        boxes /= ratio
+        h, w = frame_shape
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, w)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, h)
+
+        return np.column_stack([boxes, conf, cls.astype(np.float32)]).astype(np.float32, copy=False)
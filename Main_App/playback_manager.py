@@ -1,34 +1,226 @@
 """
 Playback Manager Module
-Handles video/camera playback in a separate thread
+Handles video/camera playback as a two-stage pipeline:
+a decoder thread feeds a bounded ring buffer, an inference thread drains it
 """
 
 import threading
 import time
 import queue
+from collections import deque
 import cv2
 from pathlib import Path
 
+from motion_gate import gate_for_source
+from region_inference import detect_in_regions
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+# Decoder pacing: "default" sleeps half a frame per frame (interactive UI),
+# "realtime" holds the source frame rate, "max" never sleeps
+PACING_MODES = ("default", "realtime", "max")
+
+
+class FrameRingBuffer:
+    """
+    Bounded FIFO between the decoder and inference stages.
+    When full, the oldest frame is overwritten so the decoder never blocks,
+    unless the buffer is blocking, in which case put() waits for space (backpressure).
+    """
+    
+    def __init__(self, capacity=8, blocking=False):
+        """
+        Args:
+            capacity: Maximum number of decoded frames held at once
+            blocking: Wait for space instead of overwriting the oldest frame (lossless)
+        """
+        self.capacity = max(1, int(capacity))
+        self.blocking = blocking
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+    
+    def put(self, item):
+        """
+        Append a frame, evicting the oldest one if the buffer is full
+        (blocking buffers wait for space instead)
+        
+        Returns:
+            False if the buffer was closed before the frame could be added
+        """
+        with self._cond:
+            if self.blocking:
+                while len(self._items) >= self.capacity and not self._closed:
+                    self._cond.wait()
+            if self._closed:
+                return False
+            if len(self._items) >= self.capacity:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+    
+    def get(self, timeout=None):
+        """
+        Pop the oldest frame, waiting up to timeout seconds
+        
+        Returns:
+            The item, or None on timeout / when closed and drained
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                item = self._items.popleft()
+                self._cond.notify_all()  # wake a blocked put()
+                return item
+            return None
+    
+    def get_batch(self, max_items, timeout=None, max_wait=0.0):
+        """
+        Pop up to max_items frames. Waits up to timeout seconds for the first frame,
+        then up to max_wait seconds more for the batch to fill.
+        
+        Returns:
+            List of items (empty on timeout / when closed and drained)
+        """
+        first = self.get(timeout)
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + max(0.0, max_wait)
+        with self._cond:
+            while len(batch) < max_items:
+                if self._items:
+                    batch.append(self._items.popleft())
+                    self._cond.notify_all()
+                    continue
+                remaining = deadline - time.perf_counter()
+                if self._closed or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return batch
+    
+    def close(self):
+        """Mark end of stream; consumers drain what is left then get None"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+    
+    def is_drained(self):
+        """True once the buffer is closed and empty"""
+        with self._cond:
+            return self._closed and not self._items
+    
+    def clear(self):
+        """Drop all buffered frames"""
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+    
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage"""
+    
+    def __init__(self, name, window_seconds=2.0):
+        """
+        Args:
+            name: Stage name used in reports
+            window_seconds: Sliding window used for the recent FPS figure
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self.frames = 0
+            self.busy_seconds = 0.0
+            self._stamps = deque()
+    
+    def record(self, busy_seconds, frames=1):
+        """
+        Record work done by the stage
+        
+        Args:
+            busy_seconds: Time spent doing the work (excludes waiting)
+            frames: Number of frames the work covered
+        """
+        now = time.perf_counter()
+        with self._lock:
+            self.frames += frames
+            self.busy_seconds += busy_seconds
+            self._stamps.append((now, frames))
+            while self._stamps and now - self._stamps[0][0] > self.window_seconds:
+                self._stamps.popleft()
+    
+    def snapshot(self):
+        """
+        Returns:
+            Dictionary with frames, fps (observed, recent window) and
+            capacity_fps (frames per busy second, i.e. what the stage could sustain alone)
+        """
+        now = time.perf_counter()
+        with self._lock:
+            while self._stamps and now - self._stamps[0][0] > self.window_seconds:
+                self._stamps.popleft()
+            recent = sum(n for _, n in self._stamps)
+            span = (now - self._stamps[0][0]) if self._stamps else 0.0
+            fps = recent / span if span > 0 else 0.0
+            capacity = self.frames / self.busy_seconds if self.busy_seconds > 0 else 0.0
+            return {
+                "frames": self.frames,
+                "fps": fps,
+                "capacity_fps": capacity,
+            }
+
 
 class PlaybackManager:
     """Manages video/camera playback and frame queue"""
     
-    def __init__(self, frame_queue_size=4):
+    def __init__(self, frame_queue_size=4, decode_buffer_size=8):
         """
         Initialize playback manager
         
         Args:
             frame_queue_size: Maximum size of frame queue
+            decode_buffer_size: Capacity of the ring buffer between decoder and inference
         """
         self.playback_thread = None
+        self.inference_thread = None
         self.playback_stop = threading.Event()
         self.playback_pause = threading.Event()
         self.frame_queue = queue.Queue(maxsize=frame_queue_size)
+        self.decode_buffer = FrameRingBuffer(decode_buffer_size)
+        
+        self.decode_stats = StageStats("decode")
+        self.inference_stats = StageStats("inference")
+        
+        self.motion_gates = {}  # src_name -> MotionGate
         
         self.source_path = None
         self.is_running = False
+        self.lossless = False
+        self.source_fps = 0.0  # FPS of the source being decoded
+        self.queue_dropped = 0  # frames discarded because frame_queue was full
+        self._started_at = None
+        self._finished_at = None
+        
+        # Newest decoded frame for display, independent of inference progress
+        self._latest_lock = threading.Lock()
+        self._latest = None  # (frame, src_name, frame_idx, seq)
+        self._latest_seq = 0
     
-    def start_playback(self, source_type, source_path, detector=None, conf_thresh=0.3):
+    def start_playback(self, source_type, source_path, detector=None, conf_thresh=0.3,
+                       batch_size=1, batch_timeout_ms=0, motion_gate=None, region_planner=None,
+                       pacing="default", lossless=False):
         """
         Start playback from source
         
@@ -37,7 +229,21 @@ class PlaybackManager:
             source_path: Path to source or camera index
             detector: CheatDetector instance for running detection
             conf_thresh: Confidence threshold for detection
+            batch_size: Micro-batch size; >1 collects up to N frames per detect_batch call
+            batch_timeout_ms: Longest wait (ms) for a micro-batch to fill before running it
+            motion_gate: None, or MotionGate settings (see motion_gate.gate_for_source);
+                         static frames then reuse the previous detections
+            region_planner: Optional planner (e.g. region_inference.SeatRoiPlanner); detection
+                            then runs on its crops only and boxes are mapped back to the frame
+            pacing: Decoder pacing, one of PACING_MODES
+            lossless: Offline mode for recorded files: no frame is ever dropped; a full buffer or
+                      frame_queue blocks the stage feeding it instead. The decoder is unpaced
+                      unless pacing is 'realtime', so throughput is bounded by compute and by how
+                      fast frame_queue is consumed.
         """
+        if pacing not in PACING_MODES:
+            raise ValueError(f"Unknown pacing '{pacing}', expected one of {PACING_MODES}")
+        
         if self.playback_thread and self.playback_thread.is_alive():
             # Already running, just resume
             self.playback_pause.clear()
@@ -47,14 +253,35 @@ class PlaybackManager:
         self.playback_stop.clear()
         self.playback_pause.clear()
         self.source_path = source_path
+        self.lossless = lossless
+        if lossless and pacing == "default":
+            pacing = "max"
+        self.decode_buffer = FrameRingBuffer(self.decode_buffer.capacity, blocking=lossless)
+        self.decode_stats.reset()
+        self.inference_stats.reset()
+        self.motion_gates = {}
+        self.source_fps = 0.0
+        self.queue_dropped = 0
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+        with self._latest_lock:
+            self._latest = None
         
-        # Start worker thread
+        # Stage 1: decoder
         self.playback_thread = threading.Thread(
             target=self._playback_worker,
-            args=(source_type, source_path, detector, conf_thresh),
+            args=(source_type, source_path, self.decode_buffer, pacing),
+            daemon=True
+        )
+        # Stage 2: inference
+        self.inference_thread = threading.Thread(
+            target=self._inference_worker,
+            args=(self.decode_buffer, detector, conf_thresh, batch_size, batch_timeout_ms,
+                  motion_gate, region_planner),
             daemon=True
         )
         self.playback_thread.start()
+        self.inference_thread.start()
         self.is_running = True
         return True
     
@@ -77,6 +304,7 @@ class PlaybackManager:
         
         self.playback_stop.set()
         self.playback_pause.clear()
+        self.decode_buffer.close()
         self.is_running = False
     
     def terminate_playback(self):
@@ -84,16 +312,23 @@ class PlaybackManager:
         if self.playback_thread and self.playback_thread.is_alive():
             self.playback_stop.set()
             self.playback_pause.clear()
+        self.decode_buffer.close()
+        self.decode_buffer.clear()
         self.is_running = False
     
-    def get_frame(self):
+    def get_frame(self, timeout=None):
         """
-        Get next frame from queue (non-blocking)
+        Get next frame from queue
+        
+        Args:
+            timeout: None for non-blocking, otherwise seconds to wait for a frame
         
         Returns:
             Tuple of (frame, src_name, frame_idx, detections) or None
         """
         try:
+            if timeout is not None:
+                return self.frame_queue.get(timeout=timeout)
             if not self.frame_queue.empty():
                 return self.frame_queue.get_nowait()
         except queue.Empty:
@@ -108,76 +343,121 @@ class PlaybackManager:
             except queue.Empty:
                 break
     
-    def _playback_worker(self, source_type, source_path, detector, conf_thresh):
+    def get_latest_frame(self):
+        """
+        Newest decoded frame, whether or not inference has reached it (for display)
+        
+        Returns:
+            Tuple of (frame, src_name, frame_idx, seq) or None; seq increases with every
+            decoded frame so callers can skip frames they already showed
+        """
+        with self._latest_lock:
+            return self._latest
+    
+    def is_finished(self):
+        """True once both pipeline threads have exited (the frame queue may still hold frames)"""
+        threads = (self.playback_thread, self.inference_thread)
+        return all(t is None or not t.is_alive() for t in threads)
+    
+    def get_stats(self):
         """
-        Worker thread: reads frames and runs detection
+        Per-stage throughput report
+        
+        Returns:
+            Dictionary {'decode': {...}, 'inference': {...}, 'buffered': int, 'dropped': int,
+                        'queue_dropped': int, 'source_fps': float, 'effective_fps': float,
+                        'speed': float, 'motion': {src_name: {...}}, 'skipped_inferences': int}
+            effective_fps is frames through inference per wall-clock second since start;
+            speed is effective_fps / source_fps (1.0 = real time)
+        """
+        gates = {src: gate for src, gate in list(self.motion_gates.items()) if gate is not None}
+        inference = self.inference_stats.snapshot()
+        effective = 0.0
+        if self._started_at is not None:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+            effective = inference["frames"] / elapsed if elapsed > 0 else 0.0
+        return {
+            "decode": self.decode_stats.snapshot(),
+            "inference": inference,
+            "buffered": len(self.decode_buffer),
+            "dropped": self.decode_buffer.dropped,
+            "queue_dropped": self.queue_dropped,
+            "source_fps": self.source_fps,
+            "effective_fps": effective,
+            "speed": effective / self.source_fps if self.source_fps else 0.0,
+            "motion": {src: gate.stats() for src, gate in gates.items()},
+            "skipped_inferences": sum(gate.skipped for gate in gates.values()),
+        }
+    
+    def _playback_worker(self, source_type, source_path, ring, pacing="default"):
+        """
+        Decoder stage: reads frames and pushes them into the ring buffer
         
         Args:
             source_type: Type of source
             source_path: Path to source
-            detector: CheatDetector instance
-            conf_thresh: Confidence threshold
+            ring: FrameRingBuffer shared with the inference stage
+            pacing: One of PACING_MODES
         """
-        cap = None
         files_iter = []
         
-        # Prepare capture objects based on source type
+        # (source name, VideoCapture argument); captures are opened one at a time below
         if source_type == "video_file":
-            cap = cv2.VideoCapture(str(source_path))
-            files_iter = [(str(source_path), cap)]
+            files_iter = [(str(source_path), str(source_path))]
         elif source_type == "video_folder":
-            p = Path(source_path)
-            vids = [x for x in p.iterdir() if x.suffix.lower() in [".mp4", ".avi", ".mov", ".mkv"]]
+            vids = list_videos(source_path)
             if not vids:
+                ring.close()
                 return
-            files_iter = [(str(v), cv2.VideoCapture(str(v))) for v in vids]
+            files_iter = [(str(v), str(v)) for v in vids]
         elif source_type == "camera":
-            cap = cv2.VideoCapture(int(source_path))
-            files_iter = [("camera", cap)]
+            files_iter = [("camera", int(source_path))]
         else:
+            ring.close()
             return
         
         # Process each video source
-        for src_name, cap_obj in files_iter:
+        for src_name, cap_arg in files_iter:
             if self.playback_stop.is_set():
                 break
             
-            cap = cap_obj
+            cap = cv2.VideoCapture(cap_arg)
             fps = cap.get(cv2.CAP_PROP_FPS) or 25
+            self.source_fps = fps
             delay = 1.0 / fps
             frame_idx = 0
+            next_due = time.perf_counter()
             
             while cap.isOpened() and not self.playback_stop.is_set():
                 # Handle pause
                 if self.playback_pause.is_set():
                     time.sleep(0.15)
+                    next_due = time.perf_counter()
                     continue
                 
                 # Read frame
+                t0 = time.perf_counter()
                 ret, frame = cap.read()
                 if not ret:
                     break
+                self.decode_stats.record(time.perf_counter() - t0)
                 
                 frame_idx += 1
-                
-                # Run detection if detector provided
-                detections = []
-                if detector:
-                    try:
-                        detections = detector.detect_frame(frame, conf_thresh=conf_thresh)
-                    except Exception as e:
-                        print(f"Detection error: {e}")
-                        detections = []
-                
-                # Push frame to queue (non-blocking)
-                try:
-                    if not self.frame_queue.full():
-                        self.frame_queue.put((frame.copy(), src_name, frame_idx, detections))
-                except Exception as e:
-                    print(f"Queue error: {e}")
+                with self._latest_lock:
+                    self._latest_seq += 1
+                    self._latest = (frame, src_name, frame_idx, self._latest_seq)
+                if not ring.put((frame, src_name, frame_idx)):
+                    break
                 
                 # Pacing to match video FPS
-                time.sleep(max(0.001, delay * 0.5))
+                if pacing == "default":
+                    time.sleep(max(0.001, delay * 0.5))
+                elif pacing == "realtime":
+                    # Frame deadlines; a late decoder catches up without building a backlog
+                    next_due = max(next_due + delay, time.perf_counter() - delay)
+                    wait = next_due - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
             
             # Release per-file capture
             try:
@@ -188,9 +468,115 @@ class PlaybackManager:
             if self.playback_stop.is_set():
                 break
         
+        ring.close()
+    
+    def _inference_worker(self, ring, detector, conf_thresh, batch_size=1, batch_timeout_ms=0,
+                          motion_gate=None, region_planner=None):
+        """
+        Inference stage: drains the ring buffer, runs detection and feeds frame_queue
+        
+        Args:
+            ring: FrameRingBuffer filled by the decoder stage
+            detector: CheatDetector instance
+            conf_thresh: Confidence threshold
+            batch_size: Maximum frames per detection call
+            batch_timeout_ms: Longest wait (ms) for a batch to fill
+            motion_gate: MotionGate settings, or None to run the detector on every frame
+            region_planner: Planner whose regions_for(shape) gives the crops to run on
+        """
+        batch_size = max(1, int(batch_size))
+        use_batch = batch_size > 1 and hasattr(detector, "detect_batch")
+        last_detections = {}  # src_name -> detections of the last inferred frame
+        
+        while not self.playback_stop.is_set():
+            items = ring.get_batch(
+                batch_size if use_batch else 1,
+                timeout=0.1,
+                max_wait=batch_timeout_ms / 1000.0
+            )
+            if not items:
+                if ring.is_drained():
+                    break
+                continue
+            
+            t0 = time.perf_counter()
+            
+            # Motion gate: decide per frame whether the detector has to run
+            needs_inference = [True] * len(items)
+            if detector and motion_gate is not None:
+                for i, (frame, src_name, _) in enumerate(items):
+                    if src_name not in self.motion_gates:
+                        self.motion_gates[src_name] = gate_for_source(motion_gate, src_name)
+                    gate = self.motion_gates[src_name]
+                    if gate is not None:
+                        needs_inference[i] = gate.should_infer(frame)
+            
+            to_run = [items[i][0] for i, need in enumerate(needs_inference) if need]
+            
+            # Run detection if detector provided
+            inferred = [[] for _ in to_run]
+            if detector and to_run:
+                try:
+                    if region_planner is not None and hasattr(detector, "detect_batch"):
+                        inferred = detect_in_regions(detector, to_run, region_planner, conf_thresh)
+                    elif use_batch:
+                        inferred = detector.detect_batch(to_run, conf_thresh=conf_thresh)
+                    else:
+                        inferred = [detector.detect_frame(f, conf_thresh=conf_thresh) for f in to_run]
+                except Exception as e:
+                    print(f"Detection error: {e}")
+                    inferred = [[] for _ in to_run]
+            
+            # Reassemble in frame order; skipped frames reuse the previous detections
+            results = []
+            inferred_iter = iter(inferred)
+            for (frame, src_name, _), need in zip(items, needs_inference):
+                if need:
+                    detections = next(inferred_iter, [])
+                    last_detections[src_name] = detections
+                else:
+                    detections = last_detections.get(src_name, [])
+                results.append(detections)
+            
+            self.inference_stats.record(time.perf_counter() - t0, frames=len(items))
+            
+            # Push frames to queue (non-blocking; lossless mode waits for the consumer)
+            for (frame, src_name, frame_idx), detections in zip(items, results):
+                item = (frame, src_name, frame_idx, detections)
+                if self.lossless:
+                    while not self.playback_stop.is_set():
+                        try:
+                            self.frame_queue.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                elif self.frame_queue.full():
+                    self.queue_dropped += 1
+                else:
+                    try:
+                        self.frame_queue.put_nowait(item)
+                    except queue.Full:
+                        self.queue_dropped += 1
+        
+        self._finished_at = time.perf_counter()
+        stats = self.get_stats()
+        print(
+            f"[INFO] Playback finished: decode {stats['decode']['capacity_fps']:.1f} FPS, "
+            f"inference {stats['inference']['capacity_fps']:.1f} FPS, "
+            f"effective {stats['effective_fps']:.1f} FPS vs source {stats['source_fps']:.1f} FPS "
+            f"({stats['speed']:.2f}x real time), "
+            f"{stats['dropped']} frame(s) overwritten in decode buffer, "
+            f"{stats['queue_dropped']} dropped at the output queue, "
+            f"{stats['skipped_inferences']} inference(s) skipped by motion gate"
+        )
         self.is_running = False
 
 
+def list_videos(folder):
+    """Video files directly inside folder, sorted by name"""
+    return sorted(x for x in Path(folder).iterdir() if x.suffix.lower() in VIDEO_EXTENSIONS)
+
+
 class FrameSampler:
     """Helper class for sampling single frames from various sources"""
     
@@ -0,0 +1,172 @@
+"""
+Region Inference Module
+Runs the detector on crops of a frame instead of the whole frame and maps
+the boxes back into full-frame coordinates
+"""
+
+import numpy as np
+
+from box_utils import nms
+from detections import Detections
+
+
+class SeatRoiPlanner:
+    """
+    Derives crop regions around clusters of mapped seats.
+    Seats are grouped greedily so each padded cluster fits inside max_region pixels.
+    """
+
+    def __init__(self, seat_points, padding=160, max_region=960):
+        """
+        Args:
+            seat_points: Iterable of (x, y) seat positions in frame coordinates
+            padding: Pixels added around each cluster (covers the student's body and desk)
+            max_region: Largest crop side; bigger clusters are split
+        """
+        self.seat_points = [(float(x), float(y)) for x, y in seat_points]
+        self.padding = int(padding)
+        self.max_region = int(max(max_region, 2 * padding + 1))
+        self._clusters = self._cluster_seats()
+        self._cache = {}  # frame shape -> regions
+
+    @classmethod
+    def from_mapper(cls, mapper, **kwargs):
+        """Snapshot the mapper's current seat positions"""
+        return cls(list(mapper.mapped_students.values()), **kwargs)
+
+    def _cluster_seats(self):
+        """Greedy row-major clustering; returns list of [x1, y1, x2, y2] seat bounds"""
+        span = self.max_region - 2 * self.padding
+        clusters = []
+        for x, y in sorted(self.seat_points, key=lambda p: (p[1], p[0])):
+            for c in clusters:
+                nx1, ny1 = min(c[0], x), min(c[1], y)
+                nx2, ny2 = max(c[2], x), max(c[3], y)
+                if nx2 - nx1 <= span and ny2 - ny1 <= span:
+                    c[:] = [nx1, ny1, nx2, ny2]
+                    break
+            else:
+                clusters.append([x, y, x, y])
+        return clusters
+
+    def regions_for(self, frame_shape):
+        """
+        Crop regions for a frame of the given shape
+
+        Returns:
+            List of (x1, y1, x2, y2) integer regions (empty if no seats are mapped)
+        """
+        h, w = frame_shape[:2]
+        key = (h, w)
+        if key not in self._cache:
+            regions = []
+            for cx1, cy1, cx2, cy2 in self._clusters:
+                x1 = max(0, int(cx1) - self.padding)
+                y1 = max(0, int(cy1) - self.padding)
+                x2 = min(w, int(cx2) + self.padding)
+                y2 = min(h, int(cy2) + self.padding)
+                if x2 > x1 and y2 > y1:
+                    regions.append((x1, y1, x2, y2))
+            self._cache[key] = regions
+        return self._cache[key]
+
+    def pixel_ratio(self, frame_shape):
+        """Fraction of the frame's pixels covered by the crops (overlaps counted twice)"""
+        h, w = frame_shape[:2]
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in self.regions_for(frame_shape))
+        return area / float(w * h) if w and h else 0.0
+
+
+class TilePlanner:
+    """
+    SAHI-style tiling: overlapping fixed-size tiles covering the whole frame,
+    optionally plus the full frame itself so large boxes are still found.
+    """
+
+    merge_metric = "ios"
+
+    def __init__(self, tile_size=640, overlap=0.2, include_full_frame=True):
+        """
+        Args:
+            tile_size: Tile side in pixels (use the model input size for 1:1 pixels)
+            overlap: Fraction of the tile shared with its neighbour
+            include_full_frame: Also run the downscaled full frame
+        """
+        self.tile_size = int(tile_size)
+        self.overlap = min(max(float(overlap), 0.0), 0.9)
+        self.include_full_frame = include_full_frame
+        self._cache = {}
+
+    @staticmethod
+    def _starts(length, tile, stride):
+        """Tile start offsets along one axis; the last tile is aligned to the edge"""
+        if length <= tile:
+            return [0]
+        starts = list(range(0, length - tile, stride))
+        starts.append(length - tile)
+        return starts
+
+    def regions_for(self, frame_shape):
+        """
+        Returns:
+            List of (x1, y1, x2, y2) tiles for a frame of the given shape
+        """
+        h, w = frame_shape[:2]
+        key = (h, w)
+        if key not in self._cache:
+            stride = max(1, int(self.tile_size * (1.0 - self.overlap)))
+            regions = [
+                (x, y, min(w, x + self.tile_size), min(h, y + self.tile_size))
+                for y in self._starts(h, self.tile_size, stride)
+                for x in self._starts(w, self.tile_size, stride)
+            ]
+            if self.include_full_frame and len(regions) > 1:
+                regions.append((0, 0, w, h))
+            self._cache[key] = regions
+        return self._cache[key]
+
+
+def merge_region_detections(detections, iou_thresh=0.5, metric="iou"):
+    """NMS over detections gathered from overlapping regions (Detections or list of dicts)"""
+    detections = Detections.coerce(detections)
+    if len(detections) < 2:
+        return detections
+    keep = nms(detections.boxes, detections.conf, iou_thresh, metric=metric)
+    return detections[keep]
+
+
+def detect_in_regions(detector, frames, planner, conf_thresh=0.3, iou_thresh=0.5):
+    """
+    Run the detector on the planner's regions of every frame in a single detect_batch call
+
+    Args:
+        detector: CheatDetector (or anything with detect_batch)
+        frames: List of BGR frames
+        planner: Object with regions_for(frame_shape) and optionally a merge_metric
+        conf_thresh: Confidence threshold
+        iou_thresh: Overlap used to merge boxes from overlapping regions
+
+    Returns:
+        One Detections (full-frame coordinates) per frame
+    """
+    crops = []
+    owners = []  # (frame index, x offset, y offset) per crop
+    for i, frame in enumerate(frames):
+        regions = planner.regions_for(frame.shape)
+        if not regions:
+            # Nothing to crop around: fall back to the whole frame
+            regions = [(0, 0, frame.shape[1], frame.shape[0])]
+        for x1, y1, x2, y2 in regions:
+            crops.append(np.ascontiguousarray(frame[y1:y2, x1:x2]))
+            owners.append((i, x1, y1))
+
+    per_crop = detector.detect_batch(crops, conf_thresh=conf_thresh) if crops else []
+
+    per_frame = [[] for _ in frames]
+    for (i, ox, oy), dets in zip(owners, per_crop):
+        dets = Detections.coerce(dets)
+        if dets:
+            per_frame[i].append(dets.shifted(ox, oy))
+
+    metric = getattr(planner, "merge_metric", "iou")
+    return [merge_region_detections(Detections.concatenate(parts), iou_thresh, metric) for parts in per_frame]
@@ -0,0 +1,138 @@
+"""
+Roster Index Module
+Roll lookup and substring search over a student roster
+"""
+
+
+def _trigrams(text):
+    """Character triples of text (tuples hash faster to build than 3-char slices)"""
+    return set(zip(text, text[1:], text[2:]))
+
+
+class RosterIndex:
+    """
+    Students in insertion order with a roll -> student hash index and a trigram index over the
+    lower-cased name, roll and department. A search reads the posting list of the query's rarest
+    trigram and verifies those students only; a query that extends the previous one only
+    re-checks the previous matches. Removed or edited students leave stale ids in the posting
+    lists; they are skipped by the verification and compacted away once they pile up.
+    """
+
+    def __init__(self, students=()):
+        self._ids = {}       # roll -> id
+        self._students = {}  # id -> Student, insertion order
+        self._text = {}      # id -> "name\0roll\0department", lower-cased
+        self._grams = {}     # trigram -> [ids]
+        self._next_id = 0
+        self._stale = 0
+        self._last = None    # (query, matching ids) of the last search
+        for student in students:
+            self.add(student)
+
+    def __len__(self):
+        return len(self._students)
+
+    def __contains__(self, roll):
+        return roll in self._ids
+
+    def __iter__(self):
+        return iter(self._students.values())
+
+    def get(self, roll, default=None):
+        sid = self._ids.get(roll)
+        return default if sid is None else self._students[sid]
+
+    def add(self, student):
+        """Append a student; returns False (and changes nothing) if the roll is already indexed"""
+        if student.roll in self._ids:
+            return False
+        sid = self._next_id
+        self._next_id += 1
+        self._ids[student.roll] = sid
+        self._students[sid] = student
+        self._index(sid, student)
+        return True
+
+    def remove(self, roll):
+        """Remove a student by roll; returns the Student, or None if the roll is not indexed"""
+        sid = self._ids.pop(roll, None)
+        if sid is None:
+            return None
+        del self._text[sid]
+        self._stale += 1
+        self._last = None
+        self._maybe_compact()
+        return self._students.pop(sid)
+
+    def update(self, old_roll, student):
+        """
+        Re-index a student whose name, department or roll changed (keeps its position)
+
+        Returns:
+            False if old_roll is not indexed
+        """
+        sid = self._ids.pop(old_roll, None)
+        if sid is None:
+            return False
+        self._ids[student.roll] = sid
+        self._students[sid] = student
+        self._stale += 1
+        self._index(sid, student)
+        self._maybe_compact()
+        return True
+
+    def clear(self):
+        self.__init__()
+
+    def search(self, query, limit=None):
+        """
+        Students whose name, roll or department contains query (case-insensitive), in roster order
+
+        Args:
+            query: Search text; empty returns every student
+            limit: Maximum number of results (None = all)
+        """
+        query = query.strip().lower()
+        if not query:
+            students = list(self._students.values())
+            return students if limit is None else students[:limit]
+
+        if self._last is not None and query.startswith(self._last[0]):
+            candidates = self._last[1]
+        elif len(query) >= 3:
+            postings = [self._grams.get(gram, ()) for gram in _trigrams(query)]
+            candidates = sorted(set(min(postings, key=len)))
+        else:
+            candidates = self._text.keys()
+
+        # The separator cannot occur in a query, so a match never spans two fields
+        text = self._text
+        if candidates is text.keys():
+            ids = [sid for sid, value in text.items() if query in value]
+        else:
+            ids = [sid for sid in candidates if query in text.get(sid, "")]
+        self._last = (query, ids)
+        if limit is not None:
+            ids = ids[:limit]
+        return [self._students[sid] for sid in ids]
+
+    def _index(self, sid, student):
+        text = "\0".join((str(student.name), str(student.roll), str(student.department))).lower()
+        self._text[sid] = text
+        grams = self._grams
+        for gram in _trigrams(text):
+            posting = grams.get(gram)
+            if posting is None:
+                grams[gram] = [sid]
+            else:
+                posting.append(sid)
+        self._last = None
+
+    def _maybe_compact(self):
+        """Rebuild the posting lists once stale entries outnumber the live students"""
+        if self._stale <= max(len(self._students), 64):
+            return
+        self._grams = {}
+        self._stale = 0
+        for sid, student in self._students.items():
+            self._index(sid, student)
@@ -0,0 +1,101 @@
+"""
+Seat Filter Module
+Per-seat temporal smoothing of detection confidence with hysteresis
+"""
+
+from collections import deque
+
+
+class SeatConfidenceFilter:
+    """
+    Exponential moving average of each seat's detection confidence, updated once per frame.
+    A seat becomes active when its average reaches on_thresh after at least min_frames
+    observations in a row, and only drops back when the average falls below off_thresh,
+    so one-frame spikes never flag a student and a brief dip does not end an event.
+    The frames each seat was active are kept as spans so finished tracker incidents can be
+    checked against the smoothing after the fact (was_active).
+    """
+
+    # Active spans remembered per seat
+    SPAN_HISTORY = 16
+
+    def __init__(self, alpha=0.3, on_thresh=0.5, off_thresh=0.3, min_frames=3):
+        """
+        Initialize seat filter
+
+        Args:
+            alpha: EMA weight of the newest frame (higher reacts faster)
+            on_thresh: Smoothed confidence needed to become active
+            off_thresh: Smoothed confidence below which an active seat turns off
+            min_frames: Consecutive frames with a detection needed before a seat can turn on
+        """
+        if off_thresh > on_thresh:
+            raise ValueError("off_thresh must not exceed on_thresh")
+        self.alpha = alpha
+        self.on_thresh = on_thresh
+        self.off_thresh = off_thresh
+        self.min_frames = min_frames
+
+        self.scores = {}   # roll -> smoothed confidence
+        self.streaks = {}  # roll -> consecutive frames with a detection
+        self.active = set()
+        self.frame = -1
+        self.spans = {}  # roll -> deque of [first active frame, last active frame or None while active]
+
+    def update(self, seat_confs, frame_idx=None):
+        """
+        Feed one frame
+
+        Args:
+            seat_confs: Dictionary {roll: confidence} for seats with a detection this frame
+                        (seats not listed are treated as confidence 0)
+            frame_idx: Frame index used for the active spans (default: previous index + 1)
+
+        Returns:
+            Set of rolls that turned active on this frame
+        """
+        turned_on = set()
+        prev_frame = self.frame
+        self.frame = prev_frame + 1 if frame_idx is None else frame_idx
+        a = self.alpha
+        for roll in set(self.scores) | set(seat_confs):
+            conf = seat_confs.get(roll, 0.0)
+            score = a * conf + (1 - a) * self.scores.get(roll, 0.0)
+            streak = self.streaks.get(roll, 0) + 1 if roll in seat_confs else 0
+
+            if roll in self.active:
+                if score < self.off_thresh:
+                    self.active.discard(roll)
+                    self.spans[roll][-1][1] = prev_frame
+            elif score >= self.on_thresh and streak >= self.min_frames:
+                self.active.add(roll)
+                turned_on.add(roll)
+                if roll not in self.spans:
+                    self.spans[roll] = deque(maxlen=self.SPAN_HISTORY)
+                self.spans[roll].append([self.frame, None])
+
+            if score < 1e-3 and roll not in self.active:
+                # Forget seats that have fully decayed
+                self.scores.pop(roll, None)
+                self.streaks.pop(roll, None)
+            else:
+                self.scores[roll] = score
+                self.streaks[roll] = streak
+        return turned_on
+
+    def is_active(self, roll):
+        return roll in self.active
+
+    def was_active(self, roll, start_frame, end_frame):
+        """True if the seat was active on any frame in [start_frame, end_frame]"""
+        for first, last in self.spans.get(roll, ()):
+            if first <= end_frame and (last is None or last >= start_frame):
+                return True
+        return False
+
+    def reset(self):
+        self.scores.clear()
+        self.streaks.clear()
+        self.active.clear()
+        self.spans.clear()
+        self.frame = -1
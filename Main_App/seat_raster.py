@@ -0,0 +1,122 @@
+"""
+Seat Raster Module
+Precomputed nearest-seat label map (a discretised Voronoi diagram) for O(1) seat lookups
+"""
+
+import math
+import numpy as np
+
+
+class SeatLabelRaster:
+    """
+    Downscaled raster over the seat area where every pixel stores the indices of its
+    nearest seats and their distances. Lookups read one pixel and re-rank its stored
+    seats by exact distance. A query point is at most half a pixel diagonal from the pixel
+    centre, so a seat that is not stored is at least (last stored distance - half diagonal)
+    away; the answer is only returned when the n-th re-ranked seat is closer than that.
+    Points near a Voronoi edge where that does not hold, and points outside the raster,
+    return None so the caller can fall back to the (exact) spatial index.
+    """
+
+    # Seats stored per pixel; lookups serve up to DEPTH - 1 nearest seats. The spare seats
+    # widen the margin that proves an answer exact (fallbacks: ~19% at 3, ~2% at 4 for n=2)
+    DEPTH = 4
+
+    def __init__(self, seats, index, scale=0.25, margin=256, block=32):
+        """
+        Build the raster
+
+        Args:
+            seats: Dict {roll: (x, y)} of mapped seats
+            index: GridIndex over the same seats (used to find candidate seats per block)
+            scale: Raster pixels per image pixel
+            margin: Image pixels added around the seats' bounding box
+            block: Raster block side processed at once
+        """
+        self.scale = float(scale)
+        # Farthest a query point can be from its pixel centre, plus float32 rounding slack
+        self.half_diag = math.sqrt(0.5) / self.scale + 1e-2
+        self.rolls = list(seats.keys())
+        self.coords = np.array([seats[r] for r in self.rolls], dtype=np.float64).reshape(-1, 2)
+        self._roll_idx = {r: i for i, r in enumerate(self.rolls)}
+        self.k = min(self.DEPTH, len(self.rolls))
+
+        if not self.rolls:
+            self.origin = (0.0, 0.0)
+            self.labels = np.full((0, 0, self.DEPTH), -1, dtype=np.int32)
+            self.dists = np.full((0, 0, self.DEPTH), np.inf, dtype=np.float32)
+            return
+
+        x0, y0 = self.coords.min(axis=0) - margin
+        x1, y1 = self.coords.max(axis=0) + margin
+        self.origin = (float(x0), float(y0))
+        w = max(1, int(math.ceil((x1 - x0) * self.scale)))
+        h = max(1, int(math.ceil((y1 - y0) * self.scale)))
+        self.labels = np.full((h, w, self.DEPTH), -1, dtype=np.int32)
+        self.dists = np.full((h, w, self.DEPTH), np.inf, dtype=np.float32)
+
+        self._build(index, block)
+
+    @property
+    def shape(self):
+        return self.labels.shape[:2]
+
+    def _build(self, index, block):
+        h, w = self.shape
+        step = 1.0 / self.scale
+        x0, y0 = self.origin
+        for by in range(0, h, block):
+            ys = y0 + (np.arange(by, min(by + block, h)) + 0.5) * step
+            for bx in range(0, w, block):
+                xs = x0 + (np.arange(bx, min(bx + block, w)) + 0.5) * step
+                cx, cy = (xs[0] + xs[-1]) / 2, (ys[0] + ys[-1]) / 2
+                half_diag = math.hypot(xs[-1] - xs[0], ys[-1] - ys[0]) / 2
+
+                # Any pixel's k nearest seats lie within (k-th distance at the centre + 2 * half diagonal)
+                near = index.knn(cx, cy, k=self.k)
+                reach = near[-1][1] + 2 * half_diag + step
+                cand = np.array([self._roll_idx[r] for r, _ in index.radius(cx, cy, reach)], dtype=np.int32)
+                pts = self.coords[cand]
+
+                d = np.hypot(xs[None, :, None] - pts[:, 0], ys[:, None, None] - pts[:, 1])
+                order = np.argsort(d, axis=2)[..., :self.k]
+                self.labels[by:by + len(ys), bx:bx + len(xs), :self.k] = cand[order]
+                self.dists[by:by + len(ys), bx:bx + len(xs), :self.k] = np.take_along_axis(d, order, axis=2)
+
+    def lookup(self, x, y, n=2, max_distance=None):
+        """
+        Nearest seats to (x, y)
+
+        Args:
+            n: Number of seats wanted (at most DEPTH - 1)
+            max_distance: Drop seats farther than this (exact distance)
+
+        Returns:
+            List of (roll, distance) nearest first, or None if (x, y) is outside the raster
+            or the stored seats cannot prove the answer exact
+        """
+        h, w = self.shape
+        # floor, not int(): truncation toward zero would map points just left of / above the
+        # raster onto pixel 0 instead of reporting them as outside
+        ix = math.floor((x - self.origin[0]) * self.scale)
+        iy = math.floor((y - self.origin[1]) * self.scale)
+        if not (0 <= ix < w and 0 <= iy < h) or n >= self.DEPTH:
+            return None
+
+        # Raster distance is to the pixel centre; allow for the offset before rejecting
+        if max_distance is not None and self.dists[iy, ix, 0] - self.half_diag > max_distance:
+            return []
+
+        ranked = []
+        for label in self.labels[iy, ix, :self.k]:
+            sx, sy = self.coords[label]
+            ranked.append((self.rolls[label], math.hypot(sx - x, sy - y)))
+        ranked.sort(key=lambda t: t[1])
+
+        # Unless every seat is stored, an unstored seat could be as close as this
+        if self.k < len(self.rolls) and n > 0:
+            bound = float(self.dists[iy, ix, self.k - 1]) - self.half_diag
+            if ranked[min(n, len(ranked)) - 1][1] >= bound:
+                return None
+
+        return [(roll, dist) for roll, dist in ranked[:n] if max_distance is None or dist <= max_distance]
@@ -0,0 +1,168 @@
+"""
+Spatial Index Module
+Uniform grid over seat coordinates for k-nearest and radius queries
+"""
+
+import math
+
+
+class GridIndex:
+    """
+    Buckets points into square cells of cell_size pixels.
+    Insert/remove are O(1); queries only visit the cells around the query point,
+    expanding ring by ring until the k-th best distance is provably final.
+    """
+
+    def __init__(self, cell_size=64):
+        """
+        Args:
+            cell_size: Cell side in pixels (about one seat pitch works well)
+        """
+        self.cell_size = float(cell_size)
+        self._cells = {}   # (i, j) -> {key: (x, y)}
+        self._points = {}  # key -> (x, y, (i, j))
+        self._bounds = None  # (min_i, min_j, max_i, max_j); may be loose after removals
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def insert(self, key, x, y):
+        """Add a point, or move it if the key is already indexed"""
+        if key in self._points:
+            self.remove(key)
+        cell = self._cell(x, y)
+        self._cells.setdefault(cell, {})[key] = (x, y)
+        self._points[key] = (x, y, cell)
+        if self._bounds is None:
+            self._bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            b = self._bounds
+            self._bounds = (min(b[0], cell[0]), min(b[1], cell[1]), max(b[2], cell[0]), max(b[3], cell[1]))
+
+    def remove(self, key):
+        """Remove a point; returns False if the key was not indexed"""
+        entry = self._points.pop(key, None)
+        if entry is None:
+            return False
+        cell = entry[2]
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+        if not self._points:
+            self._bounds = None
+        return True
+
+    def clear(self):
+        self._cells.clear()
+        self._points.clear()
+        self._bounds = None
+
+    def rebuild(self, items, cell_size=None):
+        """
+        Re-index from scratch
+
+        Args:
+            items: Iterable of (key, (x, y))
+            cell_size: Optional new cell size
+        """
+        if cell_size:
+            self.cell_size = float(cell_size)
+        self.clear()
+        for key, (x, y) in items:
+            self.insert(key, x, y)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _ring(self, ci, cj, r):
+        """Cells on the square ring at Chebyshev distance r around (ci, cj)"""
+        if r == 0:
+            yield (ci, cj)
+            return
+        for i in range(ci - r, ci + r + 1):
+            yield (i, cj - r)
+            yield (i, cj + r)
+        for j in range(cj - r + 1, cj + r):
+            yield (ci - r, j)
+            yield (ci + r, j)
+
+    def _max_ring(self, ci, cj):
+        """Ring radius beyond which no occupied cell exists"""
+        if self._bounds is None:
+            return -1
+        min_i, min_j, max_i, max_j = self._bounds
+        return max(abs(min_i - ci), abs(max_i - ci), abs(min_j - cj), abs(max_j - cj))
+
+    def knn(self, x, y, k=1, max_distance=None):
+        """
+        k nearest points to (x, y)
+
+        Args:
+            k: Number of neighbours
+            max_distance: Ignore points farther than this
+
+        Returns:
+            List of (key, distance) sorted by distance
+        """
+        if k <= 0 or not self._points:
+            return []
+
+        ci, cj = self._cell(x, y)
+        last_ring = self._max_ring(ci, cj)
+        if max_distance is not None:
+            last_ring = min(last_ring, int(math.ceil(max_distance / self.cell_size)) + 1)
+
+        found = []
+        r = 0
+        while r <= last_ring:
+            for cell in self._ring(ci, cj, r):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for key, (px, py) in bucket.items():
+                    dist = math.hypot(px - x, py - y)
+                    if max_distance is None or dist <= max_distance:
+                        found.append((key, dist))
+            # Anything outside rings 0..r is at least r * cell_size away
+            if len(found) >= k:
+                found.sort(key=lambda t: t[1])
+                if found[k - 1][1] <= r * self.cell_size:
+                    break
+            r += 1
+
+        found.sort(key=lambda t: t[1])
+        return found[:k]
+
+    def radius(self, x, y, radius):
+        """
+        All points within radius of (x, y)
+
+        Returns:
+            List of (key, distance) sorted by distance
+        """
+        if not self._points:
+            return []
+        i1, j1 = self._cell(x - radius, y - radius)
+        i2, j2 = self._cell(x + radius, y + radius)
+
+        found = []
+        if (i2 - i1 + 1) * (j2 - j1 + 1) > len(self._cells):
+            # Query box larger than the occupied grid: walk occupied cells only
+            cells = [c for c in self._cells if i1 <= c[0] <= i2 and j1 <= c[1] <= j2]
+        else:
+            cells = [(i, j) for i in range(i1, i2 + 1) for j in range(j1, j2 + 1)]
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if not bucket:
+                continue
+            for key, (px, py) in bucket.items():
+                dist = math.hypot(px - x, py - y)
+                if dist <= radius:
+                    found.append((key, dist))
+        found.sort(key=lambda t: t[1])
+        return found
@@ -0,0 +1,72 @@
+import csv
+import multiprocessing
+import types
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import batch_runner
+from Mapper import CoordinateMapper
+from Student import Student
+from detections import Detections
+
+
+class FakeDetector:
+    """Stands in for CheatDetector in the workers: one box on seat R1, confidence rising with brightness"""
+
+    def __init__(self, model_path, device=None, backend=None):
+        pass
+
+    def detect_batch(self, frames, conf_thresh=0.3):
+        return [Detections(np.array([[60, 40, 100, 80, 0.3 + frame[0, 0, 0] / 400, 0]], np.float32))
+                for frame in frames]
+
+
+def _write_video(path, frames=60):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (160, 120))
+    for i in range(frames):
+        writer.write(np.full((120, 160, 3), (i * 37) % 256, np.uint8))
+    writer.release()
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _run_chunked(tmp_path, monkeypatch, **options):
+    # Forked workers inherit the patched detector (spawned ones would re-import the real one)
+    monkeypatch.setattr(batch_runner, "CheatDetector", FakeDetector)
+    monkeypatch.setattr(batch_runner, "mp", types.SimpleNamespace(get_context=lambda _: multiprocessing.get_context("fork")))
+
+    video = tmp_path / "exam.avi"
+    _write_video(video)
+    mapper = CoordinateMapper()
+    mapper.map_student(80, 60, Student("A", "CSE", "R1"))
+
+    out = tmp_path / "out"
+    summary = batch_runner.run_chunked(video, "model.onnx", mapper, output_dir=out, workers=2, chunks=2,
+                                       overlap=0, progress_seconds=0.1, **options)
+    assert summary["tasks"] == 2 and not summary["failed"]
+    return out
+
+
+def test_chunked_log_points_at_merged_evidence(tmp_path, monkeypatch):
+    out = _run_chunked(tmp_path, monkeypatch, top_n=5, save_gap_seconds=0)
+
+    rows = _read_rows(out / "flagged_log.csv")
+    files = [row["frame_file"] for row in rows if row["frame_file"]]
+    assert len(rows) > len(files) == 5
+    for path in files:
+        assert path.startswith(str(out / "flagged_frames"))
+        assert Path(path).is_file()
+
+
+def test_save_gap_applies_across_chunk_boundaries(tmp_path, monkeypatch):
+    # 60 frames at 30 FPS in two chunks: each saves its first frame, 1 s apart, inside the 2 s gap
+    out = _run_chunked(tmp_path, monkeypatch, top_n=20, save_gap_seconds=2)
+
+    rows = _read_rows(out / "flagged_log.csv")
+    assert [row["source_info"].rsplit("@", 1)[1] for row in rows] == ["1"]
+    assert len(list((out / "flagged_frames").rglob("*.jpg"))) == 1
@@ -0,0 +1,55 @@
+import numpy as np
+
+from Mapper import CoordinateMapper
+from Student import Student
+from detection_processor import DetectionProcessor
+from detections import Detections
+
+
+def _mapper():
+    mapper = CoordinateMapper()
+    mapper.map_student(50, 50, Student("Ann", "CSE", "R1"))
+    mapper.map_student(250, 50, Student("Bob", "CSE", "R2"))
+    return mapper
+
+
+def _worker(root, mapper, cx, conf, budget_mb=256):
+    processor = DetectionProcessor(
+        root, root / "flagged_frames", root / "log.csv", writer_workers=0,
+        deferred_evidence=True, evidence_budget_mb=budget_mb, log_flush_seconds=None,
+        evidence_prefix=f"{root.name}_",
+    )
+    frame = np.zeros((100, 300, 3), np.uint8)
+    dets = Detections(np.array([[cx - 20, 30, cx + 20, 70, conf, 0]], np.float32))
+    processor.process_frame(dets, frame, mapper, "clip", 1, timestamp=1000.0)
+    candidates = processor.export_candidates(release=True)
+    processor.close()
+    return candidates
+
+
+def test_merge_writes_only_admitted_candidates(tmp_path):
+    mapper = _mapper()
+    strong = _worker(tmp_path / "w1", mapper, 50, 0.9)
+    weak = _worker(tmp_path / "w2", mapper, 250, 0.4)
+    # Released candidates are never written by the worker, not even their folders
+    assert not any((tmp_path / "w2" / "flagged_frames").iterdir())
+
+    out = tmp_path / "out"
+    parent = DetectionProcessor(out, out / "flagged_frames", out / "log.csv", top_n=1,
+                                writer_workers=0, deferred_evidence=True, log_flush_seconds=None)
+    parent.merge_candidates(strong)
+    parent.merge_candidates(weak)
+    parent.close()
+
+    folders = [p.name for p in (out / "flagged_frames").iterdir()]
+    assert folders == ["Ann_R1"]
+    assert len(list((out / "flagged_frames" / "Ann_R1").glob("*.jpg"))) == 1
+
+
+def test_spilled_candidates_are_exported(tmp_path):
+    mapper = _mapper()
+    # A zero budget writes every candidate to the worker's own folder right away
+    candidates = _worker(tmp_path / "w1", mapper, 50, 0.9, budget_mb=0)
+    assert len(candidates) == 1
+    assert candidates[0]["paths"][0].startswith("Ann_R1")
+    assert candidates[0]["data"][:2] == b"\xff\xd8"
@@ -0,0 +1,37 @@
+import types
+
+import numpy as np
+
+from cheat_detector import CheatDetector, UltralyticsBackend
+
+
+class Boxes:
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class RecordingYolo:
+    """Stands in for ultralytics.YOLO: records the conf it is called with and applies it"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, source, conf=0.25):
+        self.calls.append(conf)
+        rows = np.array([[0, 0, 10, 10, 0.15, 0], [0, 0, 10, 10, 0.6, 0]], np.float32)
+        rows = rows[rows[:, 4] >= conf]
+        return [types.SimpleNamespace(boxes=Boxes(rows))]
+
+
+def test_ultralytics_backend_passes_conf_thresh():
+    backend = UltralyticsBackend.__new__(UltralyticsBackend)
+    backend.model = RecordingYolo()
+    detector = CheatDetector(model_path="missing.pt")
+    detector.model = backend
+
+    dets = detector.detect_frame(np.zeros((10, 10, 3), np.uint8), conf_thresh=0.1)
+    assert backend.model.calls == [0.1]
+    assert len(dets) == 2
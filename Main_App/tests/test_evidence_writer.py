@@ -0,0 +1,44 @@
+import threading
+import time
+
+from evidence_writer import EvidenceWriter
+
+
+class SlowToEnter:
+    """Wraps the writer's condition; the submitting thread pauses before taking the lock"""
+
+    def __init__(self, cond, thread_name):
+        self.cond = cond
+        self.thread_name = thread_name
+
+    def __enter__(self):
+        if threading.current_thread().name == self.thread_name:
+            time.sleep(0.2)
+        return self.cond.__enter__()
+
+    def __exit__(self, *exc):
+        return self.cond.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.cond, name)
+
+
+def test_submit_racing_close_is_rejected_not_lost(tmp_path):
+    writer = EvidenceWriter(num_workers=1)
+    writer._pending_cond = SlowToEnter(writer._pending_cond, "submitter")
+    outcome = []
+
+    def submit():
+        try:
+            writer.submit_delete(tmp_path / "x.jpg", callback=lambda path, ok: outcome.append("ran"))
+        except RuntimeError:
+            outcome.append("rejected")
+
+    thread = threading.Thread(target=submit, name="submitter")
+    thread.start()
+    time.sleep(0.05)  # the submitter is now paused just before taking the lock
+    writer.close()
+    thread.join()
+    time.sleep(0.05)
+
+    assert outcome in (["rejected"], ["ran"])
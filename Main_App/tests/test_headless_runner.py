@@ -0,0 +1,93 @@
+import time
+
+import cv2
+import numpy as np
+
+from Mapper import CoordinateMapper
+from Student import Student
+from detection_processor import DetectionProcessor
+from detections import Detections
+from headless_runner import HeadlessRunner
+
+
+class SlowDetector:
+    """Stands in for CheatDetector: 10 ms per frame, no detections"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def detect_frame(self, frame_bgr, conf_thresh=0.3):
+        time.sleep(0.01)
+        self.frames += 1
+        return Detections()
+
+
+class SeatDetector:
+    """Returns one box on seat R1 at conf 0.4: above conf_thresh 0.3, below the old fixed high_conf 0.5"""
+
+    def detect_frame(self, frame_bgr, conf_thresh=0.3):
+        return Detections(np.array([[60, 40, 100, 80, 0.4, 0]], np.float32))
+
+
+def _write_video(path, frames=300):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (160, 120))
+    for i in range(frames):
+        frame = np.full((120, 160, 3), i % 256, np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def test_file_source_processes_every_frame_by_default(tmp_path):
+    video = tmp_path / "clip.avi"
+    _write_video(video)
+
+    mapper = CoordinateMapper()
+    mapper.map_student(80, 60, Student("A", "CSE", "R1"))
+    processor = DetectionProcessor(tmp_path, tmp_path / "flagged", tmp_path / "log.csv", writer_workers=0)
+    detector = SlowDetector()
+    runner = HeadlessRunner(mapper, detector, processor, stats_seconds=0)
+    try:
+        summary = runner.run("video_file", str(video))
+    finally:
+        processor.close()
+
+    assert detector.frames == 300
+    assert summary["frames"] == 300
+    assert summary["stats"]["dropped"] == 0
+    assert summary["stats"]["queue_dropped"] == 0
+
+
+def test_tracked_incident_between_conf_thresh_and_old_high_conf(tmp_path):
+    video = tmp_path / "clip.avi"
+    _write_video(video, frames=30)
+
+    mapper = CoordinateMapper()
+    mapper.map_student(80, 60, Student("A", "CSE", "R1"))
+    processor = DetectionProcessor(tmp_path, tmp_path / "flagged", tmp_path / "log.csv", writer_workers=0)
+    runner = HeadlessRunner(mapper, SeatDetector(), processor, track_incidents=True, stats_seconds=0)
+    try:
+        summary = runner.run("video_file", str(video), conf_thresh=0.3)
+    finally:
+        processor.close()
+
+    assert summary["flagged"] == 1
+    assert processor.flagged_counts == {"R1": 1}
+
+
+def test_save_gap_uses_recording_time_at_max_pacing(tmp_path):
+    # 300 frames at 30 FPS = 10 s of recording; a 2 s gap admits frames 1, 61, 121, 181 and 241
+    # however fast the pipeline runs
+    video = tmp_path / "clip.avi"
+    _write_video(video)
+
+    mapper = CoordinateMapper()
+    mapper.map_student(80, 60, Student("A", "CSE", "R1"))
+    processor = DetectionProcessor(tmp_path, tmp_path / "flagged", tmp_path / "log.csv", writer_workers=0,
+                                   top_n=50, save_gap_seconds=2)
+    runner = HeadlessRunner(mapper, SeatDetector(), processor, track_incidents=False, stats_seconds=0)
+    try:
+        runner.run("video_file", str(video), pacing="max")
+    finally:
+        processor.close()
+
+    assert processor.flagged_counts == {"R1": 5}
@@ -0,0 +1,72 @@
+import numpy as np
+
+from Mapper import CoordinateMapper
+from Student import Student
+from detection_processor import DetectionProcessor
+from detections import Detections
+from tracker import IoUTracker
+
+
+def _setup(tmp_path, seat_smoothing=None):
+    mapper = CoordinateMapper()
+    mapper.map_student(100, 100, Student("Ann", "CS", "R1"))
+    processor = DetectionProcessor(
+        tmp_path / "out", tmp_path / "flagged", tmp_path / "log.csv",
+        writer_workers=0, seat_smoothing=seat_smoothing,
+    )
+    return mapper, processor, IoUTracker(min_hits=3)
+
+
+def _frame(processor, mapper, tracker, idx, conf):
+    """One playback frame the way the UI handles it in tracked mode"""
+    frame = np.full((200, 200, 3), idx % 256, np.uint8)
+    dets = Detections(np.array([[80, 80, 120, 120, conf, 0]], np.float32))
+    flagged = processor.update_seat_smoothing(dets, mapper, "cam", idx)
+    for incident in tracker.update(dets, frame, idx / 30, idx, src_name="cam"):
+        flagged += processor.process_incident(incident, mapper)
+    return flagged
+
+
+def _saved(processor):
+    return [e["conf"] for e in processor.person_entries.get("R1", [])]
+
+
+def test_continuous_event_is_flagged_while_the_track_runs(tmp_path):
+    mapper, processor, tracker = _setup(tmp_path)
+    flagged_at = [idx for idx in range(600) if _frame(processor, mapper, tracker, idx, 0.8)]
+    assert flagged_at == [2]
+    assert tracker.tracks and processor.flagged_counts == {"R1": 1}
+    assert len(list((tmp_path / "flagged").rglob("*.jpg"))) == 1
+    processor.close()
+
+
+def test_held_until_seat_smoothing_turns_active(tmp_path):
+    # With alpha 0.3 a steady 0.6 reaches on_thresh on the 6th frame, after the track is confirmed
+    smoothing = {"alpha": 0.3, "on_thresh": 0.5, "off_thresh": 0.3, "min_frames": 3}
+    mapper, processor, tracker = _setup(tmp_path, smoothing)
+    flagged_at = [idx for idx in range(100) if _frame(processor, mapper, tracker, idx, 0.6)]
+    assert flagged_at == [5]
+    assert tracker.tracks and processor.flagged_counts == {"R1": 1}
+    processor.close()
+
+
+def test_final_incident_replaces_evidence_with_better_frame(tmp_path):
+    mapper, processor, tracker = _setup(tmp_path)
+    for idx, conf in enumerate([0.5, 0.5, 0.5, 0.6, 0.9, 0.7]):
+        _frame(processor, mapper, tracker, idx, conf)
+    assert _saved(processor) == [0.5]
+    for incident in tracker.flush():
+        processor.process_incident(incident, mapper)
+    assert _saved(processor) == [np.float32(0.9)]
+    assert len(processor.top_heap) == 1
+    assert len(list((tmp_path / "flagged").rglob("*.jpg"))) == 1
+    processor.close()
+
+
+def test_final_incident_with_same_best_frame_is_not_saved_again(tmp_path):
+    mapper, processor, tracker = _setup(tmp_path)
+    for idx in range(10):
+        _frame(processor, mapper, tracker, idx, 0.8)
+    assert [processor.process_incident(i, mapper) for i in tracker.flush()] == [[]]
+    assert processor.flagged_counts == {"R1": 1}
+    processor.close()
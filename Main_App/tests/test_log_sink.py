@@ -0,0 +1,43 @@
+from log_sink import LOG_COLUMNS, DetectionLogSink, read_log
+
+
+def _row(i, roll="R1"):
+    return [f"2026-01-01 00:00:{i:02d}", f"f{i}.jpg", f"cam_frame{i}", "Ann", roll, 0.5 + i / 100, i, 2 * i]
+
+
+def test_rows_are_not_held_in_memory_by_default(tmp_path):
+    sink = DetectionLogSink(tmp_path / "log.csv", flush_rows=4, flush_seconds=None)
+    sink.extend(_row(i, roll=f"R{i % 3}") for i in range(50))
+    assert len(sink._records) == 0
+    assert sink.counts_by_roll() == {"R0": 17, "R1": 17, "R2": 16}
+
+    rows = sink.query()
+    assert len(rows) == 50
+    assert rows[7] == dict(zip(LOG_COLUMNS, _row(7, roll="R1")))
+    assert [r["student_roll"] for r in sink.query(roll="R2", min_conf=0.9)] == ["R2"] * 3
+    sink.close()
+    assert len(read_log(tmp_path / "log.csv")) == 50
+
+
+def test_query_only_returns_this_session(tmp_path):
+    path = tmp_path / "log.csv"
+    first = DetectionLogSink(path, flush_seconds=None)
+    first.extend(_row(i) for i in range(5))
+    first.close()
+
+    second = DetectionLogSink(path, flush_seconds=None)
+    second.append(_row(9))
+    assert [r["frame_file"] for r in second.query()] == ["f9.jpg"]
+    second.close()
+    assert len(read_log(path)) == 6
+
+
+def test_memory_tail_is_capped(tmp_path):
+    sink = DetectionLogSink(tmp_path / "log.csv", flush_seconds=None, keep_in_memory=True, memory_rows=8)
+    sink.extend(_row(i) for i in range(5))
+    assert len(sink.query()) == 5
+    sink.extend(_row(i) for i in range(5, 30))
+    assert len(sink._records) == 8
+    # The tail no longer covers the session, so the full export comes from the file
+    assert [r["bbox_center_x"] for r in sink.query()] == list(range(30))
+    sink.close()
@@ -0,0 +1,30 @@
+from Mapper import CoordinateMapper
+from Student import Student
+
+
+def _mapper():
+    mapper = CoordinateMapper()
+    mapper.add_students([Student("Ann", "CSE", "R1"), Student("Bob", "ECE", "R2")])
+    return mapper
+
+
+def test_unmapped_students_is_a_copy():
+    mapper = _mapper()
+    mapper.unmapped_students.pop(0)
+    assert mapper.unmapped_count() == 2
+
+
+def test_remove_student():
+    mapper = _mapper()
+    assert mapper.remove_student("R1").name == "Ann"
+    assert [s.roll for s in mapper.unmapped_students] == ["R2"]
+    assert mapper.search_unmapped("ann") == []
+
+
+def test_update_student_reindexes_search():
+    mapper = _mapper()
+    stu = mapper.get_student_by_roll("R1")
+    assert not mapper.update_student(stu, "Ann", "CSE", "R2")
+    assert mapper.update_student(stu, "Anna", "MECH", "R9")
+    assert mapper.search_unmapped("mech") == [stu]
+    assert mapper.get_student_by_roll("R1") is None
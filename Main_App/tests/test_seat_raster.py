@@ -0,0 +1,57 @@
+import math
+import random
+
+import pytest
+
+from Mapper import CoordinateMapper
+from Student import Student
+
+
+def _linear(seats, x, y, n, max_distance):
+    dists = sorted((math.hypot(sx - x, sy - y), roll) for roll, (sx, sy) in seats.items())
+    return [(roll, d) for d, roll in dists[:n] if max_distance is None or d <= max_distance]
+
+
+def _layout(rng, kind, count=300):
+    if kind == "grid":
+        cols = 20
+        return {f"R{i:05d}": (100 + (i % cols) * 60, 100 + (i // cols) * 60) for i in range(count)}
+    return {f"R{i:05d}": (rng.uniform(0, 1600), rng.uniform(0, 900)) for i in range(count)}
+
+
+def _same(a, b):
+    """Equal up to the order of equally distant seats"""
+    if [round(d, 6) for _, d in a] != [round(d, 6) for _, d in b]:
+        return False
+    groups = {}
+    for roll, d in a:
+        groups.setdefault(round(d, 6), set()).add(roll)
+    return all(roll in groups[round(d, 6)] for roll, d in b)
+
+
+@pytest.mark.parametrize("kind,seed", [("random", 0), ("random", 1), ("random", 2), ("grid", 0)])
+def test_raster_matches_linear_scan(kind, seed):
+    rng = random.Random(seed)
+    seats = _layout(rng, kind)
+    mapper = CoordinateMapper()
+    for roll, (x, y) in seats.items():
+        mapper.map_student(x, y, Student(roll, "CSE", roll))
+    mapper.enable_seat_raster(scale=0.25)
+
+    for _ in range(20000):
+        x, y = rng.uniform(-100, 1800), rng.uniform(-100, 1500)
+        n = rng.choice([1, 2])
+        max_distance = rng.choice([None, 40.0, 80.0])
+        got = mapper.nearest_n_students(x, y, n=n, max_distance=max_distance)
+        assert _same(got, _linear(seats, x, y, n, max_distance)), (x, y, n, max_distance)
+
+
+def test_points_just_outside_the_raster_are_not_looked_up():
+    mapper = CoordinateMapper()
+    mapper.map_student(500, 500, Student("A", "CSE", "R1"))
+    mapper.enable_seat_raster(scale=0.25, margin=256)
+    raster = mapper._seat_raster()
+    x0, y0 = raster.origin
+    assert raster.lookup(x0 - 0.5, y0 + 10) is None
+    assert raster.lookup(x0 + 10, y0 - 0.5) is None
+    assert raster.lookup(x0 + 0.5, y0 + 10) == [("R1", math.hypot(500 - x0 - 0.5, 500 - y0 - 10))]
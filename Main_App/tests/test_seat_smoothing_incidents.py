@@ -0,0 +1,48 @@
+import numpy as np
+
+from Mapper import CoordinateMapper
+from Student import Student
+from detection_processor import DetectionProcessor
+from detections import Detections
+from tracker import IoUTracker
+
+
+def _run(tmp_path, confs, seat_smoothing):
+    mapper = CoordinateMapper()
+    mapper.map_student(100, 100, Student("Ann", "CS", "R1"))
+    processor = DetectionProcessor(
+        tmp_path / "out", tmp_path / "flagged", tmp_path / "log.csv",
+        writer_workers=0, seat_smoothing=seat_smoothing,
+    )
+    tracker = IoUTracker(high_conf=0.1, min_hits=1)
+    frame = np.zeros((200, 200, 3), np.uint8)
+    flagged = []
+    for idx, conf in enumerate(confs):
+        dets = Detections(np.array([[80, 80, 120, 120, conf, 0]], np.float32)) if conf else Detections()
+        flagged += processor.update_seat_smoothing(dets, mapper, "cam", idx)
+        for incident in tracker.update(dets, frame, idx / 30, idx, src_name="cam"):
+            flagged += processor.process_incident(incident, mapper)
+    for incident in tracker.flush():
+        flagged += processor.process_incident(incident, mapper)
+    processor.close()
+    return [student.roll for student, _ in flagged]
+
+
+SMOOTHING = {"alpha": 0.5, "on_thresh": 0.5, "off_thresh": 0.3, "min_frames": 3}
+
+
+def test_sustained_incident_is_flagged(tmp_path):
+    assert _run(tmp_path, [0.9] * 10, SMOOTHING) == ["R1"]
+
+
+def test_short_incident_is_not_flagged(tmp_path):
+    # Two strong frames never reach min_frames, so the seat never turns active
+    assert _run(tmp_path, [0.9, 0.9] + [0.0] * 20, SMOOTHING) == []
+
+
+def test_weak_incident_is_not_flagged(tmp_path):
+    assert _run(tmp_path, [0.3] * 10, SMOOTHING) == []
+
+
+def test_without_smoothing_short_incident_is_flagged(tmp_path):
+    assert _run(tmp_path, [0.9, 0.9] + [0.0] * 20, None) == ["R1"]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from detections import Detections
+from tracker import IoUTracker
+
+
+def _feed(tracker, conf, frames=5):
+    frame = np.zeros((10, 10, 3), np.uint8)
+    box = Detections(np.array([[10, 10, 50, 50, conf, 0]], np.float32))
+    incidents = []
+    for idx in range(frames):
+        incidents += tracker.update(box, frame, idx / 30, idx)
+    return incidents + tracker.flush()
+
+
+def test_default_tracker_starts_tracks_for_every_detected_box():
+    # A box between the detector threshold (e.g. 0.3) and the old fixed 0.5 must still become an incident
+    incidents = _feed(IoUTracker(), conf=0.4)
+    assert [(i.provisional, i.hits) for i in incidents] == [(True, 3), (False, 5)]
+
+
+def test_explicit_high_conf_only_extends_tracks():
+    assert _feed(IoUTracker(high_conf=0.5), conf=0.4) == []
+
+
+def test_track_that_never_ends_is_reported_once_confirmed():
+    tracker = IoUTracker(min_hits=3)
+    frame = np.zeros((10, 10, 3), np.uint8)
+    box = Detections(np.array([[10, 10, 50, 50, 0.6, 0]], np.float32))
+    reported = [(idx, tracker.update(box, frame, idx / 30, idx)) for idx in range(1000)]
+    incidents = [(idx, inc) for idx, found in reported for inc in found]
+    assert len(incidents) == 1
+    idx, incident = incidents[0]
+    assert idx == 2 and incident.provisional and incident.track_id == tracker.tracks[0].track_id
@@ -0,0 +1,204 @@
+"""
+Tracker Module
+Lightweight IoU/centroid multi-object tracker that turns per-frame boxes into incidents
+"""
+
+import numpy as np
+
+from box_utils import box_iou
+from detections import Detections
+
+
+class Incident:
+    """
+    One tracked cheating event: a track from its first to its last matched frame.
+    best_det / best_frame are the detection and frame with the highest confidence.
+    A provisional incident is a snapshot taken when the track is confirmed (min_hits) while it
+    is still running; the same track_id is reported again, final, when the track ends.
+    """
+
+    __slots__ = ("track_id", "src_name", "start_time", "end_time", "start_frame", "end_frame",
+                 "peak_conf", "best_det", "best_frame", "best_frame_idx", "hits", "provisional")
+
+    def __init__(self, track, provisional=False):
+        self.track_id = track.track_id
+        self.src_name = track.src_name
+        self.start_time = track.start_time
+        self.end_time = track.last_time
+        self.start_frame = track.start_frame
+        self.end_frame = track.last_frame
+        self.peak_conf = track.peak_conf
+        self.best_det = track.best_det
+        self.best_frame = track.best_frame
+        self.best_frame_idx = track.best_frame_idx
+        self.hits = track.hits
+        self.provisional = provisional
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return (f"Incident(track={self.track_id}, src={self.src_name}, frames={self.start_frame}-{self.end_frame}, "
+                f"peak={self.peak_conf:.2f}, hits={self.hits}{', provisional' if self.provisional else ''})")
+
+
+class Track:
+    """Internal per-object state"""
+
+    __slots__ = ("track_id", "src_name", "box", "start_time", "last_time", "start_frame", "last_frame",
+                 "hits", "missed", "peak_conf", "best_det", "best_frame", "best_frame_idx", "confirmed")
+
+    def __init__(self, track_id, src_name, det, frame_bgr, timestamp, frame_idx):
+        self.track_id = track_id
+        self.src_name = src_name
+        self.box = np.array([det["x1"], det["y1"], det["x2"], det["y2"]], dtype=np.float32)
+        self.start_time = timestamp
+        self.last_time = timestamp
+        self.start_frame = frame_idx
+        self.last_frame = frame_idx
+        self.hits = 1
+        self.missed = 0
+        self.peak_conf = float(det["conf"])
+        self.best_det = det.to_dict() if hasattr(det, "to_dict") else dict(det)
+        self.best_frame = frame_bgr
+        self.best_frame_idx = frame_idx
+        self.confirmed = False
+
+    def update(self, det, frame_bgr, timestamp, frame_idx):
+        self.box = np.array([det["x1"], det["y1"], det["x2"], det["y2"]], dtype=np.float32)
+        self.last_time = timestamp
+        self.last_frame = frame_idx
+        self.hits += 1
+        self.missed = 0
+        conf = float(det["conf"])
+        if conf > self.peak_conf:
+            self.peak_conf = conf
+            self.best_det = det.to_dict() if hasattr(det, "to_dict") else dict(det)
+            self.best_frame = frame_bgr
+            self.best_frame_idx = frame_idx
+
+
+class IoUTracker:
+    """
+    ByteTrack-style association without a motion model: high-confidence boxes are
+    matched to tracks first, then low-confidence boxes may keep the remaining tracks alive.
+    Matching is greedy on IoU, with a centroid-distance fallback for boxes that moved
+    too far between (possibly motion-gated) frames to overlap.
+    A track seen in min_hits frames is confirmed and emitted as a provisional Incident right
+    away, so a live view can flag an event that is still going on. A track that goes
+    unmatched for max_missed frames ends and, if it was confirmed, is emitted again as the
+    final Incident (its best frame may have improved since).
+    """
+
+    def __init__(self, iou_thresh=0.3, high_conf=None, max_missed=15, min_hits=3, centroid_ratio=0.5):
+        """
+        Args:
+            iou_thresh: Minimum IoU for a box to continue a track
+            high_conf: Boxes at or above this start tracks and are matched first; None makes every
+                       box start tracks, i.e. the detector's conf_thresh is the threshold. Only set
+                       it above the detector threshold on purpose: boxes in between can then only
+                       extend tracks, never start one
+            max_missed: Unmatched frames before a track ends
+            min_hits: Matched frames needed for a track to become an incident
+            centroid_ratio: Fallback match if centres are closer than this x track diagonal (0 disables)
+        """
+        self.iou_thresh = iou_thresh
+        self.high_conf = high_conf
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.centroid_ratio = centroid_ratio
+        self.tracks = []
+        self._next_id = 1
+
+    def _match(self, tracks, dets):
+        """Greedy association; returns (pairs, unmatched track idx, unmatched det idx)"""
+        if not tracks or not len(dets):
+            return [], list(range(len(tracks))), list(range(len(dets)))
+
+        boxes = dets.boxes
+        scores = np.zeros((len(tracks), len(dets)), dtype=np.float32)
+        for t, track in enumerate(tracks):
+            iou = box_iou(track.box, boxes)
+            scores[t] = np.where(iou >= self.iou_thresh, iou, 0.0)
+            if self.centroid_ratio:
+                # Centroid fallback scores below any valid IoU match
+                tc = (track.box[:2] + track.box[2:]) / 2
+                diag = np.hypot(*(track.box[2:] - track.box[:2]))
+                dist = np.hypot(*(dets.centres - tc).T)
+                near = (scores[t] == 0) & (dist < self.centroid_ratio * diag)
+                scores[t] = np.where(near, self.iou_thresh * 1e-3 * (1 - dist / max(diag, 1e-6)), scores[t])
+
+        pairs = []
+        used_t, used_d = set(), set()
+        for flat in np.argsort(-scores, axis=None, kind="stable"):
+            t, d = divmod(int(flat), len(dets))
+            if scores[t, d] <= 0:
+                break
+            if t in used_t or d in used_d:
+                continue
+            used_t.add(t)
+            used_d.add(d)
+            pairs.append((t, d))
+        return (pairs,
+                [t for t in range(len(tracks)) if t not in used_t],
+                [d for d in range(len(dets)) if d not in used_d])
+
+    def update(self, detections, frame_bgr, timestamp, frame_idx, src_name=""):
+        """
+        Feed one frame's detections
+
+        Args:
+            detections: Detections or list of detection dicts
+            frame_bgr: Frame the detections belong to (kept by reference as best-frame candidate)
+            timestamp: Frame time in seconds
+            frame_idx: Frame index
+            src_name: Source name copied onto new tracks
+
+        Returns:
+            List of Incident: final ones for tracks that ended on this frame, then provisional
+            ones for tracks confirmed on this frame
+        """
+        dets = Detections.coerce(detections)
+        if self.high_conf is None:
+            high, low = dets, dets[:0]
+        else:
+            high = dets[dets.conf >= self.high_conf]
+            low = dets[dets.conf < self.high_conf]
+
+        # Stage 1: high-confidence boxes against all tracks
+        pairs, rest_t, rest_d = self._match(self.tracks, high)
+        for t, d in pairs:
+            self.tracks[t].update(high[d], frame_bgr, timestamp, frame_idx)
+
+        # Stage 2: low-confidence boxes only extend tracks that are still unmatched
+        remaining = [self.tracks[t] for t in rest_t]
+        pairs_low, still_t, _ = self._match(remaining, low)
+        for t, d in pairs_low:
+            remaining[t].update(low[d], frame_bgr, timestamp, frame_idx)
+
+        for t in still_t:
+            remaining[t].missed += 1
+
+        # New tracks from unmatched high-confidence boxes
+        for d in rest_d:
+            self.tracks.append(Track(self._next_id, src_name, high[d], frame_bgr, timestamp, frame_idx))
+            self._next_id += 1
+
+        ended = [tr for tr in self.tracks if tr.missed > self.max_missed]
+        self.tracks = [tr for tr in self.tracks if tr.missed <= self.max_missed]
+        incidents = [Incident(tr) for tr in ended if tr.hits >= self.min_hits]
+        for tr in self.tracks:
+            if not tr.confirmed and tr.hits >= self.min_hits:
+                tr.confirmed = True
+                incidents.append(Incident(tr, provisional=True))
+        return incidents
+
+    def flush(self):
+        """End every open track (e.g. at end of playback) and return the resulting incidents"""
+        ended, self.tracks = self.tracks, []
+        return [Incident(tr) for tr in ended if tr.hits >= self.min_hits]
+
+    @property
+    def active_count(self):
+        return len(self.tracks)
@@ -144,6 +144,55 @@ class DetectionControlPanel(tk.Frame):
             font=FONTS['default']
         )
         conf_spinbox.pack(side=tk.LEFT, padx=SPACING['sm'])
+        
+        # Inference mode (what part of the frame the detector sees)
+        mode_frame = tk.Frame(config_frame, bg=COLORS['white'])
+        mode_frame.pack(fill=tk.X, pady=SPACING['xs'])
+        
+        tk.Label(
+            mode_frame, 
+            text="Inference:", 
+            font=FONTS['default'],
+            bg=COLORS['white'],
+            width=12,
+            anchor='w'
+        ).pack(side=tk.LEFT)
+        
+        self.inference_mode = tk.StringVar(value="full")
+        for text, value in (("Full frame", "full"), ("Seat ROIs", "seat_roi"), ("Tiled", "tiled")):
+            tk.Radiobutton(
+                mode_frame,
+                text=text,
+                variable=self.inference_mode,
+                value=value,
+                font=FONTS['default'],
+                bg=COLORS['white'],
+                activebackground=COLORS['white']
+            ).pack(side=tk.LEFT, padx=SPACING['xs'])
+        
+        # Motion gating (skip detector on static frames)
+        self.motion_gate_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            config_frame,
+            text="Skip static frames (motion gate)",
+            variable=self.motion_gate_var,
+            font=FONTS['default'],
+            bg=COLORS['white'],
+            activebackground=COLORS['white'],
+            anchor='w'
+        ).pack(fill=tk.X, pady=SPACING['xs'])
+        
+        # Offline lossless mode (recorded files: every frame, as fast as possible)
+        self.lossless_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            config_frame,
+            text="Offline: process every frame, no FPS pacing",
+            variable=self.lossless_var,
+            font=FONTS['default'],
+            bg=COLORS['white'],
+            activebackground=COLORS['white'],
+            anchor='w'
+        ).pack(fill=tk.X, pady=SPACING['xs'])
     
     def _create_source_selector(self):
         """Create source type selection section"""
@@ -331,6 +380,18 @@ class DetectionControlPanel(tk.Frame):
         """Get current confidence threshold"""
         return float(self.conf_thresh.get())
     
+    def get_inference_mode(self):
+        """Get selected inference mode ('full', 'seat_roi' or 'tiled')"""
+        return self.inference_mode.get()
+    
+    def get_motion_gate_enabled(self):
+        """Whether motion gating is enabled"""
+        return bool(self.motion_gate_var.get())
+    
+    def get_lossless_enabled(self):
+        """Whether offline lossless playback is enabled"""
+        return bool(self.lossless_var.get())
+    
     def get_source_type(self):
         """Get selected source type"""
         return self.source_type.get()